@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/python
+
+"""
+File name: average.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Date last modified: 10/19/2026
+Version: 1.0.0
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Average turns the ABR or MMN file written by the cropper into an average, in one pass. Epochs are read a block at a time, from the epoch files the cropper writes
+with --epochs or, without them, straight from the cropped file. Each is baseline corrected and left out of a channel's average where it holds an artifact on that channel.
+Sums, sums of squares and counts are saved for each trigger code (click polarity, or standard and deviant tones), so averages can be formed for any set of codes and combined
+across subjects later. For the MMN file the deviant minus standard difference wave is saved too.
+
+Arguments:
+    --infile=[filename.bdf] the cropper's ABR or MMN output file
+    --mmn averages the MMN file (Default if no arg: the ABR file)
+    --outfile=[filename.npz] (Default if no arg: [infile]_avg.npz)
+    --reject=[#.##] largest peak-to-peak amplitude of a clean epoch, in uV (Default if no arg: 40.0 uV for ABR, 150.0 uV for MMN)
+    --threshold=[#.##] largest absolute amplitude of a clean epoch after baseline correction, in uV (Default if no arg: 25.0 uV for ABR, 100.0 uV for MMN)
+    --standard=[#] trigger code of the standard tone (Default if no arg: the most common code)
+    --no_baseline (Default if no arg: the mean before each trigger is subtracted from its epoch)
+    --bootstrap=[#] resamples for a 95% confidence interval of the MMN mismatch amplitude or ABR wave V latency. Needs the cropper's epoch files (Default if no arg: no intervals)
+
+Required Libraries:
+    NumPy
+"""
+
+import os
+import re
+import sys
+import logging
+
+import numpy
+
+# Shared Thukdam modules are kept in the repository root, one directory above this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thukdam.average import ABR_ABSOLUTE, ABR_PEAK_TO_PEAK, AVERAGE_SUFFIX, MMN_ABSOLUTE, MMN_PEAK_TO_PEAK, average_epochs, difference_wave, standard_code, sum_epochs
+from thukdam.bdf import BDFReader
+from thukdam.bootstrap import CONFIDENCE, N_BOOTSTRAP, bootstrap, confidence_interval, mismatch_amplitude, peak_latency
+from thukdam.crop import CROPPED_DIMENSION
+from thukdam.epochs import ABR_WINDOW, MMN_WINDOW, epoch_files, epoch_times, iter_epochs, read_events
+from thukdam.follow import stim_channel
+
+# Set up a logger to track progress of code
+logger = logging.getLogger('Average_Log')
+
+
+# Ensures that certain information gets outputted to the user, while information needed for Debugging gets outputted to a log file. Log File created in script directory.
+if not logger.handlers:
+    c_handler = logging.StreamHandler()
+    f_handler = logging.FileHandler('average.log', mode = 'w')
+    c_handler.setLevel(logging.INFO)
+    f_handler.setLevel(logging.DEBUG)
+    c_format = logging.Formatter('%(levelname)s - %(message)s')
+    f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%m-%d-%Y %H:%M:%S' )
+    c_handler.setFormatter(c_format)
+    f_handler.setFormatter(f_format)
+    logger.addHandler(c_handler)
+    logger.addHandler(f_handler)
+    logger.setLevel(logging.DEBUG)
+
+
+# Begin running actual program code
+logger.debug('\n----------------------------------------INITIATING-----------------------------------------\n')
+
+logger.info('\n   average.py\n   Version: 1.0.0\n   Created 10/19/2026\n   Copyright 2019 Board of Regents of University of Wisconsin System\n')
+
+logger.info('Running File...\n')
+
+
+# Measures how many arguments used when calling program. Input filename is needed
+args = sys.argv
+numargs = len(sys.argv) - 1     # -1 because [0] = self
+
+logger.debug('Arguments read\n')
+logger.info('%i arguments applied\n', numargs)
+
+infile = next((s for s in args if s.startswith('--infile=')), None)
+
+if infile == None:
+    logger.error('Must provide an input file name\n')
+    logger.info('Possible arguments include:\n   --infile=[filename.bdf] (ABR or MMN file written by the cropper)\n   --mmn (Default if no arg: ABR file)\n   --outfile=[filename.npz] (Default if no arg: [infile]_avg.npz)\n   --reject=[#.##] (Default if no arg: 40.0 uV ABR, 150.0 uV MMN, peak-to-peak)\n   --threshold=[#.##] (Default if no arg: 25.0 uV ABR, 100.0 uV MMN)\n   --standard=[#] (Default if no arg: most common code)\n   --no_baseline (Default if no arg: baseline corrected)\n   --bootstrap=[#] (Default if no arg: no confidence intervals)\n')
+    sys.exit(0)
+
+fname = os.path.abspath(infile.split('=', 1)[1])
+epochs_file, events_file = epoch_files(fname)
+
+if os.path.isfile(fname) == False:
+    logger.error('Input file %s does not exist\n', fname)
+    sys.exit(0)
+
+outarg = next((s for s in args if s.startswith('--outfile=')), None)
+outfile = os.path.splitext(fname)[0] + AVERAGE_SUFFIX if outarg == None else os.path.abspath(outarg.split('=', 1)[1])
+
+
+# Identifies the block averaged and the artifact limits. If no argument, Default values for the block are used. Limits are given in uV and used in V.
+mmn = next((s for s in args if s.startswith('--mmn')), None) != None
+if mmn:
+    window, peak_to_peak, absolute = MMN_WINDOW, MMN_PEAK_TO_PEAK, MMN_ABSOLUTE
+else:
+    window, peak_to_peak, absolute = ABR_WINDOW, ABR_PEAK_TO_PEAK, ABR_ABSOLUTE
+
+rejectt = next((s for s in args if s.startswith('--reject=')), None)
+thresht = next((s for s in args if s.startswith('--threshold=')), None)
+standardt = next((s for s in args if s.startswith('--standard=')), None)
+peak_to_peak = peak_to_peak if rejectt == None else float(re.findall("\d+\.\d+", rejectt)[0]) * 1e-6
+absolute = absolute if thresht == None else float(re.findall("\d+\.\d+", thresht)[0]) * 1e-6
+standard = None if standardt == None else int(re.findall("\d+", standardt)[0])
+baseline = next((s for s in args if s.startswith('--no_baseline')), None) == None
+bootstrapt = next((s for s in args if s.startswith('--bootstrap')), None)
+n_resamples = None if bootstrapt == None else int((re.findall("\d+", bootstrapt) or [N_BOOTSTRAP])[0])
+
+logger.info('Epochs with more than %.1f uV peak-to-peak or %.1f uV absolute on a channel are left out of that channel\n', peak_to_peak * 1e6, absolute * 1e6)
+
+
+# Epochs are read a block at a time, from their memory-mapped file when the cropper wrote one, else cut straight from the cropped file. The event channel is not averaged.
+reader = BDFReader(fname, dimension=CROPPED_DIMENSION)
+stim = stim_channel(reader.header)
+picks = [x for x in range(0, reader.n_channels) if x != stim]
+labels = [reader.header['signals'][x]['label'] for x in picks]
+times = epoch_times(reader.sfreq, window[0], window[1])
+
+epochs = None
+if os.path.isfile(epochs_file) and os.path.isfile(events_file):
+    epochs = numpy.load(epochs_file, mmap_mode='r')
+    events = numpy.load(events_file)
+    if epochs.shape[2] != len(times) or epochs.shape[1] != len(labels):
+        logger.error('Epoch file %s does not match %s: %i channels of %i samples, expected %i of %i\n', epochs_file, fname, epochs.shape[1], epochs.shape[2], len(labels), len(times))
+        sys.exit(0)
+    logger.info('Averaging %i epochs of %i channels from %s...\n', epochs.shape[0], epochs.shape[1], epochs_file)
+    sums = average_epochs(epochs, events, times, baseline, peak_to_peak, absolute)
+else:
+    events = read_events(reader)
+    logger.info('Averaging %i epochs of %i channels from %s...\n', len(events), len(picks), fname)
+    sums = sum_epochs(iter_epochs(reader, events, window[0], window[1], picks), len(picks), times, baseline, peak_to_peak, absolute)
+
+if sums.codes == []:
+    logger.error('No triggers found in %s\n', fname)
+    sys.exit(0)
+
+for code in sums.codes:
+    logger.info('Trigger code %i: %s epochs kept, %s left out, per channel\n', code, sums.counts[code].tolist(), sums.rejected[code].tolist())
+snr = sums.snr()
+for x in range(0, len(labels)):
+    logger.info('%s: SNR %.2f\n', labels[x], snr[x])
+
+extra = {'times': times, 'channels': numpy.array(labels), 'mean': sums.mean(), 'sem': sums.sem()}
+
+# For the MMN block the standard and deviant tones are averaged apart, and the deviant minus standard difference wave is saved with them
+if mmn:
+    if standard == None:
+        standard = standard_code(sums)
+    deviants = [code for code in sums.codes if code != standard]
+    if standard not in sums.codes or deviants == []:
+        logger.error('MMN file needs standard (code %s) and deviant triggers, found codes %s\n', standard, sums.codes)
+        sys.exit(0)
+    logger.info('Standard tone: trigger code %i. Deviant tones: trigger codes %s\n', standard, deviants)
+    difference, difference_sem = difference_wave(sums, standard, deviants)
+    extra.update(standard=standard, deviants=numpy.array(deviants), difference=difference, difference_sem=difference_sem)
+    peak = numpy.nanargmin(difference.mean(axis=0)[times >= 0]) + numpy.flatnonzero(times >= 0)[0]
+    logger.info('Difference wave most negative at %.0f ms: %.2f uV, averaged over channels\n', times[peak] * 1000, difference.mean(axis=0)[peak] * 1e6)
+
+
+# Confidence intervals are drawn by resampling the epochs of each condition, which needs them in their memory-mapped file
+if n_resamples != None and epochs is None:
+    logger.warning('No epoch files for %s, so no confidence interval is given. Run the cropper with --epochs first.\n', fname)
+elif n_resamples != None:
+    options = {'baseline': baseline, 'peak_to_peak': peak_to_peak, 'absolute': absolute}
+    if mmn:
+        measure, unit, scale = 'mismatch_amplitude', 'uV', 1e6
+        conditions = [[standard], deviants]
+        statistic = mismatch_amplitude(times)
+        estimate = statistic([sums.mean([standard])[None], sums.mean(deviants)[None]])[0]
+    else:
+        measure, unit, scale = 'wave_v_latency', 'ms', 1e3
+        conditions = [sums.codes]
+        statistic = peak_latency(times)
+        estimate = statistic([sums.mean()[None]])[0]
+    logger.info('Drawing %i bootstrap resamples of the %s...\n', n_resamples, measure.replace('_', ' '))
+    values = bootstrap(epochs, events, times, conditions, statistic, n_resamples, **options)
+    lower, upper = confidence_interval(values)
+    for x in range(0, len(labels)):
+        logger.info('%s: %s %.2f %s, %.0f%% confidence interval %.2f to %.2f %s\n', labels[x], measure.replace('_', ' '), estimate[x] * scale, unit, CONFIDENCE * 100, lower[x] * scale, upper[x] * scale, unit)
+    extra.update(ci_measure=measure, ci_estimate=estimate, ci_lower=lower, ci_upper=upper, ci_resamples=n_resamples)
+
+sums.save(outfile, **extra)
+logger.info('Average complete! Sums saved to %s\n', outfile)
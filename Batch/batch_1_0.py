@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/python
+
+"""
+File name: batch.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Date last modified: 10/19/2026
+Version: 1.0.0
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Batch runs the cropper and/or decimator over every .bdf file in a study directory (or matching a glob pattern) without any prompts, all in one Python process so MNE is only loaded once.
+With more than one worker, files are run on a pool of worker processes instead. Each file's peak memory is estimated from its .bdf header and files are only started while they fit the memory budget, largest first.
+Every output gets a build record (output.bdf.build.json) of the input, code version and arguments it was made from, so running the batch again only reruns jobs whose outputs are out of date.
+With a cache directory, outputs are also stored by the contents of their input, the code version and the arguments, and delivered by link to anyone who asks for the same job again.
+Finished jobs are journaled (summary.json.journal) as they complete and outputs are only given their real name once fully written, so a batch that was stopped part way can be
+started again with the same arguments and carries on where it stopped. In watch mode the inputs directory is watched for recordings as they land, and each one is run as soon
+as it has stopped changing. A JSON summary with the timing, throughput, status and outputs of every file is written when the batch is done.
+
+Arguments:
+    --inputs=[directory] or a glob pattern (e.g Y:/study/year/*/*.bdf). Directories are searched recursively.
+    --outdir=[directory] (Default if no arg: outputs are saved next to each input file)
+    --profile=[profile.json] (Default if no arg: crop only, with the cropper's default arguments)
+    --summary=[summary.json] (Default if no arg: batch_summary.json in the current directory)
+    --workers=[#] (Default if no arg: 1, files are run one after another in this process)
+    --memory_budget=[#.##] GB of memory the workers may use together (Default if no arg: 75% of the computer's memory)
+    --jobs_per_worker=[#] files a worker process runs before it is replaced (Default if no arg: 10)
+    --force (Default if no arg: outputs already built from the same input, code and arguments are kept and their jobs skipped)
+    --cache=[directory] shared cache of outputs, reused when the same data is run with the same arguments again (Default if no arg: no cache)
+    --cache_size=[#.##] GB the cache may hold before the least recently used outputs are removed (Default if no arg: 50.0 GB)
+    --restart (Default if no arg: a batch that was stopped part way resumes at the first file it had not finished)
+    --watch keeps watching the inputs directory and processes every new recording once it is complete, until stopped with Ctrl+C (Default if no arg: runs the files found once)
+    --stable=[#.##] seconds a new file must stay unchanged before it is processed when watching (Default if no arg: 30.0 sec)
+    --poll looks through the watched directory every few seconds instead of using inotify, needed for network shares (Default if no arg: inotify where available)
+
+Required Libraries:
+    MNE
+    NumPy
+    SciPy
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+
+# Shared Thukdam modules are kept in the repository root, one directory above this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thukdam.batch import find_inputs, load_profile, make_jobs, run_jobs, write_summary
+from thukdam.cache import CACHE_SIZE, OutputCache
+from thukdam.journal import Journal
+from thukdam.schedule import JOBS_PER_WORKER, Scheduler, estimate_memory, memory_budget
+from thukdam.watch import STABLE_SECONDS, FolderWatcher
+
+# Worker processes started by the scheduler import this script again on Windows, so only the process started by the user runs the batch
+if __name__ == '__main__':
+
+    # Set up a logger to track progress of code
+    logger = logging.getLogger('Batch_Log')
+
+
+    # Ensures that certain information gets outputted to the user, while information needed for Debugging gets outputted to a log file. Log File created in script directory.
+    if not logger.handlers:
+        c_handler = logging.StreamHandler()
+        f_handler = logging.FileHandler('batch.log', mode = 'w')
+        c_handler.setLevel(logging.INFO)
+        f_handler.setLevel(logging.DEBUG)
+        c_format = logging.Formatter('%(levelname)s - %(message)s')
+        f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%m-%d-%Y %H:%M:%S' )
+        c_handler.setFormatter(c_format)
+        f_handler.setFormatter(f_format)
+        logger.addHandler(c_handler)
+        logger.addHandler(f_handler)
+        logger.setLevel(logging.DEBUG)
+
+
+    # Begin running actual program code
+    logger.debug('\n----------------------------------------INITIATING-----------------------------------------\n')
+
+    logger.info('\n   batch.py\n   Version: 1.0.0\n   Created 10/19/2026\n   Copyright 2019 Board of Regents of University of Wisconsin System\n')
+
+    logger.info('Running File...\n')
+
+
+    # Measures how many arguments used when calling program, if no inputs are given, throws error
+    args = sys.argv
+    numargs = len(sys.argv) - 1     # -1 because [0] = self
+
+    logger.debug('Arguments read\n')
+    logger.info('%i arguments applied\n', numargs)
+
+    inputs = next((s for s in args if s.startswith('--inputs=')), None)
+
+    if inputs == None:
+        logger.error('No inputs argument provided. Must provide a directory or glob pattern of .bdf files\n')
+        logger.info('Possible arguments include:\n   --inputs=[directory] or a glob pattern (e.g Y:/study/year/*/*.bdf)\n   --outdir=[directory] (Default if no arg: next to each input file)\n   --profile=[profile.json] (Default if no arg: crop only, with default arguments)\n   --summary=[summary.json] (Default if no arg: batch_summary.json)\n   --workers=[#] (Default if no arg: 1)\n   --memory_budget=[#.##] GB (Default if no arg: 75% of memory)\n   --jobs_per_worker=[#] (Default if no arg: 10)\n   --force (Default if no arg: skips jobs whose outputs are up to date)\n   --cache=[directory] (Default if no arg: no cache)\n   --cache_size=[#.##] GB (Default if no arg: 50.0 GB)\n   --restart (Default if no arg: resumes a batch that was stopped part way)\n   --watch (Default if no arg: runs the files found once)\n   --stable=[#.##] sec (Default if no arg: 30.0 sec)\n   --poll (Default if no arg: inotify where available)\n')
+        sys.exit(0)
+
+
+    # Finds all input files. Outputs of earlier runs (_mmn, _abr and _deci files) are left out
+    logger.debug('Finding input files...\n')
+    pattern = inputs.split('=', 1)[1]
+    fnames = find_inputs(pattern)
+
+    # Identifies if user asked to keep watching the inputs directory for new recordings, how long new files must stay unchanged and whether to poll instead of using inotify
+    watch = next((s for s in args if s.startswith('--watch')), None) != None
+    polling = next((s for s in args if s.startswith('--poll')), None) != None
+    argstable = next((s for s in args if s.startswith('--stable=')), None)
+    stable = STABLE_SECONDS if argstable == None else float(re.findall("\d+\.?\d*", argstable)[0])
+
+    if watch and os.path.isdir(pattern) == False:
+        logger.error('To watch for new recordings, inputs must be a directory\n')
+        sys.exit(0)
+
+    if fnames == [] and not watch:
+        logger.error('No .bdf files found in %s\n', pattern)
+        sys.exit(0)
+
+    logger.info('%i .bdf files found\n', len(fnames))
+
+
+    # Gets the output directory, parameter set and summary file name from called arguments
+    argdir = next((s for s in args if s.startswith('--outdir=')), None)
+    outdir = None if argdir == None else argdir.split('=', 1)[1]
+
+    if outdir != None and os.path.isdir(outdir) == False:
+        logger.debug('Creating output directory %s\n', outdir)
+        os.makedirs(outdir)
+
+    argprofile = next((s for s in args if s.startswith('--profile=')), None)
+    try:
+        profile = load_profile(None if argprofile == None else argprofile.split('=', 1)[1])
+    except (IOError, ValueError) as e:
+        logger.error('Could not read profile: %s\n', e)
+        sys.exit(0)
+
+    logger.info('Profile: %s\n', profile)
+
+    argsummary = next((s for s in args if s.startswith('--summary=')), None)
+    summary_file = os.path.abspath('batch_summary.json' if argsummary == None else argsummary.split('=', 1)[1])
+
+
+    # Identifies if user asked for worker processes, a memory budget and how many files a worker runs before it is replaced
+    argworkers = next((s for s in args if s.startswith('--workers=')), None)
+    workers = 1 if argworkers == None else int(re.findall("\d+", argworkers)[0])
+
+    argjobs = next((s for s in args if s.startswith('--jobs_per_worker=')), None)
+    jobs_per_worker = JOBS_PER_WORKER if argjobs == None else int(re.findall("\d+", argjobs)[0])
+
+    argbudget = next((s for s in args if s.startswith('--memory_budget=')), None)
+    budget = memory_budget() if argbudget == None else float(re.findall("\d+\.?\d*", argbudget)[0]) * 1e9
+
+    # Identifies if user asked to rebuild every output, even those that are up to date
+    force = next((s for s in args if s.startswith('--force')), None) != None
+
+    if force:
+        logger.info('Rebuilding all outputs\n')
+
+    # Identifies if user indicated an output cache directory and its size
+    argcache = next((s for s in args if s.startswith('--cache=')), None)
+    argcachesize = next((s for s in args if s.startswith('--cache_size=')), None)
+    cache_size = CACHE_SIZE if argcachesize == None else float(re.findall("\d+\.?\d*", argcachesize)[0]) * 1e9
+
+    if argcache == None:
+        cache = None
+    else:
+        cache = OutputCache(argcache.split('=', 1)[1], cache_size)
+        logger.info('Using output cache %s (up to %.1f GB)\n', cache.directory, cache_size / 1e9)
+
+    # Opens the journal of finished jobs. Unless the user asked to restart, files finished by an earlier, interrupted run of this batch are not run again
+    restart = next((s for s in args if s.startswith('--restart')), None) != None
+    journal = Journal(summary_file + '.journal', restart)
+
+    if journal.results:
+        logger.info('Resuming batch, %i jobs already finished\n', len(journal.results))
+
+    if workers == 1 and budget == None:
+        budget = float('inf')
+    elif workers > 1 and budget == None:
+        logger.error('Could not find the size of this computer\'s memory, please indicate a --memory_budget=[#.##] in GB\n')
+        sys.exit(0)
+
+
+    # Logs how each job finished
+    def log_results(results):
+        for result in results:
+            if result.get('resumed'):
+                logger.info('%s on %s finished in an earlier run\n', result['tool'], os.path.basename(result['input']))
+            elif result['status'] == 'current':
+                logger.info('%s on %s is up to date\n', result['tool'], os.path.basename(result['input']))
+            elif result['status'] == 'cached':
+                logger.info('%s on %s taken from the cache\n', result['tool'], os.path.basename(result['input']))
+            elif result['status'] == 'ok':
+                logger.info('%s on %s done in %.1f sec (%.1f MB/sec)\n', result['tool'], os.path.basename(result['input']), result['seconds'], result['mb_per_sec'])
+            else:
+                logger.error('%s on %s %s: %s\n', result['tool'], os.path.basename(result['input']), result['status'], result['error'])
+
+
+    # Makes the scheduler task of one input file, with its estimated peak memory
+    def make_task(fname, jobs):
+        try:
+            memory = estimate_memory(fname, profile)
+        except (IOError, ValueError) as e:
+            # Unreadable headers are left to the scripts to report, with no memory reserved for them
+            logger.warning('Could not estimate memory of %s: %s\n', fname, e)
+            memory = 0
+        logger.debug('Estimated peak memory of %s = %.1f MB\n', fname, memory / 1e6)
+        return {'input': fname, 'jobs': jobs, 'memory': memory}
+
+
+    # Runs every job without prompts. A failed file is logged and the batch moves on to the next file
+    results = []
+    scheduler = None
+    began = time.time()
+
+    if watch:
+        # Recordings already in the directory and every one that lands later are run on the worker pool. The summary is rewritten each time a file is done.
+        watcher = FolderWatcher(pattern, stable, polling=polling)
+        scheduler = Scheduler(workers, budget, jobs_per_worker, os.path.dirname(summary_file), force, cache)
+        logger.info('Watching %s for new recordings using %s, on %i worker processes. Press Ctrl+C to stop.\n', watcher.directory, watcher.mode, workers)
+        scheduler.start()
+        try:
+            while True:
+                new_files = watcher.ready()
+                for fname in new_files:
+                    logger.info('Recording complete: %s\n', fname)
+                scheduler.submit([make_task(fname, make_jobs(fname, profile, outdir)) for fname in new_files])
+                finished = scheduler.collect(timeout=0)
+                for task, task_results in finished:
+                    log_results(task_results)
+                    results.extend(task_results)
+                if finished:
+                    write_summary(results, summary_file, profile, time.time() - began, scheduler.summary())
+        except KeyboardInterrupt:
+            logger.info('Stopping, waiting for running jobs to finish...\n')
+        watcher.close()
+        scheduler.stop()
+        for task, task_results in scheduler.collect(timeout=0):
+            log_results(task_results)
+            results.extend(task_results)
+        scheduler = scheduler.summary()
+    elif workers > 1:
+        logger.info('Running on %i worker processes with a memory budget of %.1f GB...\n', workers, budget / 1e9)
+        tasks = []
+        for fname in fnames:
+            jobs = make_jobs(fname, profile, outdir)
+            resumed = journal.finished(jobs)
+            if resumed != None:
+                log_results(resumed)
+                results.extend(resumed)
+                continue
+            tasks.append(make_task(fname, jobs))
+
+        log_dir = os.path.dirname(summary_file)
+        scheduler = Scheduler(workers, budget, jobs_per_worker, log_dir, force, cache)
+
+        # Each file is journaled as soon as its jobs finish
+        def finish_task(task, task_results):
+            journal.record(task_results)
+            log_results(task_results)
+
+        results.extend(scheduler.run(tasks, callback=finish_task))
+        scheduler = scheduler.summary()
+        logger.info('Most memory reserved at once = %.1f MB\n', scheduler['peak_reserved_mb'])
+    else:
+        for x, fname in enumerate(fnames):
+            logger.info('File %i of %i: %s\n', x + 1, len(fnames), fname)
+            jobs = make_jobs(fname, profile, outdir)
+            file_results = journal.finished(jobs)
+            if file_results == None:
+                file_results = run_jobs(jobs, force, cache)
+                journal.record(file_results)
+            log_results(file_results)
+            results.extend(file_results)
+
+    summary = write_summary(results, summary_file, profile, time.time() - began, scheduler)
+    journal.remove()
+
+    if summary['n_resumed']:
+        logger.info('%i jobs had finished in an earlier run of this batch\n', summary['n_resumed'])
+    logger.info('Batch done: %i of %i jobs run, %i up to date, %i from the cache and %i failed or skipped, in %.1f sec (%.1f MB/sec, %.0f files/hour)\n', summary['n_ok'], summary['n_jobs'], summary['n_current'], summary['n_cached'], summary['n_failed'], summary['total_seconds'], summary['mb_per_sec'], summary['files_per_hour'])
+    logger.info('Summary saved to %s\n', summary_file)
@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/python
+
+"""
+File name: decimator.py
+Author: Enrique Guzman
+Date created: 01/25/2019
+Date last modified: 10/19/2026
+Version: 1.3.0
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Decimator takes in a raw .bdf EEG data file and returns a .bdf file with resampled and filtered data.
+
+Arguments:
+    --infile=[filename.bdf] or a complete file path (e.g Y:/study/year/folder/filename.bdf)     
+    --outfile=[filename.bdf]   
+    --samp_rate=[#] (Default if no arg: 512.0 Hz)   
+    --low_freq=[#] (Default if no arg: None, no low freq cut-off)
+    --high_freq=[#] (Default if no arg: 256.0, half of sampling rate)   
+    --chans_to_filter=[#, #, #,...] (Default if no arg: None, all EEG channels filtered)
+    --line_freq=[#.##] removes line noise at this frequency and all its harmonics from the filtered channels, or at our 60.0 Hz mains when given as --line_freq alone (Default if no arg: None, no line noise removed)
+    --no_prompt (Default if no arg: asks to confirm arguments and to view plots)
+    --psd also writes the Welch power spectrum of each channel but the stim channels, before and after decimating, to [outfile]_psd.npz (Default if no arg: no spectra written)
+    
+Required Libraries:
+    MNE
+    NumPy
+    SciPy
+"""
+
+import mne
+import logging 
+import sys
+import os
+import re
+import numpy
+
+# Shared Thukdam modules are kept in the repository root, one directory above this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thukdam.bdf import read_header, record_granule
+from thukdam.filters import LINE_FREQ, BlockDecimator
+from thukdam.spectrum import WelchPSD, psd_file, save_spectra
+from thukdam.stats import FittedWriter
+from thukdam.stream import PrefetchReader, WriteBehind
+
+# Set up a logger to track progress of code
+logger = logging.getLogger('Deci_Log')
+
+
+# Ensures that certain information gets outputted to the user, while information needed for Debugging gets outputted to a log file. Log File created in script directory.
+if not logger.handlers:
+    c_handler = logging.StreamHandler()
+    f_handler = logging.FileHandler('decimator.log', mode = 'w')
+    c_handler.setLevel(logging.INFO)
+    f_handler.setLevel(logging.DEBUG)
+    c_format = logging.Formatter('%(levelname)s - %(message)s')
+    f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%m-%d-%Y %H:%M:%S' )
+    c_handler.setFormatter(c_format)
+    f_handler.setFormatter(f_format)
+    logger.addHandler(c_handler)
+    logger.addHandler(f_handler)
+    logger.setLevel(logging.DEBUG)
+
+
+# Begin running actual program code 
+logger.debug('\n----------------------------------------INITIATING-----------------------------------------\n')
+
+logger.info('\n   decimator.py\n   Version: 1.3.0\n   Created 10/19/2026\n   Copyright 2019 Board of Regents of University of Wisconsin System\n')
+
+logger.info('Running File...\n')
+
+
+# Measures how many arguments used when calling program, if none, throws error. If input and output filenames aren't called, error is thrown 
+args = sys.argv
+numargs = len(sys.argv) - 1     # -1 because [0] = self
+
+logger.debug('Arguments read\n')
+logger.info('%i arguments applied\n', numargs)
+
+logger.debug('Checking if number of agruments called meets minimal requirement of input file and output file names (minimum number of arguments = 2)...\n')
+
+if numargs == 0:
+    logger.error('No arguments provided. Must at least provide input and output file names\n')
+    logger.info('Possible arguments include:\n   --infile=[filename.bdf] or a complete file path (e.g Y:/study/year/folder/filename.bdf)\n   --outfile=[filename.bdf]\n   --samp_rate=[#] (Default if no arg: 512 Hz)\n   --low_freq=[#] (Default if no arg: None, no low freq cut-off)\n   --high_freq=[#] (Default if no arg: half of sampling rate)\n   --chans_to_filter=[#, #, #, ...] (Default if no arg: None, all EEG channels filtered)\n   --line_freq=[#.##] or --line_freq for 60.0 Hz (Default if no arg: None, no line noise removed)\n   --no_prompt (Default if no arg: asks to confirm arguments and to view plots)\n   --psd (Default if no arg: no spectra written)')
+    sys.exit(0)
+elif numargs < 2:
+     logger.error('Not enough arguments provided. Must at least provide 1 input file and 1 output file names.\n')
+     sys.exit(0)
+     
+     
+# Checks for specific argument format. 1 input filename must be indicated in .bdf format, else error will be thrown, and 2 output file names must be indicated in .bdf format else error thrown (other arguments optional). 
+infile = [s for s in args if 'infile' in s]
+outfile = [s for s in args if 'outfile' in s]
+bdf_files = [s for s in args if '.bdf' in s]
+
+logger.debug('Checking if input and outfile arguments are in proper format (need 1 .bdf input file, and 2 .bdf output file names)...\n')
+
+logger.debug('Looking for input file...\n')
+if infile == []:
+    logger.error('Input file name must be in proper format, please look above from proper argument format.\n')
+    sys.exit(0)
+
+if len(infile) != 1:
+    logger.error('Please indicate only 1 input file name in .bdf format you wish to crop.\n')
+    sys.exit(0)
+   
+logger.debug('Input file to crop found\n')
+
+logger.debug('Looking for output file name...\n')
+if outfile == []:
+    logger.error('Output file name must be in proper format, please look above from proper argument format.\n')
+    sys.exit(0)
+    
+if len(outfile) != 1:
+    logger.error('Please indicate only 1 output file name in .bdf format.\n')
+    sys.exit(0)
+    
+logger.debug('Output file name found\n')
+
+if len(bdf_files) != 2:
+    logger.error('Please indicate all file formats in .bdf format. 1 input file to crop, and 1 output file name to save decimated data to.\n')
+    sys.exit(0)
+    
+logger.debug('Both files in .bdf format.\n')
+
+
+# If only the 2 necessary arguments are called (input and output files), user is warned that all other values will be defaulted
+if numargs == 2:
+    logger.warning('Only input and output filenames included in arguments. samp_rate defaulted to 512 Hz, lowpass_freq defaulted to None, highpass_frew defaulted to 256, and all EEG channels in input file will be filtered\n')
+    
+
+# Checks if input file exists in current directory, or input path, if it doesn't throws error
+logger.debug('Extracting input file name or input file path from arguments\n')
+input_file = next(s for s in args if 'infile' in s)
+infile_string = input_file.split('=')
+fname = infile_string[1]  
+
+logger.debug('Extracted file name/path = %s\n', fname)
+
+logger.debug('Finding input file or file directory\n')
+
+if os.path.isabs(os.path.realpath(fname)) == True:
+    fdir = os.path.dirname(fname)
+    if os.path.dirname(fname) != '':
+        os.chdir(fdir)      #changes current working directory to file directory if not already
+    if os.path.isfile(os.path.basename(fname)) == False:
+        logger.error('Input file does not exist in indicated directory, please input a different file name, or a correct file path\n')
+        sys.exit(0)
+    fname = os.path.basename(fname)
+    logger.debug('Input file found within indicated path\n')
+elif os.path.isfile(fname) != True:
+     logger.error('Input file does not exist in current directory, please input different file namr, or a complete file path (Use "/" not "\\")\n')
+     sys.exit(0)  
+    
+logger.info('Input file exists\n')
+    
+
+# Lists to user their called arguments, if user sees error, they can exit and restart program, else program continues with inputted arguments.
+position = 1  
+logger.info('All inputted arguments listed below...')
+while (numargs >= position):  
+    logger.info('Parameter %i: %s', position, sys.argv[position])
+    position = position + 1
+
+# Identifies if user asked to run without prompts (e.g. from the batch runner). If so, arguments are taken as correct and no plots are offered.
+no_prompt = next((s for s in args if s.startswith('--no_prompt')),None)
+
+if no_prompt != None:
+    logger.debug('no_prompt argument found, arguments taken as correct\n')
+    correct = 'Y'
+else:
+    logger.debug('\nAsking user if all inputted arguments are correct...\n') 
+    correct = raw_input("Are all arguments correct? [y/n]: ")
+while (len(correct) >= 1):
+    if correct.upper() == 'Y':
+        logger.debug('User indicated arguments are correct\n')
+        break
+    elif correct.upper() == 'N': 
+        logger.debug('User indicated arguments are incorrect\n')
+        print("\nPlease restart program with arguments wanted.\n")
+        sys.exit(0)
+    else:
+        logger.debug('User entered an answer other than "Y" or "N", asked to re-enter a proper response\n')
+        print("\nPlease enter a proper response.")
+        correct = raw_input("Are all arguments correct? [y/n]: ")
+        
+        
+# Reads input file data and information
+logger.info('Preparing file...\n')
+
+logger.debug('Begin reading input file info\n')
+raw = mne.io.read_raw_edf(fname, verbose = False)
+print("\n")
+logger.info('Input file overview: %s\n', raw)
+freq = raw.info['sfreq']    #current sampling rate
+logger.info('Loaded data sampling rate = %s Hz\n', freq)
+
+
+# Identifies if user indicated specific desired sampling frequency. If no argument, Default value used samp_rate = 512 Hz.
+logger.debug('Extracting desired sampling rate from arguments\n')
+samp_rate = next((s for s in args if 'samp_rate' in s), None)
+
+logger.debug('Finding new sampling rate...\n')
+if samp_rate == None:
+    sfreq = 512.0
+    logger.debug('No samp_rate argument found, sfreq defaulted to 512 Hz\n')
+else:
+    sfreq = float(re.findall("\d+\.\d+", samp_rate)[0])
+    logger.debug('Extracted sampling frequency = %s Hz\n', sfreq)
+    
+logger.info('Resampling frequency = %s Hz\n', sfreq)
+
+
+# Identifies if user indicated specific low and highpass filter frequencies. If no argument, Default values used lowpass_freq = None and highpass_freq = sfreq/2 (half of new sampling rate)
+logger.debug('Extracting low and high pass frequencies from arguments\n')
+low = next((s for s in args if 'low_freq' in s), None)
+high = next((s for s in args if 'high_freq' in s), None)
+
+logger.debug('Finding low frequency cut-off\n')
+if low == None:
+    lfreq = None
+    logger.debug('No low frequency cut-off argument found, low_freq defaulted to None\n')
+else:
+    lfreq = float(re.findall("\d+\.\d+", low)[0])
+    logger.debug('Extracted low frequency cut-off = %s Hz\n', lfreq)
+    
+logger.info('Low frequency cut-off = %s Hz\n', lfreq)
+
+logger.debug('Finding high frequency cut-off\n')
+if high == None:
+    hfreq = float(sfreq/2)
+    logger.debug('No high frequency cut-off argument found, high_freq defaulted to sfreq/2\n')
+else:
+    hfreq = float(re.findall("\d+\.\d+", high)[0])
+    logger.debug('Extracted high frequency cut-off = %s Hz\n', hfreq)
+    
+logger.info('High frequency cut-off = %s Hz\n', hfreq)
+
+
+# Identifies if user asked to remove line noise. If so, the mains frequency and all its harmonics below the high frequency cut-off are removed by one band-stop filter.
+logger.debug('Extracting line noise frequency from arguments\n')
+line = next((s for s in args if s.startswith('--line_freq')), None)
+
+if line == None:
+    line_freq = None
+    logger.debug('No line noise frequency argument found, line_freq defaulted to None\n')
+elif '=' not in line:
+    line_freq = LINE_FREQ
+    logger.debug('No line noise frequency given, line_freq defaulted to %s Hz mains\n', line_freq)
+else:
+    line_freq = float(re.findall("\d+\.\d+", line)[0])
+    logger.debug('Extracted line noise frequency = %s Hz\n', line_freq)
+
+logger.info('Line noise frequency = %s Hz\n', line_freq)
+
+
+# Identifies if user indicated to filter only certain channels, if not, all EEG channels will be filtered
+logger.debug('Checking if user indicated specific channels to filter\n')
+chans = next((s for s in args if 'chans' in s),None)
+stim_picks = mne.pick_types(raw.info, meg=False, stim=True, exclude=[])
+
+logger.debug('Finding channels to filter\n')
+if chans == None:
+    logger.debug('No argument to filter specific channels found, all EEG channels will be filtered\n')
+    logger.info('Filtering all EEG Channels...\n')
+    filt_picks = [x for x in xrange(0,len(raw.info['ch_names'])) if x not in stim_picks]
+
+else:
+    chans_string = chans.split('=')
+    chan_indices = chans_string[1]
+    chan_picks = chan_indices.strip('[]').split(',')
+    logger.debug('Argument specifying channels found\n')
+    logger.info('Filtering specified channels...\n')
+    if all(c.strip().isdigit() for c in chan_picks):
+        filt_picks = [int(c) for c in chan_picks]
+    else:
+        filt_picks = mne.pick_channels(raw.info['ch_names'], include=[c.strip() for c in chan_picks])
+
+
+# Gets output filename from called argument
+logger.debug('Extracting output file name from arguments\n')
+argout = next(s for s in args if 'outfile' in s)
+outstring = argout.split('=')
+deci_outfile = outstring[1]
+logger.debug('Output file name found. File name = %s\n', deci_outfile)
+
+
+# Gets input bdf file header from raw data file to use in the created decimated file
+logger.debug('Reading input file header information to save into decimated file...\n')
+infile_info = read_header(fname)
+
+
+# Filters and resamples the data one block of whole data records at a time. Upcoming blocks are read on a background thread while the current block is filtered and resampled, so reading the file and filtering overlap.
+logger.info('Filtering data and resampling from %s Hz to %s Hz...\n', freq, sfreq)
+decimator = BlockDecimator(freq, sfreq, lfreq, hfreq, len(raw.info['ch_names']), filt_picks, stim_picks, line_freq)
+if line_freq != None and len(decimator.harmonics):
+    logger.info('Removing line noise at %s Hz\n', ', '.join('%g' % f for f in decimator.harmonics))
+elif line_freq != None:
+    logger.info('High frequency cut-off of %s Hz is below the %s Hz line noise, which the low-pass filter already removes. No notch filter applied.\n', hfreq, line_freq)
+spans = decimator.spans(len(raw), infile_info['signals'][0]['samples_per_record'])
+logger.debug('Processing %i blocks, each read with %i extra samples on both sides for the filters\n', len(spans), decimator.margin)
+
+# The output length is known before any block is made, so data records fit it exactly. Samples short of the smallest whole data record are trimmed from the end instead of padded.
+n_deci = decimator.n_output(len(raw))
+n_samples = n_deci - n_deci % record_granule(sfreq)
+if n_samples < n_deci:
+    logger.warning('Last %i samples do not fill a whole data record and were trimmed from the output\n', n_deci - n_samples)
+
+
+logger.info('Saving output file data...\n')
+
+logger.info('Creating individual channel headers...\n')
+x = 0
+chan_infos = []
+
+logger.debug('Writing individual channel headers in accordance to respective channels on input file...\n')
+for x in xrange(0,len(raw.info['ch_names'])):
+    dict = infile_info['signals'][x]
+    chan_info = {'label': dict['label'], 'dimension': 'mV', 'sample_rate': sfreq, 'digital_max': 8388607, 'digital_min': -8388608, 'prefilter': dict['prefilter'], 'transducer': dict['transducer']}
+    chan_infos.append(chan_info)
+    
+logger.info('All channel headers created!\n')
+
+
+# Creates .bdf data file for the decimated data. The writer picks the data record duration so the data is written in a few large records with no padding.
+# Each decimated block is handed to a writer thread as soon as it is made, which spools it to disk and adds it to per-channel statistics while the next block is
+# filtered and resampled. Once the last block is in, each channel's physical range is fit to its own data, as the cropper does, and the file is written from the spool.
+logger.debug('Begin writing data to .bdf file.\n')
+d = WriteBehind(FittedWriter(deci_outfile, chan_infos, sfreq, n_samples, header=infile_info))
+
+logger.info('Creating file: %s with %i channels.\n', deci_outfile, len(raw.info['ch_names']))
+logger.debug('Data record duration = %s sec\n', d.writer.record_duration)
+
+# Identifies if user asked for power spectra. If so, the spectra of the data channels before and after decimating are added up from each block as it goes by
+psd_arg = next((s for s in args if s.startswith('--psd')), None)
+if psd_arg != None:
+    input_psd = WelchPSD(freq, len(decimator.data_picks))
+    output_psd = WelchPSD(sfreq, len(decimator.data_picks))
+
+logger.info('Writing data to output file...\n')
+written = 0
+reader = PrefetchReader(lambda first, last, start, stop: raw.get_data(start=first, stop=last), spans)
+for (first, last, start, stop), block in reader:
+    logger.debug('Filtering and resampling data from %s sec to %s sec\n', start/freq, stop/freq)
+    deci_block = decimator.process(block, first, start, stop)[:, :n_samples - written]
+    written += deci_block.shape[1]
+    d.write(deci_block)
+    if psd_arg != None:
+        input_psd.update(block[decimator.data_picks, start - first:stop - first])
+        output_psd.update(deci_block[decimator.data_picks])
+
+logger.debug('Resampling complete\n')
+
+read_stats = reader.summary()
+logger.info('Read %i blocks (%.1f MB) in %.1f sec at %.1f MB/s. Filtering waited %.1f sec of %.1f sec for data, average read-ahead queue depth %.2f of %i.\n', read_stats['blocks'], read_stats['megabytes'], read_stats['read_seconds'], read_stats['read_mb_per_sec'], read_stats['wait_seconds'], read_stats['total_seconds'], read_stats['mean_queue_depth'], read_stats['queue_size'])
+        
+logger.info('Total data runtime = %s\n', n_samples/sfreq)
+logger.debug('Waiting for data to finish writing, closing file...\n')      
+d.close()
+
+write_stats = d.summary()
+logger.debug('Wrote %i blocks in %.2f sec, waited %.2f sec on a full write queue\n', write_stats['blocks'], write_stats['write_seconds'], write_stats['wait_seconds'])
+
+deci_stats = d.writer.stats
+for x in xrange(0,len(raw.info['ch_names'])):
+    logger.debug('Channel %i stats: min = %s, max = %s, mean = %s, RMS = %s\n', x+1, deci_stats.minimum[x], deci_stats.maximum[x], deci_stats.mean[x], deci_stats.rms[x])
+    logger.debug('Channel %i physical range [%s, %s]\n', x+1, d.writer.signals[x]['physical_min'], d.writer.signals[x]['physical_max'])
+
+if psd_arg != None:
+    save_spectra(psd_file(deci_outfile), [raw.info['ch_names'][x] for x in decimator.data_picks], input=input_psd, output=output_psd)
+    logger.info('Power spectra of %i channels before and after decimating saved to %s\n', len(decimator.data_picks), psd_file(deci_outfile))
+
+del infile_info
+logger.info('Decimated data file complete!\n')
+
+
+# Allows user to view decimated data before program ends
+if no_prompt != None:
+    view = 'N'
+else:
+    logger.debug('Asking user if they would like to view decimated data plot...\n') 
+    logger.warning('Plotting all data info might take a while.')
+    view = raw_input("View decimated data plot? [y/n]: ")
+while (len(view) >= 1):
+    if view.upper() == 'Y':
+        logger.debug('User indicated to view data \n')
+        deci = mne.io.read_raw_edf(deci_outfile, verbose = False)
+        deci.plot(duration=1.0, n_channels=len(deci.info['ch_names']), scalings={'mag':0, 'grad':0, 'eeg':10e-5, 'eog':0, 'ecg':0, 'emg':0, 'ref_meg':0, 'misc':1e-3, 'stim':1, 'resp':1, 'chpi':1e-4, 'whitened':1e2})
+        break
+    elif view.upper() == 'N': 
+        logger.debug('User indicated not to view data\n')
+        break
+    else:
+        logger.debug('User entered an answer other than "Y" or "N", asked to re-enter a proper response\n')
+        print("\nPlease enter a proper response.")
+        view = raw_input("View MMN data plot? [y/n]: ")
+        
+logger.debug ('\n----------------------------------------END----------------------------------------\n')
+
+if no_prompt == None:
+    raw_input("Press any key to continue... ")
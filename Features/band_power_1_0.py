@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/python
+
+"""
+File name: band_power.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Date last modified: 10/19/2026
+Version: 1.0.0
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Band power extracts the power of each frequency band (delta to gamma) in sliding windows of every channel of every recording, as features for machine learning.
+Each recording is read a block of windows at a time and all bands of all windows and channels of a block are found at once. The features of each recording are saved as a
+float32 matrix with one row per window and one column per channel and band, next to the recording or in an output directory.
+
+Arguments:
+    --inputs=[filename.bdf], a directory or a glob pattern (e.g Y:/study/year/*/*.bdf). Directories are searched recursively for .bdf recordings; crop and decimator outputs are skipped.
+    --outdir=[directory] (Default if no arg: each feature file is written next to its recording, as [recording]_features.npz)
+    --window=[#.##] window length in seconds (Default if no arg: 2.0 sec)
+    --step=[#.##] time from the start of one window to the next in seconds (Default if no arg: 1.0 sec)
+    --bands=[bands.json] band names and edges in Hz, e.g. {"alpha": [8.0, 13.0], "beta": [13.0, 30.0]} (Default if no arg: delta, theta, alpha, beta and gamma)
+    --keep_all_channels (Default if no arg: only the first 6 EEG channels, as the cropper keeps them)
+
+Required Libraries:
+    NumPy
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+
+# Shared Thukdam modules are kept in the repository root, one directory above this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thukdam.batch import find_inputs
+from thukdam.bdf import BDFReader
+from thukdam.crop import DROPPED_CHANNELS
+from thukdam.features import BANDS, WINDOW_DURATION, WINDOW_STEP, band_power, feature_file, load_bands, save_features
+from thukdam.follow import stim_channel
+
+# Set up a logger to track progress of code
+logger = logging.getLogger('Features_Log')
+
+
+# Ensures that certain information gets outputted to the user, while information needed for Debugging gets outputted to a log file. Log File created in script directory.
+if not logger.handlers:
+    c_handler = logging.StreamHandler()
+    f_handler = logging.FileHandler('band_power.log', mode = 'w')
+    c_handler.setLevel(logging.INFO)
+    f_handler.setLevel(logging.DEBUG)
+    c_format = logging.Formatter('%(levelname)s - %(message)s')
+    f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%m-%d-%Y %H:%M:%S' )
+    c_handler.setFormatter(c_format)
+    f_handler.setFormatter(f_format)
+    logger.addHandler(c_handler)
+    logger.addHandler(f_handler)
+    logger.setLevel(logging.DEBUG)
+
+
+# Begin running actual program code
+logger.debug('\n----------------------------------------INITIATING-----------------------------------------\n')
+
+logger.info('\n   band_power.py\n   Version: 1.0.0\n   Created 10/19/2026\n   Copyright 2019 Board of Regents of University of Wisconsin System\n')
+
+logger.info('Running File...\n')
+
+
+# Measures how many arguments used when calling program, if no inputs are given, throws error
+args = sys.argv
+numargs = len(sys.argv) - 1     # -1 because [0] = self
+
+logger.debug('Arguments read\n')
+logger.info('%i arguments applied\n', numargs)
+
+inputs = next((s for s in args if s.startswith('--inputs=')), None)
+
+if inputs == None:
+    logger.error('No inputs argument provided. Must provide a recording, a directory or a glob pattern of recordings\n')
+    logger.info('Possible arguments include:\n   --inputs=[filename.bdf], a directory or a glob pattern (e.g Y:/study/year/*/*.bdf)\n   --outdir=[directory] (Default if no arg: next to each recording)\n   --window=[#.##] (Default if no arg: 2.0 sec)\n   --step=[#.##] (Default if no arg: 1.0 sec)\n   --bands=[bands.json] (Default if no arg: delta, theta, alpha, beta and gamma)\n   --keep_all_channels (Default if no arg: first 6 EEG channels)\n')
+    sys.exit(0)
+
+pattern = inputs.split('=', 1)[1]
+fnames = find_inputs(pattern)
+
+if fnames == []:
+    logger.error('No .bdf recordings found in %s\n', pattern)
+    sys.exit(0)
+
+logger.info('%i recordings found\n', len(fnames))
+
+argoutdir = next((s for s in args if s.startswith('--outdir=')), None)
+outdir = None if argoutdir == None else os.path.abspath(argoutdir.split('=', 1)[1])
+if outdir != None and not os.path.isdir(outdir):
+    os.makedirs(outdir)
+
+windowt = next((s for s in args if s.startswith('--window=')), None)
+stept = next((s for s in args if s.startswith('--step=')), None)
+window = WINDOW_DURATION if windowt == None else float(re.findall("\d+\.\d+", windowt)[0])
+step = WINDOW_STEP if stept == None else float(re.findall("\d+\.\d+", stept)[0])
+
+argbands = next((s for s in args if s.startswith('--bands=')), None)
+try:
+    bands = BANDS if argbands == None else load_bands(argbands.split('=', 1)[1])
+except (IOError, OSError, ValueError, KeyError, IndexError, TypeError) as e:
+    logger.error('Could not read bands: %s\n', e)
+    sys.exit(0)
+
+keep = next((s for s in args if s.startswith('--keep_all')), None)
+
+logger.info('Windows of %.2f sec every %.2f sec. Bands: %s\n', window, step, ', '.join('%s %.1f to %.1f Hz' % (name, band[0], band[1]) for name, band in bands))
+
+
+# Extracts the features of each recording in turn. The channels used are found from each header, as the cropper does, leaving out the event channel.
+began = time.time()
+for fname in fnames:
+    reader = BDFReader(fname)
+    labels = [s['label'] for s in reader.header['signals']]
+    stim = stim_channel(reader.header)
+    if keep == None:
+        picks = [x for x in range(0, len(labels)) if labels[x] not in DROPPED_CHANNELS and x != stim]
+    else:
+        picks = [x for x in range(0, len(labels)) if x != stim]
+
+    started = time.time()
+    features, starts = band_power(reader, picks, bands, window, step)
+    outfile = feature_file(fname if outdir == None else os.path.join(outdir, os.path.basename(fname)))
+    save_features(outfile, features, starts, [labels[x] for x in picks], bands, window)
+    logger.info('%s: %i windows of %i channels and %i bands saved to %s in %.2f sec\n', os.path.basename(fname), features.shape[0], features.shape[1], features.shape[2], outfile, time.time() - started)
+    del reader
+
+logger.info('Band power features of %i recordings extracted in %.1f sec\n', len(fnames), time.time() - began)
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/python
+
+"""
+File name: follow.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Date last modified: 10/19/2026
+Version: 1.0.0
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Follow crops a .bdf EEG recording while it is still being recorded. New data records are read as they are written, and the MMN and ABR files are written as soon as
+each block is complete, with the same padding and channels as the cropper. The MMN file can also be decimated right away, while the ABR block is still being recorded.
+
+Arguments:
+    --infile=[filename.bdf] or a complete file path (e.g Y:/study/year/folder/filename.bdf)
+    --mmn_outfile=[filename.bdf]
+    --abr_outfile=[filename.bdf]
+    --mmn_pad=[#.##] (Default if no arg: 0.5 sec)
+    --abr_pad=[#.##] (Default if no arg: 0.1 sec)
+    --keep_all_channels (Default if no arg: keeps only first 6 EEG channels and the event channel)
+    --reference=[label, label, ...] re-references EEG channels to the mean of the labelled channels, e.g. --reference=[EXG1-0,EXG2-0] for linked mastoids (Default if no arg: no re-referencing)
+    --deci_outfile=[filename.bdf] decimates the MMN file into this file as soon as it is written (Default if no arg: MMN file is not decimated)
+    --samp_rate=[#.##], --low_freq=[#.##], --high_freq=[#.##], --line_freq=[#.##] passed on to the decimator (Default if no arg: the decimator's defaults)
+    --idle=[#.##] seconds without new data after which the recording is taken to have ended (Default if no arg: 60.0 sec)
+
+Required Libraries:
+    MNE
+    NumPy
+    SciPy
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+
+# Shared Thukdam modules are kept in the repository root, one directory above this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thukdam.batch import run_job
+from thukdam.crop import DROPPED_CHANNELS, CropWorker, channel_headers
+from thukdam.follow import IDLE_SECONDS, POLL_INTERVAL, CropFollower
+from thukdam.reference import ReferencedReader
+
+# Set up a logger to track progress of code
+logger = logging.getLogger('Follow_Log')
+
+
+# Ensures that certain information gets outputted to the user, while information needed for Debugging gets outputted to a log file. Log File created in script directory.
+if not logger.handlers:
+    c_handler = logging.StreamHandler()
+    f_handler = logging.FileHandler('follow.log', mode = 'w')
+    c_handler.setLevel(logging.INFO)
+    f_handler.setLevel(logging.DEBUG)
+    c_format = logging.Formatter('%(levelname)s - %(message)s')
+    f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%m-%d-%Y %H:%M:%S' )
+    c_handler.setFormatter(c_format)
+    f_handler.setFormatter(f_format)
+    logger.addHandler(c_handler)
+    logger.addHandler(f_handler)
+    logger.setLevel(logging.DEBUG)
+
+
+# Begin running actual program code
+logger.debug('\n----------------------------------------INITIATING-----------------------------------------\n')
+
+logger.info('\n   follow.py\n   Version: 1.0.0\n   Created 10/19/2026\n   Copyright 2019 Board of Regents of University of Wisconsin System\n')
+
+logger.info('Running File...\n')
+
+
+# Measures how many arguments used when calling program. Input and both output filenames are needed
+args = sys.argv
+numargs = len(sys.argv) - 1     # -1 because [0] = self
+
+logger.debug('Arguments read\n')
+logger.info('%i arguments applied\n', numargs)
+
+infile = next((s for s in args if s.startswith('--infile=')), None)
+mmnout = next((s for s in args if s.startswith('--mmn_outfile=')), None)
+abrout = next((s for s in args if s.startswith('--abr_outfile=')), None)
+
+if infile == None or mmnout == None or abrout == None:
+    logger.error('Must provide an input file and MMN and ABR output file names\n')
+    logger.info('Possible arguments include:\n   --infile=[filename.bdf]\n   --mmn_outfile=[filename.bdf]\n   --abr_outfile=[filename.bdf]\n   --mmn_pad=[#.##] (Default if no arg: 0.5 sec)\n   --abr_pad=[#.##] (Default if no arg: 0.1 sec)\n   --keep_all_channels (Default if no arg: keeps only first 6 EEG channels and event channel)\n   --reference=[label, label, ...] (Default if no arg: no re-referencing)\n   --deci_outfile=[filename.bdf] (Default if no arg: MMN file is not decimated)\n   --samp_rate=[#.##], --low_freq=[#.##], --high_freq=[#.##], --line_freq=[#.##] (Default if no arg: decimator defaults)\n   --idle=[#.##] (Default if no arg: 60.0 sec)\n')
+    sys.exit(0)
+
+# All file names are made absolute, since the decimator changes the working directory
+fname = os.path.abspath(infile.split('=', 1)[1])
+mmn_outfile = os.path.abspath(mmnout.split('=', 1)[1])
+abr_outfile = os.path.abspath(abrout.split('=', 1)[1])
+
+if os.path.isfile(fname) == False:
+    logger.error('Input file %s does not exist yet\n', fname)
+    sys.exit(0)
+
+
+# Identifies padding times and idle time. If no argument, Default values used mmn_pad = 0.5sec, abr_pad = 0.1sec and idle = 60sec
+mmnt = next((s for s in args if s.startswith('--mmn_pad=')), None)
+abrt = next((s for s in args if s.startswith('--abr_pad=')), None)
+idlet = next((s for s in args if s.startswith('--idle=')), None)
+mmn_pad = 0.5 if mmnt == None else float(re.findall("\d+\.\d+", mmnt)[0])
+abr_pad = 0.1 if abrt == None else float(re.findall("\d+\.\d+", abrt)[0])
+idle = IDLE_SECONDS if idlet == None else float(re.findall("\d+\.\d+", idlet)[0])
+
+logger.info('MMN padding time = %s sec, ABR padding time = %s sec\n', mmn_pad, abr_pad)
+
+
+# Identifies if the MMN file should be decimated when it is done, and the decimator arguments to pass on
+deciout = next((s for s in args if s.startswith('--deci_outfile=')), None)
+deci_args = [s for s in args if s.startswith('--samp_rate=') or s.startswith('--low_freq=') or s.startswith('--high_freq=') or s.startswith('--line_freq')]
+
+
+# Follows the recording. The channels kept are found from the header, as the cropper does
+follower = CropFollower(fname, mmn_pad, abr_pad, idle)
+header = follower.reader.header
+labels = [s['label'] for s in header['signals']]
+
+keep = next((s for s in args if s.startswith('--keep_all')), None)
+if keep == None:
+    picks = [x for x in range(0, len(labels)) if labels[x] not in DROPPED_CHANNELS]
+else:
+    picks = list(range(0, len(labels)))
+
+# Re-referenced data is read through a wrapper around the follower's reader, which keeps following the file
+reader = follower.reader
+reference = next((s for s in args if s.startswith('--reference=')), None)
+if reference != None:
+    ref_labels = [label.strip() for label in reference.split('=', 1)[1].strip('[]').split(',') if label.strip()]
+    try:
+        reader = ReferencedReader(follower.reader, ref_labels)
+    except ValueError as e:
+        logger.error('Could not re-reference: %s\n', e)
+        sys.exit(0)
+    logger.info('Re-referencing %i EEG channels to the mean of %s\n', len([p for p in picks if p in reader.referenced]), ', '.join(ref_labels))
+
+logger.info('Following %s (%s Hz, %i channels, %i kept). Waiting for MMN and ABR blocks...\n', fname, follower.sfreq, len(labels), len(picks))
+
+outfiles = {'mmn': mmn_outfile, 'abr': abr_outfile}
+
+while not follower.finished:
+    for name, start, stop in follower.poll():
+        logger.info('%s block complete: %.1f to %.1f sec. Writing %s...\n', name.upper(), start / follower.sfreq, stop / follower.sfreq, outfiles[name])
+        worker = CropWorker(reader, start, stop, picks, outfiles[name], channel_headers(header, picks, follower.sfreq), header)
+        worker.start()
+        worker.finish()
+        logger.info('%s data file complete! (%.1f sec of data, written in %.2f sec)\n', name.upper(), worker.n_samples / follower.sfreq, worker.elapsed)
+
+        # The MMN file is decimated straight away. Recording carries on meanwhile and the new data is read on the next poll.
+        if name == 'mmn' and deciout != None:
+            deci_outfile = os.path.abspath(deciout.split('=', 1)[1])
+            logger.info('Decimating MMN data into %s...\n', deci_outfile)
+            result = run_job({'input': fname, 'tool': 'decimator', 'args': ['--infile=' + mmn_outfile, '--outfile=' + deci_outfile] + deci_args, 'outputs': [deci_outfile]})
+            if result['status'] == 'ok':
+                logger.info('Decimated MMN file complete! (%.1f sec)\n', result['seconds'])
+            else:
+                logger.error('Decimating MMN data failed: %s\n', result['error'])
+
+    if not follower.finished:
+        time.sleep(POLL_INTERVAL)
+
+if follower.mmn == None:
+    logger.error('Recording ended before an MMN block was found\n')
+elif follower.abr == None:
+    logger.error('Recording ended before an ABR block was found\n')
+else:
+    logger.info('MMN and ABR files complete\n')
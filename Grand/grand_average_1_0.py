@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/python
+
+"""
+File name: grand_average.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Date last modified: 10/19/2026
+Version: 1.0.0
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Grand average combines the average files of every subject in a study (written by the Average script) into grand averages with their standard error over subjects.
+Subjects are summed in groups by a pool of worker processes and the group sums are then added together pairwise, so a study of hundreds of subjects is never loaded at once.
+A grand average is formed for all trigger codes together, for each code on its own and, for MMN files, for the deviant minus standard difference wave.
+
+Arguments:
+    --inputs=[directory] or a glob pattern (e.g Y:/study/year/*/*_abr_avg.npz). Directories are searched recursively for the averages of the cropper's ABR files
+        (_abr_avg.npz), or of its MMN files (_mmn_avg.npz) with --mmn, since the two cannot be combined.
+    --mmn combines the averages of MMN files in a directory (Default if no arg: ABR files)
+    --outfile=[filename.npz] (Default if no arg: grand_average.npz in the current directory)
+    --workers=[#] (Default if no arg: 1, subjects are summed in this process)
+
+Required Libraries:
+    NumPy
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+
+# Shared Thukdam modules are kept in the repository root, one directory above this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thukdam.average import AVERAGE_SUFFIX
+from thukdam.batch import SUFFIXES
+from thukdam.grand import find_averages, grand_average
+
+# Worker processes import this script again on Windows, so only the process started by the user runs
+if __name__ == '__main__':
+
+    # Set up a logger to track progress of code
+    logger = logging.getLogger('Grand_Log')
+
+
+    # Ensures that certain information gets outputted to the user, while information needed for Debugging gets outputted to a log file. Log File created in script directory.
+    if not logger.handlers:
+        c_handler = logging.StreamHandler()
+        f_handler = logging.FileHandler('grand_average.log', mode = 'w')
+        c_handler.setLevel(logging.INFO)
+        f_handler.setLevel(logging.DEBUG)
+        c_format = logging.Formatter('%(levelname)s - %(message)s')
+        f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%m-%d-%Y %H:%M:%S' )
+        c_handler.setFormatter(c_format)
+        f_handler.setFormatter(f_format)
+        logger.addHandler(c_handler)
+        logger.addHandler(f_handler)
+        logger.setLevel(logging.DEBUG)
+
+
+    # Begin running actual program code
+    logger.debug('\n----------------------------------------INITIATING-----------------------------------------\n')
+
+    logger.info('\n   grand_average.py\n   Version: 1.0.0\n   Created 10/19/2026\n   Copyright 2019 Board of Regents of University of Wisconsin System\n')
+
+    logger.info('Running File...\n')
+
+
+    # Measures how many arguments used when calling program, if no inputs are given, throws error
+    args = sys.argv
+    numargs = len(sys.argv) - 1     # -1 because [0] = self
+
+    logger.debug('Arguments read\n')
+    logger.info('%i arguments applied\n', numargs)
+
+    inputs = next((s for s in args if s.startswith('--inputs=')), None)
+
+    if inputs == None:
+        logger.error('No inputs argument provided. Must provide a directory or glob pattern of average files\n')
+        logger.info('Possible arguments include:\n   --inputs=[directory] or a glob pattern (e.g Y:/study/year/*/*_abr_avg.npz)\n   --mmn (Default if no arg: ABR averages)\n   --outfile=[filename.npz] (Default if no arg: grand_average.npz)\n   --workers=[#] (Default if no arg: 1)\n')
+        sys.exit(0)
+
+    mmn = next((s for s in args if s.startswith('--mmn')), None) != None
+    pattern = inputs.split('=', 1)[1]
+    fnames = find_averages(pattern, SUFFIXES['mmn' if mmn else 'abr'] + AVERAGE_SUFFIX if os.path.isdir(pattern) else AVERAGE_SUFFIX)
+
+    if fnames == []:
+        logger.error('No average files found in %s\n', pattern)
+        sys.exit(0)
+
+    logger.info('%i subject average files found\n', len(fnames))
+
+    argout = next((s for s in args if s.startswith('--outfile=')), None)
+    outfile = 'grand_average.npz' if argout == None else argout.split('=', 1)[1]
+    argworkers = next((s for s in args if s.startswith('--workers=')), None)
+    workers = 1 if argworkers == None else int(re.findall("\d+", argworkers)[0])
+
+
+    # Sums every subject and writes the grand averages. Subjects with different times or channels stop the run, since their averages cannot be combined.
+    began = time.time()
+    try:
+        sums = grand_average(fnames, workers)
+    except (IOError, OSError, KeyError, ValueError) as e:
+        logger.error('Could not combine subject averages: %s\n', e)
+        sys.exit(0)
+
+    for name in sorted(sums.sums):
+        logger.info('%s: %s subjects per channel\n', name, sums.counts[name].tolist())
+
+    sums.save(outfile)
+    logger.info('Grand averages of %i subjects saved to %s in %.1f sec\n', len(sums.subjects), outfile, time.time() - began)
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/python
+
+"""
+File name: online_abr.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Date last modified: 10/19/2026
+Version: 1.0.0
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Online ABR keeps a running average of the ABR while it is being recorded, so the waveform and its residual noise can be watched as clicks come in and the recording
+stopped once it is clean enough. New data records are read from the .bdf file as they are written, the ABR block is found with the cropper's rules, and every click's epoch is
+added to the average as soon as its data arrives. Data is only read from just before the first click of the ABR block, once it is found, and a long stretch of new data,
+as after a late start or a slow share, is handed over in pieces the buffer can hold, so no click of the block is lost. The time taken to process each block of data is
+reported at the end.
+
+Arguments:
+    --infile=[filename.bdf] or a complete file path (e.g Y:/study/year/folder/filename.bdf)
+    --outfile=[filename.npz] saves the average, its standard error and the click count (Default if no arg: not saved)
+    --pre=[#.##] and --post=[#.##] epoch time before and after each click (Default if no arg: 2.0 and 10.0 ms)
+    --low_freq=[#.##] and --high_freq=[#.##] band-pass applied as the data comes in (Default if no arg: 100.0 and 3000.0 Hz, lowered below half the sampling rate)
+    --keep_all_channels (Default if no arg: averages only the first 6 EEG channels)
+    --reference=[label, label, ...] re-references EEG channels to the mean of the labelled channels, e.g. --reference=[EXG1-0,EXG2-0] for linked mastoids (Default if no arg: no re-referencing)
+    --all_triggers averages every trigger from the start of the recording (Default if no arg: only clicks of the ABR block, found as the cropper does)
+    --plot shows the average as it is updated (Default if no arg: no plot)
+    --idle=[#.##] seconds without new data after which the recording is taken to have ended (Default if no arg: 60.0 sec)
+
+Required Libraries:
+    NumPy
+    SciPy
+    Matplotlib (for --plot)
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+
+import numpy
+
+# Shared Thukdam modules are kept in the repository root, one directory above this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thukdam.crop import DROPPED_CHANNELS
+from thukdam.follow import IDLE_SECONDS, POLL_INTERVAL, CropFollower
+from thukdam.online import H_FREQ, L_FREQ, LATENCY_TARGET, SETTLE_SECONDS, TMAX, TMIN, OnlineABR
+from thukdam.reference import ReferencedReader
+
+# Set up a logger to track progress of code
+logger = logging.getLogger('Online_Log')
+
+
+# Ensures that certain information gets outputted to the user, while information needed for Debugging gets outputted to a log file. Log File created in script directory.
+if not logger.handlers:
+    c_handler = logging.StreamHandler()
+    f_handler = logging.FileHandler('online_abr.log', mode = 'w')
+    c_handler.setLevel(logging.INFO)
+    f_handler.setLevel(logging.DEBUG)
+    c_format = logging.Formatter('%(levelname)s - %(message)s')
+    f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%m-%d-%Y %H:%M:%S' )
+    c_handler.setFormatter(c_format)
+    f_handler.setFormatter(f_format)
+    logger.addHandler(c_handler)
+    logger.addHandler(f_handler)
+    logger.setLevel(logging.DEBUG)
+
+
+# Begin running actual program code
+logger.debug('\n----------------------------------------INITIATING-----------------------------------------\n')
+
+logger.info('\n   online_abr.py\n   Version: 1.0.0\n   Created 10/19/2026\n   Copyright 2019 Board of Regents of University of Wisconsin System\n')
+
+logger.info('Running File...\n')
+
+
+# Measures how many arguments used when calling program. Input filename is needed
+args = sys.argv
+numargs = len(sys.argv) - 1     # -1 because [0] = self
+
+logger.debug('Arguments read\n')
+logger.info('%i arguments applied\n', numargs)
+
+infile = next((s for s in args if s.startswith('--infile=')), None)
+
+if infile == None:
+    logger.error('Must provide an input file name\n')
+    logger.info('Possible arguments include:\n   --infile=[filename.bdf]\n   --outfile=[filename.npz] (Default if no arg: not saved)\n   --pre=[#.##], --post=[#.##] (Default if no arg: 2.0 and 10.0 ms)\n   --low_freq=[#.##], --high_freq=[#.##] (Default if no arg: 100.0 and 3000.0 Hz)\n   --keep_all_channels (Default if no arg: first 6 EEG channels)\n   --reference=[label, label, ...] (Default if no arg: no re-referencing)\n   --all_triggers (Default if no arg: only clicks of the ABR block)\n   --plot (Default if no arg: no plot)\n   --idle=[#.##] (Default if no arg: 60.0 sec)\n')
+    sys.exit(0)
+
+fname = os.path.abspath(infile.split('=', 1)[1])
+
+if os.path.isfile(fname) == False:
+    logger.error('Input file %s does not exist yet\n', fname)
+    sys.exit(0)
+
+outarg = next((s for s in args if s.startswith('--outfile=')), None)
+outfile = None if outarg == None else os.path.abspath(outarg.split('=', 1)[1])
+
+
+# Identifies epoch times, filter cut-offs and idle time. If no argument, Default values are used
+pret = next((s for s in args if s.startswith('--pre=')), None)
+postt = next((s for s in args if s.startswith('--post=')), None)
+lowf = next((s for s in args if s.startswith('--low_freq=')), None)
+highf = next((s for s in args if s.startswith('--high_freq=')), None)
+idlet = next((s for s in args if s.startswith('--idle=')), None)
+tmin = TMIN if pret == None else -float(re.findall("\d+\.\d+", pret)[0]) / 1000
+tmax = TMAX if postt == None else float(re.findall("\d+\.\d+", postt)[0]) / 1000
+l_freq = L_FREQ if lowf == None else float(re.findall("\d+\.\d+", lowf)[0])
+h_freq = H_FREQ if highf == None else float(re.findall("\d+\.\d+", highf)[0])
+idle = IDLE_SECONDS if idlet == None else float(re.findall("\d+\.\d+", idlet)[0])
+
+all_triggers = next((s for s in args if s.startswith('--all_triggers')), None) != None
+plot = next((s for s in args if s.startswith('--plot')), None) != None
+
+logger.info('Epochs from %.1f to %.1f ms around each click, band-pass %s to %s Hz\n', tmin * 1000, tmax * 1000, l_freq, h_freq)
+
+
+# Follows the recording. The follower finds the ABR block, and the channels averaged are found from the header, as the cropper does
+follower = CropFollower(fname, idle_seconds=idle)
+reader = follower.reader
+labels = [s['label'] for s in reader.header['signals']]
+
+keep = next((s for s in args if s.startswith('--keep_all')), None)
+if keep == None:
+    picks = [x for x in range(0, len(labels)) if labels[x] not in DROPPED_CHANNELS and x != follower.stim]
+else:
+    picks = [x for x in range(0, len(labels)) if x != follower.stim]
+
+# Each block read is re-referenced with one matrix product through a wrapper around the follower's reader, which keeps following the file
+reference = next((s for s in args if s.startswith('--reference=')), None)
+if reference != None:
+    ref_labels = [label.strip() for label in reference.split('=', 1)[1].strip('[]').split(',') if label.strip()]
+    try:
+        reader = ReferencedReader(follower.reader, ref_labels)
+    except ValueError as e:
+        logger.error('Could not re-reference: %s\n', e)
+        sys.exit(0)
+    logger.info('Re-referencing %i EEG channels to the mean of %s\n', len([p for p in picks if p in reader.referenced]), ', '.join(ref_labels))
+
+online = OnlineABR(follower.sfreq, len(picks), tmin, tmax, l_freq, h_freq)
+
+# Until the ABR block is found no data is read. Once it is, reading starts just before its first click, however long ago that was, and the average starts from that click.
+if not all_triggers:
+    online.begin = float('inf')
+settle = int(round(SETTLE_SECONDS * follower.sfreq))
+
+if plot:
+    import matplotlib.pyplot as plt
+    plt.ion()
+    fig, ax = plt.subplots()
+    lines = ax.plot(online.times * 1000, online.average.mean.T * 1e6)
+    ax.set_xlabel('Time (ms)')
+    ax.set_ylabel('Amplitude (uV)')
+    ax.legend(lines, [labels[x] for x in picks], loc='upper right', fontsize='small')
+
+logger.info('Following %s (%s Hz, %i channels averaged)...\n', fname, follower.sfreq, len(picks))
+
+read = 0
+while True:
+    follower.poll()
+    if not all_triggers and follower.abr_start != None and online.begin == float('inf'):
+        logger.info('ABR block started at %.1f sec\n', follower.abr_start / follower.sfreq)
+        read = max(follower.abr_start + online.first - settle, 0)
+        online = OnlineABR(follower.sfreq, len(picks), tmin, tmax, l_freq, h_freq, start=read)
+        online.begin = follower.abr_start
+
+    # New data is pushed in pieces of at most max_block samples, so a long catch-up read never overwrites clicks in the buffer before they are averaged
+    n_samples = reader.n_samples
+    if n_samples > read and online.begin != float('inf'):
+        while read < n_samples:
+            stop = min(read + online.max_block, n_samples)
+            online.push(reader.read(read, stop, picks), reader.read_digital(read, stop, [follower.stim])[0])
+            read = stop
+        if online.average.count > 1:
+            logger.info('%.1f sec: %i clicks, residual noise %.0f nV, SNR %.2f\n', read / follower.sfreq, online.average.count, online.average.residual_noise.mean() * 1e9, online.average.snr.mean())
+        if plot:
+            for line, mean in zip(lines, online.average.mean):
+                line.set_ydata(mean * 1e6)
+            ax.relim()
+            ax.autoscale_view()
+            plt.pause(0.001)
+
+    # Follows until the ABR block is complete, or the recording ends
+    if follower.ended or (not all_triggers and follower.abr != None):
+        break
+    time.sleep(POLL_INTERVAL)
+
+if online.average.count == 0:
+    logger.error('No clicks were averaged\n')
+else:
+    logger.info('ABR average complete: %i clicks, residual noise %.0f nV\n', online.average.count, online.average.residual_noise.mean() * 1e9)
+if online.skipped:
+    logger.warning('%i clicks were skipped, having left the buffer before they were averaged\n', online.skipped)
+
+latency = online.latency_summary()
+logger.info('Processed %i blocks in %.2f ms each on average, at most %.2f ms per second of data (target %.1f ms)\n', latency['blocks'], latency['mean_seconds'] * 1000, latency['max_seconds_per_data_second'] * 1000, LATENCY_TARGET * 1000)
+if latency['over_target']:
+    logger.warning('%i blocks took longer than the latency target\n', latency['over_target'])
+
+if outfile != None and online.average.count > 0:
+    numpy.savez(outfile, times=online.times, mean=online.average.mean, sem=online.average.sem, count=online.average.count, channels=numpy.array([labels[x] for x in picks]))
+    logger.info('Average saved to %s\n', outfile)
+
+if plot:
+    plt.ioff()
+    plt.show()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/python
+
+"""
+File name: abr_peaks.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Date last modified: 10/19/2026
+Version: 1.0.0
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: ABR peaks picks the latency and amplitude of ABR waves I to V from the ABR average of every subject in a study (written by the Average script). All subjects'
+averages are stacked into one array and every wave is found in all of them at once, as the largest positive peak in its window, placed between samples by interpolation.
+The results are written to a CSV table with one row per subject, channel and wave.
+
+Arguments:
+    --inputs=[directory] or a glob pattern (e.g Y:/study/year/*/*_abr_avg.npz). Directories are searched recursively for _abr_avg.npz files.
+    --outfile=[filename.csv] (Default if no arg: abr_peaks.csv in the current directory)
+    --windows=[windows.json] wave names and latency windows in ms, e.g. {"I": [1.0, 3.0], "V": [5.0, 9.0]} (Default if no arg: waves I to V in standard windows)
+
+Required Libraries:
+    NumPy
+"""
+
+import os
+import sys
+import time
+import logging
+
+import numpy
+
+# Shared Thukdam modules are kept in the repository root, one directory above this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thukdam.average import AVERAGE_SUFFIX
+from thukdam.batch import SUFFIXES
+from thukdam.grand import find_averages
+from thukdam.peaks import WAVE_WINDOWS, load_windows, pick_waves, write_table
+
+# Set up a logger to track progress of code
+logger = logging.getLogger('Peaks_Log')
+
+
+# Ensures that certain information gets outputted to the user, while information needed for Debugging gets outputted to a log file. Log File created in script directory.
+if not logger.handlers:
+    c_handler = logging.StreamHandler()
+    f_handler = logging.FileHandler('abr_peaks.log', mode = 'w')
+    c_handler.setLevel(logging.INFO)
+    f_handler.setLevel(logging.DEBUG)
+    c_format = logging.Formatter('%(levelname)s - %(message)s')
+    f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%m-%d-%Y %H:%M:%S' )
+    c_handler.setFormatter(c_format)
+    f_handler.setFormatter(f_format)
+    logger.addHandler(c_handler)
+    logger.addHandler(f_handler)
+    logger.setLevel(logging.DEBUG)
+
+
+# Begin running actual program code
+logger.debug('\n----------------------------------------INITIATING-----------------------------------------\n')
+
+logger.info('\n   abr_peaks.py\n   Version: 1.0.0\n   Created 10/19/2026\n   Copyright 2019 Board of Regents of University of Wisconsin System\n')
+
+logger.info('Running File...\n')
+
+
+# Measures how many arguments used when calling program, if no inputs are given, throws error
+args = sys.argv
+numargs = len(sys.argv) - 1     # -1 because [0] = self
+
+logger.debug('Arguments read\n')
+logger.info('%i arguments applied\n', numargs)
+
+inputs = next((s for s in args if s.startswith('--inputs=')), None)
+
+if inputs == None:
+    logger.error('No inputs argument provided. Must provide a directory or glob pattern of ABR average files\n')
+    logger.info('Possible arguments include:\n   --inputs=[directory] or a glob pattern (e.g Y:/study/year/*/*_abr_avg.npz)\n   --outfile=[filename.csv] (Default if no arg: abr_peaks.csv)\n   --windows=[windows.json] (Default if no arg: waves I to V)\n')
+    sys.exit(0)
+
+# Only ABR averages are looked for in a directory. A glob pattern is taken as given.
+pattern = inputs.split('=', 1)[1]
+fnames = find_averages(pattern, SUFFIXES['abr'] + AVERAGE_SUFFIX if os.path.isdir(pattern) else AVERAGE_SUFFIX)
+
+if fnames == []:
+    logger.error('No ABR average files found in %s\n', pattern)
+    sys.exit(0)
+
+logger.info('%i subject average files found\n', len(fnames))
+
+argout = next((s for s in args if s.startswith('--outfile=')), None)
+outfile = 'abr_peaks.csv' if argout == None else argout.split('=', 1)[1]
+
+argwindows = next((s for s in args if s.startswith('--windows=')), None)
+try:
+    windows = WAVE_WINDOWS if argwindows == None else load_windows(argwindows.split('=', 1)[1])
+except (IOError, OSError, ValueError, KeyError, IndexError, TypeError) as e:
+    logger.error('Could not read wave windows: %s\n', e)
+    sys.exit(0)
+
+logger.info('Wave windows: %s\n', ', '.join('%s %.1f to %.1f ms' % (name, window[0] * 1000, window[1] * 1000) for name, window in windows))
+
+
+# Stacks every subject's average of all clicks into one (subjects, channels, times) array. Every subject must have the same times and channels.
+began = time.time()
+first = numpy.load(fnames[0])
+times = first['times']
+channels = [str(c) for c in first['channels']]
+waves = numpy.empty((len(fnames), len(channels), len(times)))
+subjects = []
+
+for x in range(0, len(fnames)):
+    data = numpy.load(fnames[x])
+    if len(data['times']) != len(times) or not numpy.allclose(data['times'], times) or [str(c) for c in data['channels']] != channels:
+        logger.error('%s has different times or channels than %s\n', fnames[x], fnames[0])
+        sys.exit(0)
+    waves[x] = data['mean']
+    subjects.append(os.path.basename(fnames[x])[:-len(AVERAGE_SUFFIX)])
+
+
+# Picks every wave of every subject and channel at once, and writes the table
+picked = pick_waves(waves, times, windows)
+write_table(outfile, subjects, channels, picked)
+
+for name, latency, amplitude in picked:
+    logger.info('Wave %s: found in %i of %i subject channels, mean latency %.2f ms, mean amplitude %.3f uV\n', name, numpy.isfinite(latency).sum(), latency.size, numpy.nanmean(latency) * 1e3 if numpy.isfinite(latency).any() else numpy.nan, numpy.nanmean(amplitude) * 1e6 if numpy.isfinite(amplitude).any() else numpy.nan)
+
+logger.info('Peak table of %i subjects written to %s in %.2f sec\n', len(subjects), outfile, time.time() - began)
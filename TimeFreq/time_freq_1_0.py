@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/python
+
+"""
+File name: time_freq.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Date last modified: 10/19/2026
+Version: 1.0.0
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Time freq finds the Morlet wavelet time-frequency power of the epochs around each tone of the cropper's MMN file and averages it for each trigger code. Epochs are
+cut from the file a block at a time, sized to a memory budget, and every epoch, channel and frequency of a block is convolved with its wavelet at once in the frequency domain.
+Each epoch is baseline corrected and left out of a channel's average where it holds an artifact on that channel, as the Average script does.
+
+The MMN epochs of the cropper's --epochs files (-0.1 to 0.5 sec) are shorter than the wavelets, so power over them would be mostly edge artifact. The epochs here are cut wider
+instead, by the half length of the longest wavelet on both sides (-0.5 to 0.9 sec with the default wavelets), and only -0.1 to 0.5 sec is saved, all of it free of edge effects.
+Tones less than that half length from either end of the file, usually the last one, are left out; more --cycles widen the epochs and leave out more of them. The saved
+edge_free mask marks the frequencies and times free of edge effects, and the dB values use only those.
+The average power of each code is saved with its change in dB from before the tones, and the deviant minus standard difference of that change.
+
+Arguments:
+    --infile=[filename.bdf] the cropper's MMN output file
+    --outfile=[filename.npz] (Default if no arg: [infile]_tfr.npz)
+    --low_freq=[#.##], --high_freq=[#.##] and --freq_step=[#.##] frequencies of the wavelets in Hz (Default if no arg: 4.0 to 40.0 Hz in steps of 2.0 Hz)
+    --cycles=[#.##] wavelet cycles per Hz of its frequency (Default if no arg: 0.5, so every wavelet is 0.8 sec long)
+    --reject=[#.##] largest peak-to-peak amplitude of a clean epoch, in uV (Default if no arg: 150.0 uV)
+    --threshold=[#.##] largest absolute amplitude of a clean epoch after baseline correction, in uV (Default if no arg: 100.0 uV)
+    --standard=[#] trigger code of the standard tone (Default if no arg: the most common code)
+
+Required Libraries:
+    NumPy
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+
+import numpy
+
+# Shared Thukdam modules are kept in the repository root, one directory above this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thukdam.average import MMN_ABSOLUTE, MMN_PEAK_TO_PEAK
+from thukdam.bdf import BDFReader
+from thukdam.crop import CROPPED_DIMENSION
+from thukdam.epochs import MMN_WINDOW, read_events
+from thukdam.follow import stim_channel
+from thukdam.timefreq import FREQS, N_CYCLES, TFR_SUFFIX, average_power, baseline_db, tf_window
+
+# Set up a logger to track progress of code
+logger = logging.getLogger('TimeFreq_Log')
+
+
+# Ensures that certain information gets outputted to the user, while information needed for Debugging gets outputted to a log file. Log File created in script directory.
+if not logger.handlers:
+    c_handler = logging.StreamHandler()
+    f_handler = logging.FileHandler('time_freq.log', mode = 'w')
+    c_handler.setLevel(logging.INFO)
+    f_handler.setLevel(logging.DEBUG)
+    c_format = logging.Formatter('%(levelname)s - %(message)s')
+    f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%m-%d-%Y %H:%M:%S' )
+    c_handler.setFormatter(c_format)
+    f_handler.setFormatter(f_format)
+    logger.addHandler(c_handler)
+    logger.addHandler(f_handler)
+    logger.setLevel(logging.DEBUG)
+
+
+# Begin running actual program code
+logger.debug('\n----------------------------------------INITIATING-----------------------------------------\n')
+
+logger.info('\n   time_freq.py\n   Version: 1.0.0\n   Created 10/19/2026\n   Copyright 2019 Board of Regents of University of Wisconsin System\n')
+
+logger.info('Running File...\n')
+
+
+# Measures how many arguments used when calling program. Input filename is needed
+args = sys.argv
+numargs = len(sys.argv) - 1     # -1 because [0] = self
+
+logger.debug('Arguments read\n')
+logger.info('%i arguments applied\n', numargs)
+
+infile = next((s for s in args if s.startswith('--infile=')), None)
+
+if infile == None:
+    logger.error('No input file provided. Must provide the MMN file written by the cropper\n')
+    logger.info('Possible arguments include:\n   --infile=[filename.bdf] (MMN file written by the cropper)\n   --outfile=[filename.npz] (Default if no arg: [infile]_tfr.npz)\n   --low_freq=[#.##], --high_freq=[#.##], --freq_step=[#.##] (Default if no arg: 4.0 to 40.0 Hz in steps of 2.0 Hz)\n   --cycles=[#.##] (Default if no arg: 0.5 cycles per Hz)\n   --reject=[#.##] (Default if no arg: 150.0 uV peak-to-peak)\n   --threshold=[#.##] (Default if no arg: 100.0 uV)\n   --standard=[#] (Default if no arg: most common code)\n')
+    sys.exit(0)
+
+fname = os.path.abspath(infile.split('=', 1)[1])
+
+if os.path.isfile(fname) == False:
+    logger.error('Input file %s does not exist\n', fname)
+    sys.exit(0)
+
+outarg = next((s for s in args if s.startswith('--outfile=')), None)
+outfile = os.path.splitext(fname)[0] + TFR_SUFFIX if outarg == None else os.path.abspath(outarg.split('=', 1)[1])
+
+
+# Identifies the wavelet frequencies and cycles, and the artifact limits. If no argument, Default values are used. Limits are given in uV and used in V.
+lowf = next((s for s in args if s.startswith('--low_freq=')), None)
+highf = next((s for s in args if s.startswith('--high_freq=')), None)
+stepf = next((s for s in args if s.startswith('--freq_step=')), None)
+cyclest = next((s for s in args if s.startswith('--cycles=')), None)
+low_freq = FREQS[0] if lowf == None else float(re.findall("\d+\.\d+", lowf)[0])
+high_freq = FREQS[-1] if highf == None else float(re.findall("\d+\.\d+", highf)[0])
+freq_step = FREQS[1] - FREQS[0] if stepf == None else float(re.findall("\d+\.\d+", stepf)[0])
+freqs = numpy.arange(low_freq, high_freq + freq_step / 2, freq_step)
+n_cycles = N_CYCLES[0] / FREQS[0] * freqs if cyclest == None else float(re.findall("\d+\.\d+", cyclest)[0]) * freqs
+
+rejectt = next((s for s in args if s.startswith('--reject=')), None)
+thresht = next((s for s in args if s.startswith('--threshold=')), None)
+standardt = next((s for s in args if s.startswith('--standard=')), None)
+peak_to_peak = MMN_PEAK_TO_PEAK if rejectt == None else float(re.findall("\d+\.\d+", rejectt)[0]) * 1e-6
+absolute = MMN_ABSOLUTE if thresht == None else float(re.findall("\d+\.\d+", thresht)[0]) * 1e-6
+standard = None if standardt == None else int(re.findall("\d+", standardt)[0])
+
+logger.info('%i wavelets from %.1f to %.1f Hz, %.2f cycles per Hz\n', len(freqs), freqs[0], freqs[-1], n_cycles[0] / freqs[0])
+logger.info('Epochs with more than %.1f uV peak-to-peak or %.1f uV absolute on a channel are left out of that channel\n', peak_to_peak * 1e6, absolute * 1e6)
+
+
+# Epochs are cut from the MMN file around each tone, over a window wide enough for the wavelets. Their channels are those of the file without the event channel.
+reader = BDFReader(fname, dimension=CROPPED_DIMENSION)
+stim = stim_channel(reader.header)
+picks = [x for x in range(0, reader.n_channels) if x != stim]
+labels = [reader.header['signals'][x]['label'] for x in picks]
+events = read_events(reader)
+tmin, tmax = tf_window(freqs, n_cycles, MMN_WINDOW)
+
+logger.info('Finding time-frequency power of %i epochs of %i channels from %.2f to %.2f sec, saving %.2f to %.2f sec...\n', len(events), len(picks), tmin, tmax, MMN_WINDOW[0], MMN_WINDOW[1])
+began = time.time()
+try:
+    sums, keep = average_power(reader, events, picks, freqs, n_cycles, peak_to_peak, absolute)
+except ValueError as e:
+    logger.error('%s\n', e)
+    sys.exit(0)
+logger.info('Time-frequency power found in %.1f sec. %i tones too close to an end of the file for the wavelets were left out.\n', time.time() - began, len(events) - sums.n_epochs)
+
+if sums.codes == []:
+    logger.error('No tones in %s at least %.2f sec from its start and %.2f sec from its end\n', fname, -tmin, tmax)
+    sys.exit(0)
+
+for code in sums.codes:
+    logger.info('Trigger code %i: %s epochs kept per channel\n', code, sums.counts[code].tolist())
+
+
+# The standard and deviant tones are averaged apart, and the deviant minus standard difference of their change in dB from before the tones is saved with them
+codes, counts = numpy.unique(events[:, 2], return_counts=True)
+if standard == None:
+    standard = int(codes[numpy.argmax(counts)])
+deviants = [code for code in sums.codes if code != standard]
+if standard not in sums.codes or deviants == []:
+    logger.error('MMN file needs standard (code %s) and deviant triggers, found codes %s\n', standard, sums.codes)
+    sys.exit(0)
+logger.info('Standard tone: trigger code %i. Deviant tones: trigger codes %s\n', standard, deviants)
+
+times = sums.times[keep]
+edge_free = sums.edge_free[:, keep]
+power = numpy.array([sums.mean([code])[..., keep] for code in sums.codes])
+difference_db = baseline_db(sums.mean(deviants)[..., keep], times, edge_free) - baseline_db(sums.mean([standard])[..., keep], times, edge_free)
+sums.save(outfile, labels, keep, power_db=baseline_db(power, times, edge_free), standard=standard, deviants=numpy.array(deviants), difference_db=difference_db)
+
+logger.info('Time-frequency power of %i trigger codes saved to %s\n', len(sums.codes), outfile)
@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/python
+
+"""
+File name: cropper.py
+Author: Enrique Guzman
+Date created: 10/13/2018
+Date last modified: 10/19/2026
+Version: 1.1.0
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Cropper takes in a raw .bdf EEG data file and divides it into it's MMN and ABR data components. 2 .bdf files are returned, containing the raw cropped MMN and ABR data respectfully.
+
+Arguments:
+    --infile=[filename.bdf] or a complete file path (e.g Y:/study/year/folder/filename.bdf)  
+    --mmn_outfile=[filename.bdf]   
+    --abr_outfile=[filename.bdf]   
+    --mmn_pad=[#.##] (Default: 0.5 sec)  
+    --abr_pad=[#.##] (Default: 0.1 sec)  
+    --keep_all_channels (Default: keeps only first 6 EEG channels and the event channel)
+    --no_prompt (Default: asks to confirm arguments and to view plots)
+    --epochs also writes the event-locked epochs of each file to [outfile]_epo.npy, and their events to [outfile]_epo_events.npy (Default: no epochs written)
+    --reference=[label, label, ...] re-references EEG channels to the mean of the labelled channels, e.g. --reference=[EXG1-0,EXG2-0] for linked mastoids (Default: no re-referencing)
+    --qc_report=[filename.json] writes a quality control report of flat and saturated samples and RMS per channel, trigger counts, inter-trigger intervals and block durations, with its channel rows also in [filename].csv (Default: no report)
+    --psd also writes the Welch power spectrum of each EEG channel of each file to [outfile]_psd.npz (Default: no spectra written)
+"""
+
+import os
+import mne
+import numpy
+import sys
+import re
+import logging
+
+# Shared Thukdam modules are kept in the repository root, one directory above this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thukdam.bdf import BDFReader, read_header, record_granule, whole_records
+from thukdam.crop import DROPPED_CHANNELS, CropWorker
+from thukdam.epochs import ABR_WINDOW, MMN_WINDOW, epoch_files, extract_epochs, onsets
+from thukdam.qc import trigger_summary, write_report
+from thukdam.spectrum import psd_file, save_spectra
+from thukdam.reference import ReferencedReader
+
+# Set up a logger to track progress of code
+logger = logging.getLogger('Crop_Log')
+
+
+# Ensures that certain information gets outputted to the user, while information needed for Debugging gets outputted to a log file. Log File created in script directory.
+if not logger.handlers:
+    c_handler = logging.StreamHandler()
+    f_handler = logging.FileHandler('cropper.log', mode = 'w')
+    c_handler.setLevel(logging.INFO)
+    f_handler.setLevel(logging.DEBUG)
+    c_format = logging.Formatter('%(levelname)s - %(message)s')
+    f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%m-%d-%Y %H:%M:%S' )
+    c_handler.setFormatter(c_format)
+    f_handler.setFormatter(f_format)
+    logger.addHandler(c_handler)
+    logger.addHandler(f_handler)
+    logger.setLevel(logging.DEBUG)
+
+# Begin running actual program code 
+logger.debug('\n----------------------------------------INITIATING-----------------------------------------\n')
+
+logger.info('\n   Cropper.py\n   Version: 1.1.0\n   Created 10/19/2026\n   Copyright 2019 Board of Regents of University of Wisconsin System\n')
+
+logger.info('Running File...\n')
+
+
+# Measures how many arguments used when calling program, if none, throws error. If input and output filenames aren't called, error is thrown 
+args = sys.argv
+numargs = len(sys.argv) - 1     # -1 because [0] = self
+
+logger.debug('Arguments read\n')
+logger.info('%i arguments applied\n', numargs)
+
+logger.debug('Checking if number of agruments called meets minimal requirement of input file and mmn/abr output file names (minimum number of arguments = 3)...\n')
+
+if numargs == 0:
+    logger.error('No arguments provided. Must provide input and output file names\n')
+    logger.info('Possible arguments include:\n   --infile=[filename.bdf] or a complete file path (e.g Y:/study/year/folder/filename.bdf)\n   --mmn_outfile=[filename.bdf]\n   --abr_outfile=[filename.bdf]\n   --mmn_pad=[#.##] (Default if no arg: 0.5 sec)\n   --abr_pad=[#.##] (Default if no arg: 0.1 sec)\n   --keep_all_channels (Default if no arg: keeps only first 6 EEG channels and event channel)\n   --no_prompt (Default if no arg: asks to confirm arguments and to view plots)\n   --epochs (Default if no arg: no epochs written)\n   --reference=[label, label, ...] (Default if no arg: no re-referencing)\n   --qc_report=[filename.json] (Default if no arg: no report)\n   --psd (Default if no arg: no spectra written)\n')
+    sys.exit(0)
+elif numargs < 3:
+     logger.error('Not enough arguments provided. Must at least provide 1 input file and 2 output file names.\n')
+     sys.exit(0)
+
+
+# Checks for specific argument format. 1 input filename must be indicated in .bdf format, else error will be thrown, and 2 output file names must be indicated in .bdf format else error thrown (other arguments optional). 
+infile = [s for s in args if 'infile' in s]
+outfiles = [s for s in args if 'outfile' in s]
+bdf_files = [s for s in args if '.bdf' in s]
+
+logger.debug('Checking if input and outfile arguments are in proper format (need 1 .bdf input file, and 2 .bdf output file names)...\n')
+
+logger.debug('Looking for input file...\n')
+if infile == []:
+    logger.error('Input file name must be in .bdf format, please enter name correctly.\n')
+    sys.exit(0)
+
+if len(infile) != 1:
+    logger.error('Please indicate only 1 input file name in .bdf format you wish to crop.\n')
+    sys.exit(0)
+   
+logger.debug('Input file to crop found\n')
+
+logger.debug('Looking for output files...\n')
+if outfiles == []:
+    logger.error('Output file names must be in .bdf format, please enter names correctly.\n')
+    sys.exit(0)
+    
+if len(outfiles) != 2:
+    logger.error('Please indicate only 2 different output file names in .bdf format. One MMN file and one ABR file.\n')
+    sys.exit(0)
+    
+logger.debug('Both output file names found\n')
+
+if len(bdf_files) != 3:
+    logger.error('Please indicate all file formats in .bdf format. 1 input file to crop, and 2 output file names to save MMN and ABR data to.\n')
+    sys.exit(0)
+    
+logger.debug('All 3 files in .bdf format.\n')
+
+# If only the 3 necessary arguments are called (input and output files), user is warned that all other values will be defaulted
+if numargs == 3:
+    logger.warning('Only input and output filenames included in arguments. mmn_pad defaulted to 0.5 sec, abr_pad defaulted to 0.1 sec, and only first 6 EEG and event channels in data will be kept\n')
+    
+    
+# Checks if input file exists in current directory, or input path, if it doesn't throws error
+logger.debug('Extracting input file name or input file path from arguments\n')
+input_file = next(s for s in args if 'infile' in s)
+infile_string = input_file.split('=')
+fname = infile_string[1]  
+
+logger.debug('Extracted file name/path = %s\n', fname)
+
+logger.debug('Finding input file or file directory\n')
+
+if os.path.isabs(os.path.realpath(fname)) == True:
+    fdir = os.path.dirname(fname)
+    os.chdir(fdir)      #changes current working directory to file directory
+    if os.path.isfile(os.path.basename(fname)) == False:
+        logger.error('Input file does not exist in indicated directory, please input a different file name, or a correct file path\n')
+        sys.exit(0)
+    fname = os.path.basename(fname)
+    logger.debug('Input file found within indicated path\n')
+elif os.path.isfile(fname) != True:
+     logger.error('Input file does not exist in current directory, please input different file namr, or a complete file path (Use "/" not "\\")\n')
+     sys.exit(0)  
+    
+logger.info('Input file exists\n')
+
+
+# Lists to user their called arguments, if user sees error, they can exit and restart program, else program continues with inputted arguments.
+position = 1  
+logger.info('All inputted arguments listed below...')
+while (numargs >= position):  
+    logger.info('Parameter %i: %s', position, sys.argv[position])
+    position = position + 1
+
+# Identifies if user asked to run without prompts (e.g. from the batch runner). If so, arguments are taken as correct and no plots are offered.
+no_prompt = next((s for s in args if s.startswith('--no_prompt')),None)
+
+if no_prompt != None:
+    logger.debug('no_prompt argument found, arguments taken as correct\n')
+    correct = 'Y'
+else:
+    logger.debug('Asking user if all inputted arguments are correct...\n') 
+    correct = raw_input("Are all arguments correct? [y/n]: ")
+while (len(correct) >= 1):
+    if correct.upper() == 'Y':
+        logger.debug('User indicated arguments are correct\n')
+        break
+    elif correct.upper() == 'N': 
+        logger.debug('User indicated arguments are incorrect\n')
+        print("\nPlease restart program with arguments wanted.\n")
+        sys.exit(0)
+    else:
+        logger.debug('User entered an answer other than "Y" or "N", asked to re-enter a proper response\n')
+        print("\nPlease enter a proper response.")
+        correct = raw_input("Are all arguments correct? [y/n]: ")
+        
+
+# Reads raw data and begins finding beginning and end of each MMN and ABR events.
+logger.info('Preparing file...\n')
+
+logger.debug('Begin reading input file info\n')
+raw = mne.io.read_raw_edf(fname, verbose = False)
+print("\n")
+logger.info('Input file overview: %s\n', raw)
+
+logger.info('File cropper initializing...\n')
+
+logger.info('Finding MMN and ABR events in data...\n')
+events = mne.find_events(raw, stim_channel="STI 014", output='step', shortest_event=1, verbose = False)  # STI 014 is channel with event signals
+
+logger.info('MMN and ABR events found. Cropping file...\n')
+
+
+# Identifies if user indicated specific padding times (time left before and after first and last event found) for mmn and abr files. If no argument, Default values used mmn_pad = 0.5sec and abr_pad = 0.1sec
+logger.debug('Extracting MMN and ABR padding times from arguments\n')
+mmnt = next((s for s in args if 'mmn_pad' in s),None)
+abrt = next((s for s in args if 'abr_pad' in s),None)
+
+logger.debug('Finding mmn_pad time\n')
+if mmnt == None:
+    mmn_pad = 0.5
+    logger.debug('No mmn_pad argument found, MMN padding defaulted to 0.5 sec\n')
+else:
+    mmn_pad = float(re.findall("\d+\.\d+", mmnt)[0])
+    logger.debug('Extracted mmn_pad time = %s sec\n', mmn_pad)
+    
+logger.info('MMN padding time = %s sec\n', mmn_pad)
+
+logger.debug('Finding abr_pad time\n')
+if abrt == None:
+    abr_pad = 0.1
+    logger.debug('No abr_pad argument found, ABR padding defaulted to 0.1 sec\n')
+else:
+    abr_pad = float(re.findall("\d+\.\d+", abrt)[0])
+    logger.debug('Extracted abr_pad time = %s sec\n', abr_pad)
+    
+logger.info('ABR padding time = %s sec\n', abr_pad)
+
+       
+# Cropping of each event file with indicated padding times
+logger.debug('Identifying data sampling rate...\n')
+freq = raw.info['sfreq']
+logger.info('Data sampling rate = %s Hz\n', freq)
+
+# Output files are written in whole data records, so each crop is extended by up to one of the smallest whole records of real data past its padding
+granule = record_granule(freq)
+logger.debug('Smallest whole data record = %i samples\n', granule)
+
+logger.info('Splitting MMN and ABR events, and removing unwanted data...\n')
+x = 0
+
+logger.debug('Finding all MMN events using the frequency at which MMN events occur freq_mmn < freq_abr...\n')
+while events[x+2,0] - events[x,0] > freq/3:
+    x += 1
+    continue
+
+logger.debug('All MMN events found. Finding samples of MMN + padding timeframe\n')
+mmn_start = max(events[0,0] - int(round(mmn_pad*freq)), 0)
+mmn_stop = whole_records(mmn_start, events[x-1,0] + int(round(mmn_pad*freq)) + 1, granule, len(raw))
+  
+logger.info('All MMN data found.\n')
+
+y = x  
+
+logger.debug('Finding all ABR events using the frequency at which ABR events occur freq_mmn < freq_abr...\n')
+while events[y+2,0] - events[y,0] < freq/10:
+    y += 1
+    if len(events) < y+3:
+        break
+    else: 
+        continue
+
+logger.debug('All ABR events found. Finding samples of ABR + padding timeframe\n')
+abr_start = max(events[x,0] - int(round(abr_pad*freq)), 0)
+abr_events = (events[x,0], events[y+1,0] + 1)
+abr_stop = whole_records(abr_start, events[y+1,0] + int(round(abr_pad*freq)) + 1, granule, len(raw))
+
+logger.info('All ABR data found.\n')
+
+logger.info('Time cropping finished. Finalizing MMN and ABR files for output...\n')
+
+
+# Identifies if user indicated to keep all the channels, if no keep_all_channels argument inputted. Default is to only keep the first 6 EEG channels and the event channel
+logger.debug('Checking if user asked to keep all channels in output files\n')
+keep = next((s for s in args if 'keep_all' in s),None)
+
+if keep == None:
+    logger.info('Dropping unneeded channels...\n')
+    logger.debug('No argument to keep all channels found, only first 6 EEG channels and event channel will be kept in output files\n')
+    dropped = DROPPED_CHANNELS
+    picks = [x for x in xrange(0,len(raw.info['ch_names'])) if raw.info['ch_names'][x] not in dropped]
+    logger.info('MMN and ABR files ready for output.\n')
+
+else:
+    logger.debug('Argument to keep all channels found, no channels will be dropped from output files.\n')
+    picks = list(xrange(0,len(raw.info['ch_names'])))
+    logger.info('No channels dropped. MMN and ABR files ready for output.\n')   
+
+logger.info('Creating output files with cropped data...\n')
+
+
+# Gets output filenames from called arguments
+logger.debug('Extracting output file names from arguments\n')
+mmnout = next(s for s in args if 'mmn_outfile' in s)
+mmn_outstring = mmnout.split('=')
+mmn_outfile = mmn_outstring[1]
+logger.debug('MMN output file name found. File name = %s\n', mmn_outfile)
+
+abrout = next(s for s in args if 'abr_outfile' in s)
+abr_outstring = abrout.split('=')
+abr_outfile = abr_outstring[1]
+logger.debug('ABR output file name found. File name = %s\n', abr_outfile)
+
+logger.info('Saving output file data...\n')
+
+
+# Gets input bdf file header from raw data file to use in the created MMN and ABR files
+logger.debug('Reading input file header information to save into MMN and ABR files...\n')
+infile_info = read_header(fname)
+
+
+# Creates individual channel headers for the kept channels. Physical ranges are filled in by each writer from per-channel statistics of its own data, so each channel's range is fit to its data instead of a fixed range.
+logger.info('Creating individual channel headers...\n')
+x = 0
+mmn_chan_infos = []
+abr_chan_infos = []
+
+logger.debug('Writing individual channel headers in accordance to respective channels on input file...\n')
+for x in xrange(0,len(picks)):
+    dict = infile_info['signals'][picks[x]]
+    logger.debug('Setting header for channel %i (%s)...\n', x+1, dict['label'])
+    mmn_chan_infos.append({'label': dict['label'], 'dimension': 'mV', 'sample_rate': freq, 'digital_max': 8388607, 'digital_min': -8388608, 'prefilter': dict['prefilter'], 'transducer': dict['transducer']})
+    abr_chan_infos.append({'label': dict['label'], 'dimension': 'mV', 'sample_rate': freq, 'digital_max': 8388607, 'digital_min': -8388608, 'prefilter': dict['prefilter'], 'transducer': dict['transducer']})
+
+logger.warning('Data dimensions for each channel header changed from "uV" to "mV"\n')  
+    
+logger.info('All MMN and ABR channel headers created\n')
+
+
+# MMN and ABR files are read from one shared memory map of the input file and written at the same time by two workers, so cropping takes as long as the longer of the two
+logger.debug('Mapping input file data into memory...\n')
+reader = BDFReader(fname)
+
+# Identifies if user asked to re-reference. If so, the reference channels are read with the kept channels and every block read is re-referenced with one matrix product, before the reference channels are dropped
+reference = next((s for s in args if s.startswith('--reference=')),None)
+
+if reference != None:
+    ref_labels = [label.strip() for label in reference.split('=', 1)[1].strip('[]').split(',') if label.strip()]
+    try:
+        reader = ReferencedReader(reader, ref_labels)
+    except ValueError as e:
+        logger.error('Could not re-reference: %s\n', e)
+        sys.exit(0)
+    logger.info('Re-referencing %i EEG channels to the mean of %s\n', len([p for p in picks if p in reader.referenced]), ', '.join(ref_labels))
+
+logger.info('Creating file: %s with %i channels.\n', mmn_outfile, len(picks))
+logger.info('Creating file: %s with %i channels.\n', abr_outfile, len(picks))
+logger.info('Writing MMN and ABR data to output files...\n')
+
+# Identifies if user asked for a quality control report. If so, each worker also checks its channels for flat and saturated samples as it writes them
+qc_report = next((s for s in args if s.startswith('--qc_report')),None)
+
+# Identifies if user asked for power spectra. If so, each worker also adds the data it writes to a Welch spectrum of every channel but the event channel
+psd_arg = next((s for s in args if s.startswith('--psd')),None)
+psd_rows = None if psd_arg == None else [x for x in xrange(0,len(picks)) if raw.info['ch_names'][picks[x]] != 'STI 014']
+
+mmn_worker = CropWorker(reader, mmn_start, mmn_stop, picks, mmn_outfile, mmn_chan_infos, infile_info, qc=qc_report != None, psd_rows=psd_rows)
+abr_worker = CropWorker(reader, abr_start, abr_stop, picks, abr_outfile, abr_chan_infos, infile_info, qc=qc_report != None, psd_rows=psd_rows)
+mmn_worker.start()
+abr_worker.start()
+
+
+# Waits for both workers to finish. Any error hit while writing is raised here.
+logger.debug('Waiting for MMN data to finish writing...\n')
+mmn_worker.finish()
+for x in xrange(0,len(picks)):
+    logger.debug('MMN channel %i stats: min = %s, max = %s, mean = %s, RMS = %s, physical range [%s, %s]\n', x+1, mmn_worker.stats.minimum[x], mmn_worker.stats.maximum[x], mmn_worker.stats.mean[x], mmn_worker.stats.rms[x], mmn_chan_infos[x]['physical_min'], mmn_chan_infos[x]['physical_max'])
+logger.debug('MMN data record duration = %s sec, written in %.2f sec\n', mmn_worker.record_duration, mmn_worker.elapsed)
+logger.info('Total MMN data time = %s\n', mmn_worker.n_samples/freq)
+logger.info('MMN data file complete!\n')
+
+logger.debug('Waiting for ABR data to finish writing...\n')
+abr_worker.finish()
+for x in xrange(0,len(picks)):
+    logger.debug('ABR channel %i stats: min = %s, max = %s, mean = %s, RMS = %s, physical range [%s, %s]\n', x+1, abr_worker.stats.minimum[x], abr_worker.stats.maximum[x], abr_worker.stats.mean[x], abr_worker.stats.rms[x], abr_chan_infos[x]['physical_min'], abr_chan_infos[x]['physical_max'])
+logger.debug('ABR data record duration = %s sec, written in %.2f sec\n', abr_worker.record_duration, abr_worker.elapsed)
+logger.info('Total ABR data time = %s\n', abr_worker.n_samples/freq)
+logger.info('ABR data file complete!\n')
+
+
+# Writes the power spectra of the MMN and ABR files next to them
+if psd_arg != None:
+    for name, worker, outfile in (('MMN', mmn_worker, mmn_outfile), ('ABR', abr_worker, abr_outfile)):
+        save_spectra(psd_file(outfile), [raw.info['ch_names'][picks[x]] for x in psd_rows], output=worker.psd)
+        logger.info('%s power spectra of %i channels (%i segments of %.1f sec) saved to %s\n', name, len(psd_rows), worker.psd.n_segments, worker.psd.nperseg / freq, psd_file(outfile))
+
+
+# Writes the quality control report. Channel checks come from the workers, and trigger counts, intervals and block durations from the events already found.
+if qc_report != None:
+    qc_outfile = qc_report.split('=', 1)[1]
+    labels = [raw.info['ch_names'][p] for p in picks]
+    report = {'file': fname, 'sfreq': freq, 'duration_sec': round(len(raw) / freq, 4), 'triggers': trigger_summary(events, freq), 'blocks': {}}
+    for name, worker, start, stop in (('mmn', mmn_worker, events[0,0], abr_events[0]), ('abr', abr_worker, abr_events[0], abr_events[1])):
+        block = trigger_summary(events, freq, start, stop)
+        block['crop_start_sec'] = round(worker.first / freq, 4)
+        block['crop_duration_sec'] = round(worker.n_samples / freq, 4)
+        block['channels'] = [row for row in worker.qc.summary(labels) if row['channel'] != 'STI 014']
+        report['blocks'][name] = block
+        logger.info('%s block: %i triggers %s over %.1f sec\n', name.upper(), block['n_triggers'], block['codes'], block['duration_sec'])
+    report['flagged'] = sorted(set(row['channel'] for block in report['blocks'].values() for row in block['channels'] if row['flagged']))
+    if report['flagged']:
+        logger.warning('Channels with flat or saturated data: %s\n', ', '.join(report['flagged']))
+    qc_table = write_report(qc_outfile, report)
+    logger.info('Quality control report written to %s and %s\n', qc_outfile, qc_table)
+
+
+# Identifies if user asked for epochs. If so, every trigger of each block is cut out of the input file, without the event channel, and written next to its output file
+epochs_arg = next((s for s in args if s.startswith('--epochs')),None)
+
+if epochs_arg != None:
+    logger.info('Writing MMN and ABR epochs...\n')
+    epoch_picks = [p for p in picks if raw.info['ch_names'][p] != 'STI 014']
+    for name, outfile, window, start, stop in (('MMN', mmn_outfile, MMN_WINDOW, events[0,0], abr_events[0]), ('ABR', abr_outfile, ABR_WINDOW, abr_events[0], abr_events[1])):
+        epochs_file, events_file = epoch_files(outfile)
+        epochs, kept = extract_epochs(reader, onsets(events, start, stop), window[0], window[1], epoch_picks, epochs_file)
+        numpy.save(events_file, kept)
+        logger.info('%s epochs file complete! %i epochs of %i channels from %s to %s sec written to %s\n', name, epochs.shape[0], epochs.shape[1], window[0], window[1], epochs_file)
+        del epochs
+
+del reader
+del infile_info
+
+logger.info('File cropping complete! MMN and ABR .bdf files ready for use.\n')
+
+# Allows user to view MMN and ABR data before program ends
+if no_prompt != None:
+    view_mmn = 'N'
+else:
+    logger.debug('Asking user if they would like to view MMN data plot...\n') 
+    logger.warning('Plotting all data info might take a while.')
+    view_mmn = raw_input("View MMN data plot? [y/n]: ")
+while (len(view_mmn) >= 1):
+    if view_mmn.upper() == 'Y':
+        logger.debug('User indicated to view MMN data \n')
+        mmn = mne.io.read_raw_edf(mmn_outfile, verbose = False)
+        mmn.plot()
+        break
+    elif view_mmn.upper() == 'N': 
+        logger.debug('User indicated not to view MMN data\n')
+        break
+    else:
+        logger.debug('User entered an answer other than "Y" or "N", asked to re-enter a proper response\n')
+        print("\nPlease enter a proper response.")
+        view_mmn = raw_input("View MMN data plot? [y/n]: ")
+        
+if no_prompt != None:
+    view_abr = 'N'
+else:
+    logger.debug('Asking user if they would like to view ABR data plot...\n')
+    logger.warning('Plotting all data info might take a while.') 
+    view_abr = raw_input("View ABR data plot? [y/n]: ")
+while (len(view_abr) >= 1):
+    if view_abr.upper() == 'Y':
+        logger.debug('User indicated to view ABR data \n')
+        abr = mne.io.read_raw_edf(abr_outfile, verbose = False)
+        abr.plot()
+        break
+    elif view_abr.upper() == 'N': 
+        logger.debug('User indicated not to view ABR data\n')
+        break
+    else:
+        logger.debug('User entered an answer other than "Y" or "N", asked to re-enter a proper response\n')
+        print("\nPlease enter a proper response.")
+        view_abr = raw_input("View ABR data plot? [y/n]: ")
+
+logger.debug ('\n----------------------------------------END----------------------------------------\n')
+
+if no_prompt == None:
+    raw_input("Press any key to continue... ")
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+"""
+Package name: thukdam
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Shared helper modules used by the Thukdam cropper and decimator scripts. Scripts add the repository root to sys.path and import from here.
+"""
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: average.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Averages epochs in one pass, a block of epochs at a time, from the epoch files written by the cropper or straight from a cropped file. Each block is baseline
+corrected and checked for artifacts channel by channel, and only sums, sums of squares and counts are kept for each trigger code, so the average and its noise come out
+without holding all epochs in memory. For the MMN block the codes are the standard and deviant tones, whose difference wave is the mismatch negativity.
+
+Required Libraries:
+    NumPy
+"""
+
+import numpy
+
+from thukdam.epochs import EPOCH_CHUNK_BYTES
+
+# Ending that replaces .bdf in the name of a cropped file's average file
+AVERAGE_SUFFIX = '_avg.npz'
+
+# Epochs whose peak-to-peak amplitude on a channel, or largest absolute value after baseline correction, is over these, in volts, are left out of that channel's average
+ABR_PEAK_TO_PEAK = 40e-6
+ABR_ABSOLUTE = 25e-6
+MMN_PEAK_TO_PEAK = 150e-6
+MMN_ABSOLUTE = 100e-6
+
+
+def baseline_correct(epochs, times):
+    """Subtracts from a (n_epochs, n_channels, n_times) block, in place, each epoch's mean over the times before 0. Blocks with no times before 0 are left as they are."""
+    before = times < 0
+    if before.any():
+        epochs -= epochs[:, :, before].mean(axis=2)[:, :, None]
+    return epochs
+
+
+def reject_mask(epochs, peak_to_peak=None, absolute=None):
+    """Returns a (n_epochs, n_channels) array that is True where an epoch is clean on a channel: within peak_to_peak and absolute, in volts, where given."""
+    keep = numpy.ones(epochs.shape[:2], dtype=bool)
+    if peak_to_peak is not None:
+        keep &= epochs.max(axis=2) - epochs.min(axis=2) <= peak_to_peak
+    if absolute is not None:
+        keep &= numpy.abs(epochs).max(axis=2) <= absolute
+    return keep
+
+
+class EpochSums(object):
+    """Sums, sums of squares and counts of epochs for each channel, kept separately for each trigger code (such as click polarity).
+
+    Any set of codes can be combined into one average, and saved sums can be added to other sums of the same shape.
+    """
+
+    def __init__(self, n_channels, n_times):
+        self.shape = (n_channels, n_times)
+        self.sums = {}
+        self.sumsq = {}
+        self.counts = {}
+        self.rejected = {}
+
+    @property
+    def codes(self):
+        return sorted(self.sums)
+
+    def add(self, epochs, codes, keep=None):
+        """Adds a (n_epochs, n_channels, n_times) block of epochs with their trigger codes. keep, from reject_mask(), leaves epochs out channel by channel."""
+        codes = numpy.asarray(codes)
+        if keep is None:
+            keep = numpy.ones(epochs.shape[:2], dtype=bool)
+        for code in numpy.unique(codes):
+            code = int(code)
+            if code not in self.sums:
+                self.sums[code] = numpy.zeros(self.shape)
+                self.sumsq[code] = numpy.zeros(self.shape)
+                self.counts[code] = numpy.zeros(self.shape[0], dtype=numpy.int64)
+                self.rejected[code] = numpy.zeros(self.shape[0], dtype=numpy.int64)
+            chosen = codes == code
+            weights = keep[chosen].astype(numpy.float64)
+            block = epochs[chosen]
+            self.sums[code] += numpy.einsum('ec,ect->ct', weights, block)
+            self.sumsq[code] += numpy.einsum('ec,ect->ct', weights, block * block)
+            self.counts[code] += keep[chosen].sum(axis=0)
+            self.rejected[code] += (~keep[chosen]).sum(axis=0)
+
+    def total(self, codes=None):
+        """Returns the sums, sums of squares and per channel counts of the given codes (all by default) together."""
+        codes = self.codes if codes is None else [c for c in codes if c in self.sums]
+        sums = numpy.zeros(self.shape)
+        sumsq = numpy.zeros(self.shape)
+        counts = numpy.zeros(self.shape[0], dtype=numpy.int64)
+        for code in codes:
+            sums += self.sums[code]
+            sumsq += self.sumsq[code]
+            counts += self.counts[code]
+        return sums, sumsq, counts
+
+    def mean(self, codes=None):
+        """Average of the given codes (all by default), per channel. Channels with no epochs are NaN."""
+        sums, sumsq, counts = self.total(codes)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            return sums / counts[:, None]
+
+    def sem(self, codes=None):
+        """Standard error of the average of the given codes (all by default) at every sample of every channel."""
+        sums, sumsq, counts = self.total(codes)
+        n = counts[:, None].astype(numpy.float64)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            variance = numpy.maximum(sumsq - sums * sums / n, 0) / (n - 1)
+            return numpy.sqrt(variance / n)
+
+    def snr(self, codes=None):
+        """RMS of the average over the RMS of its standard error, per channel, as the online average reports it."""
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            return numpy.sqrt((self.mean(codes) ** 2).mean(axis=1)) / numpy.sqrt((self.sem(codes) ** 2).mean(axis=1))
+
+    def save(self, fname, **extra):
+        """Writes the sums to a .npz file, one row per code, with any extra arrays (such as times and channel names) given."""
+        codes = self.codes
+        numpy.savez(fname, codes=numpy.array(codes, dtype=numpy.int64),
+                    sums=numpy.array([self.sums[c] for c in codes]).reshape((len(codes),) + self.shape),
+                    sumsq=numpy.array([self.sumsq[c] for c in codes]).reshape((len(codes),) + self.shape),
+                    counts=numpy.array([self.counts[c] for c in codes], dtype=numpy.int64).reshape(len(codes), self.shape[0]),
+                    rejected=numpy.array([self.rejected[c] for c in codes], dtype=numpy.int64).reshape(len(codes), self.shape[0]),
+                    **extra)
+
+    @classmethod
+    def load(cls, fname):
+        """Reads sums written by save()."""
+        data = numpy.load(fname)
+        sums = cls(*data['sums'].shape[1:])
+        for x, code in enumerate(data['codes']):
+            code = int(code)
+            sums.sums[code] = data['sums'][x].astype(numpy.float64)
+            sums.sumsq[code] = data['sumsq'][x].astype(numpy.float64)
+            sums.counts[code] = data['counts'][x]
+            sums.rejected[code] = data['rejected'][x]
+        return sums
+
+
+def sum_epochs(blocks, n_channels, times, baseline=True, peak_to_peak=ABR_PEAK_TO_PEAK, absolute=ABR_ABSOLUTE):
+    """Sums blocks of epochs by trigger code. blocks gives (events, epochs) pairs, as iter_epochs() does.
+
+    Each block is copied into memory, baseline corrected when baseline is set, and checked with reject_mask(). Returns the EpochSums.
+    """
+    sums = EpochSums(n_channels, len(times))
+    for events, block in blocks:
+        block = numpy.array(block, dtype=numpy.float64)
+        if baseline:
+            baseline_correct(block, times)
+        sums.add(block, numpy.asarray(events)[:, 2], reject_mask(block, peak_to_peak, absolute))
+    return sums
+
+
+def average_epochs(epochs, events, times, baseline=True, peak_to_peak=ABR_PEAK_TO_PEAK, absolute=ABR_ABSOLUTE, chunk_bytes=EPOCH_CHUNK_BYTES):
+    """Sums a (n_events, n_channels, n_times) epoch array, such as the memory-mapped file from extract_epochs(), by trigger code a block of epochs at a time. Returns the EpochSums."""
+    n_events, n_channels, n_times = epochs.shape
+    events = numpy.asarray(events)
+    step = max(chunk_bytes // (n_channels * n_times * 8), 1)
+    blocks = ((events[a:a + step], epochs[a:a + step]) for a in range(0, n_events, step))
+    return sum_epochs(blocks, n_channels, times, baseline, peak_to_peak, absolute)
+
+
+def standard_code(sums):
+    """Returns the trigger code of the standard tone: the code with the most epochs."""
+    return max(sums.codes, key=lambda code: sums.counts[code].sum() + sums.rejected[code].sum())
+
+
+def difference_wave(sums, standard=None, deviants=None):
+    """Returns the deviant minus standard difference wave and its standard error, per channel.
+
+    standard defaults to standard_code(), and deviants to every other code, pooled.
+    """
+    if standard is None:
+        standard = standard_code(sums)
+    if deviants is None:
+        deviants = [code for code in sums.codes if code != standard]
+    difference = sums.mean(deviants) - sums.mean([standard])
+    return difference, numpy.sqrt(sums.sem(deviants) ** 2 + sums.sem([standard]) ** 2)
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: batch.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Runs the cropper and decimator scripts over many .bdf files inside one Python process, without prompts, and collects per-file timings and outputs for a machine-readable summary.
+"""
+
+import fnmatch
+import glob
+import json
+import os
+import runpy
+import sys
+import time
+
+from thukdam.cache import release
+from thukdam.epochs import epoch_files
+from thukdam.manifest import is_current, job_input, save_records
+from thukdam.qc import QC_SUFFIX, channel_table
+from thukdam.spectrum import psd_file
+
+# Repository root, one directory above this package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Script run for each tool, relative to the repository root
+SCRIPTS = {'cropper': os.path.join('cropper', 'cropper_1_1_0.py'),
+           'decimator': os.path.join('Decimator', 'decimator_1_3_0.py')}
+
+# Suffixes added to the input file name for each output. Files that already end in one of these are outputs of an earlier run and are not picked up as inputs.
+SUFFIXES = {'mmn': '_mmn', 'abr': '_abr', 'deci': '_deci'}
+
+# Parameter set used when no profile is given: crop only, with the cropper's own defaults
+DEFAULT_PROFILE = {'cropper': {}}
+
+
+def find_inputs(pattern):
+    """Returns the sorted .bdf files matching pattern, which is either a directory (searched recursively) or a glob pattern."""
+    if os.path.isdir(pattern):
+        found = []
+        for dirpath, dirnames, filenames in os.walk(pattern):
+            found.extend(os.path.join(dirpath, f) for f in fnmatch.filter(filenames, '*.bdf'))
+    else:
+        found = glob.glob(pattern)
+    return sorted(os.path.abspath(f) for f in found if f.lower().endswith('.bdf') and not is_output(f))
+
+
+def is_output(fname):
+    """Returns True if fname is named like an output of an earlier batch run."""
+    base = os.path.splitext(os.path.basename(fname))[0]
+    return any(base.endswith(suffix) for suffix in SUFFIXES.values())
+
+
+def load_profile(fname=None):
+    """Reads a parameter set from a JSON file, e.g.
+
+        {"cropper": {"mmn_pad": 0.5, "abr_pad": 0.1, "keep_all_channels": false, "epochs": false, "qc_report": false, "psd": false},
+         "decimator": {"source": "mmn", "samp_rate": 512.0, "low_freq": 0.1, "high_freq": 40.0, "chans_to_filter": null, "line_freq": null, "psd": false}}
+
+    Each tool listed is run with the given arguments, missing arguments fall back to the script defaults. The decimator's source picks which file it decimates:
+    the cropper's "mmn" or "abr" output, or the "input" file itself (default: "mmn" when the cropper runs too, else "input"). Without a file DEFAULT_PROFILE is used.
+    """
+    if fname is None:
+        return dict(DEFAULT_PROFILE)
+    with open(fname) as f:
+        profile = json.load(f)
+    unknown = [tool for tool in profile if tool not in SCRIPTS]
+    if unknown or not profile:
+        raise ValueError('Profile must list one or both of %s, found %s' % (sorted(SCRIPTS), sorted(profile)))
+    return profile
+
+
+def make_jobs(fname, profile, outdir=None):
+    """Returns the jobs to run on one input file for the profile, in order. Outputs go to outdir, or next to the input file by default."""
+    base = os.path.splitext(os.path.basename(fname))[0]
+    outdir = os.path.abspath(outdir or os.path.dirname(fname))
+    outputs = dict((key, os.path.join(outdir, base + suffix + '.bdf')) for key, suffix in SUFFIXES.items())
+    jobs = []
+
+    if 'cropper' in profile:
+        params = profile['cropper'] or {}
+        args = ['--infile=' + fname, '--mmn_outfile=' + outputs['mmn'], '--abr_outfile=' + outputs['abr']]
+        for name in ('mmn_pad', 'abr_pad'):
+            if params.get(name) is not None:
+                args.append('--%s=%s' % (name, _decimal(params[name])))
+        if params.get('keep_all_channels'):
+            args.append('--keep_all_channels')
+        crops = [outputs['mmn'], outputs['abr']]
+        if params.get('epochs'):
+            args.append('--epochs')
+            crops += epoch_files(outputs['mmn']) + epoch_files(outputs['abr'])
+        if params.get('qc_report'):
+            report = os.path.join(outdir, base + QC_SUFFIX)
+            args.append('--qc_report=' + report)
+            crops += [report, channel_table(report)]
+        if params.get('psd'):
+            args.append('--psd')
+            crops += [psd_file(outputs['mmn']), psd_file(outputs['abr'])]
+        jobs.append(_job(fname, 'cropper', args, crops))
+
+    if 'decimator' in profile:
+        params = profile['decimator'] or {}
+        source = params.get('source', 'mmn' if 'cropper' in profile else 'input')
+        infile = fname if source == 'input' else outputs[source]
+        args = ['--infile=' + infile, '--outfile=' + outputs['deci']]
+        for name in ('samp_rate', 'low_freq', 'high_freq', 'line_freq'):
+            if params.get(name) is not None:
+                args.append('--%s=%s' % (name, _decimal(params[name])))
+        if params.get('chans_to_filter'):
+            args.append('--chans_to_filter=[%s]' % ','.join(str(c) for c in params['chans_to_filter']))
+        decimated = [outputs['deci']]
+        if params.get('psd'):
+            args.append('--psd')
+            decimated.append(psd_file(outputs['deci']))
+        jobs.append(_job(fname, 'decimator', args, decimated))
+    return jobs
+
+
+def run_job(job):
+    """Runs one job's script in this process and returns its result: status, error, seconds, throughput and the size of each output.
+
+    The scripts call sys.exit() when they stop on bad input, which is reported as a failed job instead of ending the batch. The working directory and sys.argv are restored afterwards.
+    Throughput is reported as megabytes of the file the job reads per second.
+    """
+    script = os.path.join(ROOT, SCRIPTS[job['tool']])
+    result = dict(job)
+    result['status'] = 'ok'
+    result['error'] = None
+
+    infile = job_input(job)
+    result['read_mb'] = os.path.getsize(infile) / 1e6 if os.path.isfile(infile) else 0.0
+
+    cwd = os.getcwd()
+    argv = sys.argv
+    began = time.time()
+    try:
+        sys.argv = [script] + job['args'] + ['--no_prompt']
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit:
+        result['status'] = 'failed'
+        result['error'] = '%s stopped early, see its log for the reason' % job['tool']
+    except Exception:
+        error = sys.exc_info()[1]
+        result['status'] = 'failed'
+        result['error'] = '%s: %s' % (type(error).__name__, error)
+    finally:
+        sys.argv = argv
+        os.chdir(cwd)
+    result['seconds'] = time.time() - began
+    result['mb_per_sec'] = result['read_mb'] / result['seconds'] if result['seconds'] else 0.0
+
+    result['output_bytes'] = dict((f, os.path.getsize(f)) for f in job['outputs'] if os.path.isfile(f))
+    if result['status'] == 'ok' and len(result['output_bytes']) != len(job['outputs']):
+        result['status'] = 'failed'
+        result['error'] = 'missing outputs: %s' % ', '.join(f for f in job['outputs'] if f not in result['output_bytes'])
+    return result
+
+
+def run_jobs(jobs, force=False, cache=None):
+    """Runs the jobs of one input file in order. Once a job fails the rest are skipped, since they may read its outputs.
+
+    Jobs whose outputs are current, i.e. were built from the same input, code and arguments, are not run again unless force is set. Their status is 'current'.
+    With an OutputCache, a job already run on the same data with the same arguments gets its outputs from the cache (status 'cached'), and new outputs are added to it.
+    """
+    results = []
+    for job in jobs:
+        script = os.path.join(ROOT, SCRIPTS[job['tool']])
+        if results and results[-1]['status'] in ('failed', 'skipped'):
+            result = _not_run(job, 'skipped', 'earlier job on this input failed')
+        elif not force and is_current(job, script):
+            result = _not_run(job, 'current', None)
+            result['output_bytes'] = dict((f, os.path.getsize(f)) for f in job['outputs'])
+        else:
+            key = None if cache is None else cache.key(job, script)
+            if key is not None and not force and cache.fetch(key, job['outputs']):
+                result = _not_run(job, 'cached', None)
+                result['output_bytes'] = dict((f, os.path.getsize(f)) for f in job['outputs'])
+            else:
+                for fname in job['outputs']:
+                    release(fname)
+                result = run_job(job)
+                if result['status'] == 'ok' and key is not None:
+                    cache.store(key, job)
+            if result['status'] != 'failed':
+                save_records(job, script)
+        results.append(result)
+    return results
+
+
+def write_summary(results, fname, profile=None, seconds=None, scheduler=None):
+    """Writes the job results, with totals and aggregate throughput, to fname as JSON. scheduler holds the pool settings when the jobs ran on worker processes."""
+    inputs = set(r['input'] for r in results)
+    input_mb = sum(os.path.getsize(f) for f in inputs if os.path.isfile(f)) / 1e6
+    summary = {'profile': profile,
+               'scheduler': scheduler,
+               'jobs': results,
+               'n_jobs': len(results),
+               'n_ok': sum(1 for r in results if r['status'] == 'ok'),
+               'n_current': sum(1 for r in results if r['status'] == 'current'),
+               'n_cached': sum(1 for r in results if r['status'] == 'cached'),
+               'n_resumed': sum(1 for r in results if r.get('resumed')),
+               'n_failed': sum(1 for r in results if r['status'] in ('failed', 'skipped')),
+               'job_seconds': sum(r['seconds'] for r in results),
+               'total_seconds': seconds,
+               'input_mb': input_mb,
+               'mb_per_sec': input_mb / seconds if seconds else None,
+               'files_per_hour': len(inputs) * 3600.0 / seconds if seconds else None}
+    with open(fname, 'w') as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
+    return summary
+
+
+def failed_results(jobs, error):
+    """Returns a failed result for each of jobs, none of which were run, for when running them raised error or the process running them died."""
+    return [_not_run(job, 'failed', error) for job in jobs]
+
+
+def _job(fname, tool, args, outputs):
+    return {'input': fname, 'tool': tool, 'args': args, 'outputs': outputs}
+
+
+def _not_run(job, status, error):
+    return dict(job, status=status, error=error, seconds=0.0, read_mb=0.0, mb_per_sec=0.0, output_bytes={})
+
+
+def _decimal(value):
+    # The scripts read numbers with the pattern "\d+\.\d+", so every value is written with a decimal point
+    return '%.6f' % float(value)
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: bdf.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Reads .bdf file headers and data and writes .bdf files. The writer picks its own data record duration so outputs are written in a few large records and hold exactly the samples given to it, with no tail padding.
+Files are written under a temporary name and only renamed to their real name once complete, so a crash never leaves a half-written .bdf behind.
+
+Required Libraries:
+    NumPy
+"""
+
+import math
+import os
+import numpy
+
+# Longest data record the writer will choose, in seconds. Longer records mean fewer, larger writes.
+MAX_RECORD_DURATION = 10.0
+
+# Whole data records are encoded and written together in chunks of about this many bytes
+WRITE_CHUNK_BYTES = 32 * 1024 * 1024
+
+# Extension of files still being written
+PARTIAL_EXTENSION = '.partial'
+
+DIGITAL_MIN = -8388608
+DIGITAL_MAX = 8388607
+
+# Scale from a channel's header dimension to volts, matching the values MNE returns
+_VOLTS = {'uv': 1e-6, 'mv': 1e-3, 'v': 1.0}
+
+
+def read_header(fname):
+    """Reads the fixed and per-signal header of a .bdf file.
+
+    Returns a dictionary of the header fields. Per-signal fields are in the 'signals' list, one dictionary per channel using the same keys as the channel headers given to BDFWriter.
+    """
+    with open(fname, 'rb') as f:
+        fixed = f.read(256)
+        n_signals = int(fixed[252:256])
+        sig = f.read(n_signals * 256)
+
+    header = {'patient': _text(fixed[8:88]),
+              'recording': _text(fixed[88:168]),
+              'startdate': _text(fixed[168:176]),
+              'starttime': _text(fixed[176:184]),
+              'header_bytes': int(fixed[184:192]),
+              'n_records': int(fixed[236:244]),
+              'record_duration': float(fixed[244:252]),
+              'n_signals': n_signals}
+
+    # Per-signal fields are stored field by field, each field repeated for every signal
+    fields = [('label', 16), ('transducer', 80), ('dimension', 8), ('physical_min', 8), ('physical_max', 8), ('digital_min', 8), ('digital_max', 8), ('prefilter', 80), ('samples_per_record', 8), ('reserved', 32)]
+    signals = [{} for x in range(n_signals)]
+    pos = 0
+    for name, width in fields:
+        for x in range(n_signals):
+            signals[x][name] = _text(sig[pos:pos + width])
+            pos += width
+    for s in signals:
+        for name in ('physical_min', 'physical_max'):
+            s[name] = float(s[name])
+        for name in ('digital_min', 'digital_max', 'samples_per_record'):
+            s[name] = int(s[name])
+        s['sample_rate'] = s['samples_per_record'] / header['record_duration']
+        del s['reserved']
+    header['signals'] = signals
+    return header
+
+
+class BDFReader(object):
+    """Memory-mapped view of the data records of a .bdf file in which every channel has the same sampling rate.
+
+    Several threads can read from one reader at the same time; the operating system shares the mapped pages between them, so nothing is read from disk twice.
+    For a file that is still being recorded, refresh() maps the data records added since. dimension, where given, is used for every channel in place of the header's.
+    """
+
+    def __init__(self, fname, dimension=None):
+        self.fname = fname
+        self.header = read_header(fname)
+        signals = self.header['signals']
+        self.n_channels = len(signals)
+        self.spr = signals[0]['samples_per_record']
+        if any(s['samples_per_record'] != self.spr for s in signals):
+            raise ValueError('%s has channels with different sampling rates' % fname)
+        self.sfreq = signals[0]['sample_rate']
+        self.n_records = 0
+        self._map = None
+        self.refresh()
+
+        phys_min = numpy.array([s['physical_min'] for s in signals])
+        phys_max = numpy.array([s['physical_max'] for s in signals])
+        dig_min = numpy.array([s['digital_min'] for s in signals], dtype=numpy.float64)
+        dig_max = numpy.array([s['digital_max'] for s in signals], dtype=numpy.float64)
+        volts = numpy.array([_VOLTS.get((dimension or s['dimension']).lower().replace(u'\xb5', 'u'), 1.0) for s in signals])
+        self._volts = volts
+        self._gain = (phys_max - phys_min) / (dig_max - dig_min) * volts
+        self._offset = (phys_min - (phys_max - phys_min) / (dig_max - dig_min) * dig_min) * volts
+        self._digital_range = (dig_min, dig_max)
+
+    @property
+    def n_samples(self):
+        return self.n_records * self.spr
+
+    @property
+    def closed(self):
+        """True once the header gives the number of data records and all of them are in the file. Recording software writes -1 there until the recording ends."""
+        return 0 <= self.header['n_records'] <= self.n_records
+
+    def refresh(self):
+        """Maps the whole data records now in the file, which grow while it is being recorded. Returns the number of new data records."""
+        with open(self.fname, 'rb') as f:
+            f.seek(236)
+            self.header['n_records'] = int(f.read(8))
+        record_bytes = 3 * self.n_channels * self.spr
+        n_records = (os.path.getsize(self.fname) - self.header['header_bytes']) // record_bytes
+        if self.header['n_records'] >= 0:
+            n_records = min(n_records, self.header['n_records'])
+        added = n_records - self.n_records
+        if added or self._map is None:
+            self.n_records = n_records
+            if n_records:
+                self._map = numpy.memmap(self.fname, dtype=numpy.uint8, mode='r', offset=self.header['header_bytes'], shape=(n_records, self.n_channels, self.spr, 3))
+            else:
+                # numpy cannot map an empty file region
+                self._map = numpy.zeros((0, self.n_channels, self.spr, 3), dtype=numpy.uint8)
+        return added
+
+    def read(self, start, stop, picks=None):
+        """Returns samples start to stop of the picked channels (all by default) as a (n_channels, n_samples) array of physical values, in volts for voltage channels."""
+        if picks is None:
+            picks = numpy.arange(self.n_channels)
+        picks = numpy.asarray(picks, dtype=int)
+        return self.read_digital(start, stop, picks) * self._gain[picks][:, None] + self._offset[picks][:, None]
+
+    def physical_limits(self, picks=None):
+        """Returns the lowest and highest values read() can give for each picked channel (all by default): those of its digital minimum and maximum, where an amplifier saturates."""
+        if picks is None:
+            picks = numpy.arange(self.n_channels)
+        picks = numpy.asarray(picks, dtype=int)
+        return tuple(d[picks].astype(numpy.int32) * self._gain[picks] + self._offset[picks] for d in self._digital_range)
+
+    def read_codes(self, start, stop, channel):
+        """Returns samples start to stop of a trigger channel as integer codes: its physical values in the units of its header, rounded.
+
+        In recordings these are the stored values, but files written by the cropper store a scaled trigger channel.
+        """
+        return numpy.rint(self.read(start, stop, [channel])[0] / self._volts[channel]).astype(numpy.int64)
+
+    def read_digital(self, start, stop, picks=None):
+        """Returns samples start to stop of the picked channels (all by default) as a (n_channels, n_samples) int32 array of the stored 24 bit values."""
+        if picks is None:
+            picks = numpy.arange(self.n_channels)
+        picks = numpy.asarray(picks, dtype=int)
+        first = start // self.spr
+        last = -(-stop // self.spr)
+        raw = self._map[first:last][:, picks]
+        digital = raw[..., 0].astype(numpy.int32) | (raw[..., 1].astype(numpy.int32) << 8) | (raw[..., 2].astype(numpy.int8).astype(numpy.int32) << 16)
+        return digital.transpose(1, 0, 2).reshape(len(picks), -1)[:, start - first * self.spr:stop - first * self.spr]
+
+
+def record_granule(sfreq):
+    """Returns the smallest number of samples per data record whose duration can be written exactly in the 8 character header field."""
+    for spr in range(1, int(sfreq) + 1):
+        if _exact_duration(spr, sfreq):
+            return spr
+    raise ValueError('No exact data record duration for sampling rate %s Hz' % sfreq)
+
+
+def record_samples(n_samples, sfreq, max_duration=MAX_RECORD_DURATION):
+    """Picks the number of samples per data record for a segment of n_samples.
+
+    The record is the longest one up to max_duration seconds that divides n_samples evenly and whose duration can be written exactly in the header, so the segment fits a whole number of records with no padding.
+    """
+    for spr in range(min(n_samples, int(max_duration * sfreq)), 0, -1):
+        if n_samples % spr == 0 and _exact_duration(spr, sfreq):
+            return spr
+    raise ValueError('%i samples at %s Hz cannot be split into whole data records; trim or extend the segment to a multiple of %i samples' % (n_samples, sfreq, record_granule(sfreq)))
+
+
+def whole_records(start, stop, granule, n_samples):
+    """Moves stop so samples start to stop fill a whole number of granule sample data records.
+
+    stop is extended with real samples where the recording allows it, and trimmed back to whole records where the recording ends first.
+    """
+    stop = start + -(-(stop - start) // granule) * granule
+    if stop > n_samples:
+        stop = n_samples - (n_samples - start) % granule
+    return stop
+
+
+class BDFWriter(object):
+    """Writes a .bdf file in which every channel has the same sampling rate.
+
+    The total number of samples per channel must be known up front so the data record duration can be chosen by record_samples(). Data is given to write() in (n_channels, n_samples) blocks of physical values of any length; whole records are encoded and written together in one call.
+    The number of data records in the header is updated on close() to the number of records actually written.
+    Data goes to fname + PARTIAL_EXTENSION, which close() renames to fname once it is complete; abort() deletes it instead.
+    """
+
+    def __init__(self, fname, signals, sfreq, n_samples, header=None, max_duration=MAX_RECORD_DURATION):
+        self.fname = fname
+        self.n_channels = len(signals)
+        self.sfreq = sfreq
+        self.n_samples = n_samples
+        self.spr = record_samples(n_samples, sfreq, max_duration)
+        self.n_records = 0
+        self._pending = numpy.empty((self.n_channels, 0))
+
+        phys_min = numpy.array([s['physical_min'] for s in signals], dtype=numpy.float64)
+        phys_max = numpy.array([s['physical_max'] for s in signals], dtype=numpy.float64)
+        dig_min = numpy.array([s.get('digital_min', DIGITAL_MIN) for s in signals], dtype=numpy.float64)
+        dig_max = numpy.array([s.get('digital_max', DIGITAL_MAX) for s in signals], dtype=numpy.float64)
+        self._gain = ((phys_max - phys_min) / (dig_max - dig_min))[:, None]
+        self._offset = (phys_min - self._gain[:, 0] * dig_min)[:, None]
+        self._dig_min = dig_min[:, None]
+        self._dig_max = dig_max[:, None]
+
+        self._partial = fname + PARTIAL_EXTENSION
+        self._file = open(self._partial, 'wb')
+        self._file.write(self._header(signals, header or {}))
+
+    @property
+    def record_duration(self):
+        return self.spr / float(self.sfreq)
+
+    def write(self, block):
+        """Writes a (n_channels, n_samples) block of physical values. Samples short of a whole data record are kept until the next call."""
+        block = numpy.asarray(block, dtype=numpy.float64)
+        if self._pending.shape[1]:
+            block = numpy.concatenate((self._pending, block), axis=1)
+        n_full = block.shape[1] // self.spr
+        chunk = max(1, WRITE_CHUNK_BYTES // (3 * self.n_channels * self.spr))
+        for first in range(0, n_full, chunk):
+            n = min(chunk, n_full - first)
+            self._file.write(self._encode(block[:, first * self.spr:(first + n) * self.spr], n))
+            self.n_records += n
+        self._pending = block[:, n_full * self.spr:]
+
+    def close(self, fsync=False):
+        """Writes the final number of data records into the header, closes the file and moves it to its real name. With fsync the data is flushed to disk before returning.
+
+        If anything goes wrong the partial file is deleted and the error raised.
+        """
+        try:
+            if self._pending.shape[1]:
+                raise ValueError('%i samples per channel left over that do not fill a whole data record' % self._pending.shape[1])
+            self._file.seek(236)
+            self._file.write(_field(str(self.n_records), 8))
+            if fsync:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+            replace_file(self._partial, self.fname, fsync)
+        except Exception:
+            self.abort()
+            raise
+
+    def abort(self):
+        """Closes and deletes the partial file, leaving any earlier file of the same name untouched."""
+        self._file.close()
+        if os.path.exists(self._partial):
+            os.remove(self._partial)
+
+    def _encode(self, data, n_records):
+        digital = numpy.clip(numpy.round((data - self._offset) / self._gain), self._dig_min, self._dig_max).astype('<i4')
+        # Each data record holds spr samples of channel 1, then spr samples of channel 2, and so on
+        digital = digital.reshape(self.n_channels, n_records, self.spr).transpose(1, 0, 2)
+        return numpy.ascontiguousarray(digital).view(numpy.uint8).reshape(-1, 4)[:, :3].tobytes()
+
+    def _header(self, signals, header):
+        ns = self.n_channels
+        fixed = (_field(header.get('patient', ''), 80) + _field(header.get('recording', ''), 80) + _field(header.get('startdate', ''), 8) + _field(header.get('starttime', ''), 8)
+                 + _field(str(256 * (ns + 1)), 8) + _field('24BIT', 44) + _field('-1', 8) + _field(_number(self.record_duration), 8) + _field(str(ns), 4))
+        sig = b''
+        for name, width in [('label', 16), ('transducer', 80), ('dimension', 8)]:
+            sig += b''.join(_field(s.get(name, ''), width) for s in signals)
+        for name in ('physical_min', 'physical_max'):
+            sig += b''.join(_field(_number(s[name]), 8) for s in signals)
+        sig += b''.join(_field(str(int(s.get('digital_min', DIGITAL_MIN))), 8) for s in signals)
+        sig += b''.join(_field(str(int(s.get('digital_max', DIGITAL_MAX))), 8) for s in signals)
+        sig += b''.join(_field(s.get('prefilter', ''), 80) for s in signals)
+        sig += b''.join(_field(str(self.spr), 8) for s in signals)
+        sig += b''.join(_field('', 32) for s in signals)
+        return b'\xffBIOSEMI' + fixed + sig
+
+
+def replace_file(src, dst, fsync=False):
+    """Renames src to dst in one step, replacing any existing dst, also on Windows where os.rename() will not overwrite. With fsync the rename itself is flushed to disk."""
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # Python 2 has no os.replace. On Windows dst is removed first, which leaves a short moment with no dst but never a partial one.
+        if os.name == 'nt' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+    if fsync and os.name != 'nt':
+        directory = os.open(os.path.dirname(os.path.abspath(dst)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def header_number(value, upward):
+    """Rounds value away from the data (up for a maximum, down for a minimum) to the most precise number that fits an 8 character .bdf header field.
+
+    Both fixed point (e.g. -0.00006) and exponent notation (e.g. -6.01E-5) are tried, so ranges of uV scale data in volts keep three significant digits.
+    """
+    rounding = math.ceil if upward else math.floor
+    best = None
+    for text in _candidates(value, rounding):
+        number = float(text)
+        if (number >= value if upward else number <= value) and (best is None or abs(number - value) < abs(best - value)):
+            best = number
+    if best is None:
+        raise ValueError('Value %s does not fit in an 8 character header field' % value)
+    return best
+
+
+def _exact_duration(spr, sfreq):
+    return abs(float(_number(spr / float(sfreq))) * sfreq - spr) < 1e-9 * spr
+
+
+def _number(value):
+    """Formats a number in at most 8 characters, as the closest of its fixed point and exponent forms that fit."""
+    texts = [text for text in _candidates(value, round) if len(text) <= 8]
+    if not texts:
+        raise ValueError('Value %s does not fit in an 8 character header field' % value)
+    return min(texts, key=lambda text: abs(float(text) - value))
+
+
+def _candidates(value, rounding):
+    """Yields value as fixed point text with 7 down to 0 decimals, then in exponent notation with 6 down to 0 decimals of its mantissa, each rounded by rounding
+    (math.ceil, math.floor or round) and kept if it fits 8 characters. Fixed point comes first, so it is kept when both forms are equally close."""
+    for decimals in range(7, -1, -1):
+        scale = 10 ** decimals
+        text = _strip('%.*f' % (decimals, rounding(value * scale) / scale))
+        if len(text) <= 8:
+            yield text
+    if value == 0 or not numpy.isfinite(value):
+        return
+    exponent = int(math.floor(math.log10(abs(value))))
+    for decimals in range(6, -1, -1):
+        step = 10.0 ** (exponent - decimals)
+        mantissa, power = ('%.*E' % (decimals, rounding(value / step) * step)).split('E')
+        text = '%sE%i' % (_strip(mantissa), int(power))
+        if len(text) <= 8:
+            yield text
+
+
+def _strip(text):
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    return text
+
+
+def _field(text, width):
+    return text[:width].ljust(width).encode('latin-1')
+
+
+def _text(raw):
+    return raw.decode('latin-1').strip()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: bootstrap.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Bootstrap confidence intervals for measures of averaged epochs, such as the MMN mismatch amplitude and the ABR wave V latency. The resamples are drawn as one
+integer matrix of how often each epoch is picked, and every resampled average is formed at once by multiplying that matrix with the epochs, read from their memory-mapped
+file a block at a time. Resamples are worked through in groups sized to a memory budget.
+
+Required Libraries:
+    NumPy
+"""
+
+import numpy
+
+from thukdam.average import ABR_ABSOLUTE, ABR_PEAK_TO_PEAK, baseline_correct, reject_mask
+from thukdam.epochs import EPOCH_CHUNK_BYTES
+from thukdam.peaks import WAVE_WINDOWS, find_peaks
+
+# Number of bootstrap resamples, and the coverage of the intervals
+N_BOOTSTRAP = 2000
+CONFIDENCE = 0.95
+
+# Most bytes the resampled averages and resample matrices of one group of resamples may take
+BOOTSTRAP_MEMORY = 256 * 1024 * 1024
+
+# Windows, in seconds, of the MMN mismatch amplitude (mean of the difference wave) and of the ABR wave V peak
+MISMATCH_WINDOW = (0.100, 0.250)
+WAVE_V_WINDOW = dict(WAVE_WINDOWS)['V']
+
+
+def resample_counts(n_epochs, n_resamples, rng):
+    """Draws n_resamples resamples of n_epochs epochs with replacement. Returns a (n_resamples, n_epochs) matrix of how many times each epoch is in each resample."""
+    picks = rng.randint(0, n_epochs, size=(n_resamples, n_epochs))
+    flat = picks + n_epochs * numpy.arange(n_resamples)[:, None]
+    return numpy.bincount(flat.ravel(), minlength=n_resamples * n_epochs).reshape(n_resamples, n_epochs)
+
+
+def resampled_averages(epochs, rows, counts, times, baseline=True, peak_to_peak=ABR_PEAK_TO_PEAK, absolute=ABR_ABSOLUTE, chunk_bytes=EPOCH_CHUNK_BYTES):
+    """Returns the (n_resamples, n_channels, n_times) averages of the resamples given by counts, over the epochs rows of a (n_events, n_channels, n_times) epoch array.
+
+    Epochs are read a block at a time, baseline corrected when baseline is set and checked with reject_mask() as the average stage does, so each resample only averages the
+    epochs that are clean on each channel. Each block adds to every resample at once with one matrix product.
+    """
+    n_channels, n_times = epochs.shape[1:]
+    n_resamples = counts.shape[0]
+    sums = numpy.zeros((n_resamples, n_channels * n_times))
+    weights = numpy.zeros((n_resamples, n_channels))
+    step = max(chunk_bytes // (n_channels * n_times * 8), 1)
+    for a in range(0, len(rows), step):
+        block = numpy.array(epochs[rows[a:a + step]], dtype=numpy.float64)
+        if baseline:
+            baseline_correct(block, times)
+        keep = reject_mask(block, peak_to_peak, absolute).astype(numpy.float64)
+        block *= keep[:, :, None]
+        picked = counts[:, a:a + step].astype(numpy.float64)
+        sums += numpy.dot(picked, block.reshape(len(block), -1))
+        weights += numpy.dot(picked, keep)
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        return sums.reshape(n_resamples, n_channels, n_times) / weights[:, :, None]
+
+
+def bootstrap(epochs, events, times, conditions, statistic, n_resamples=N_BOOTSTRAP, seed=None, memory=BOOTSTRAP_MEMORY, **options):
+    """Returns statistic for every bootstrap resample, stacked along the first axis.
+
+    conditions is a list of lists of trigger codes. The epochs of each condition are resampled on their own, and statistic is given one (n_group, n_channels, n_times) array
+    of resampled averages per condition, for a group of resamples at a time, and returns an array of n_group values. options go to resampled_averages().
+    """
+    rng = numpy.random.RandomState(seed)
+    codes = numpy.asarray(events)[:, 2]
+    rows = [numpy.flatnonzero(numpy.isin(codes, condition)) for condition in conditions]
+    if any(len(r) == 0 for r in rows):
+        raise ValueError('No epochs for conditions %s' % [c for c, r in zip(conditions, rows) if len(r) == 0])
+    n_channels, n_times = epochs.shape[1:]
+    # Each resample takes its averages, and its row of the picks and counts matrices
+    group = max(int(memory // ((len(conditions) * n_channels * n_times + 2 * sum(len(r) for r in rows)) * 8)), 1)
+
+    values = []
+    for a in range(0, n_resamples, group):
+        n = min(group, n_resamples - a)
+        averages = [resampled_averages(epochs, r, resample_counts(len(r), n, rng), times, **options) for r in rows]
+        values.append(statistic(averages))
+    return numpy.concatenate(values)
+
+
+def confidence_interval(values, confidence=CONFIDENCE):
+    """Returns the lower and upper percentile bounds of bootstrap values along the first axis, leaving out resamples whose value is NaN."""
+    tail = 50.0 * (1 - confidence)
+    return numpy.nanpercentile(values, tail, axis=0), numpy.nanpercentile(values, 100 - tail, axis=0)
+
+
+def mismatch_amplitude(times, window=MISMATCH_WINDOW):
+    """Returns a statistic for bootstrap() with [standard, deviants] conditions: the mean of the deviant minus standard difference wave over the window, per channel."""
+    chosen = (times >= window[0]) & (times <= window[1])
+    return lambda averages: (averages[1] - averages[0])[:, :, chosen].mean(axis=2)
+
+
+def peak_latency(times, window=WAVE_V_WINDOW, positive=True):
+    """Returns a statistic for bootstrap() with one condition: the latency of the largest peak in the window, per channel, as find_peaks() gives it."""
+    return lambda averages: find_peaks(averages[0], times, window, positive)[0]
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: cache.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: A content-addressed cache of cropper and decimator outputs. Outputs are stored under a key made from the input data, the code version and the arguments,
+so a job someone has already run on the same recording is answered by copying the stored files instead of running it again.
+"""
+
+import errno
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from thukdam.bdf import PARTIAL_EXTENSION, replace_file
+from thukdam.manifest import code_version, job_input
+
+# Largest total size of the stored outputs, in bytes, before the least recently used entries are removed
+CACHE_SIZE = 50e9
+
+# Bytes read at a time when hashing an input file
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Arguments, besides the output file names, whose values are output paths. Only whether they are given goes into a key.
+OUTPUT_ARGS = ('qc_report',)
+
+# Arguments whose outputs record the input file name as given, so when one is given the input file name goes into the key too
+NAMED_INPUT_ARGS = ('qc_report',)
+
+# Linux ioctl that makes dst share src's data blocks until either is changed (a reflink), on file systems that support it such as Btrfs and XFS
+_FICLONE = 0x40049409
+
+_hashes = {}
+
+
+class OutputCache(object):
+    """Stores and hands out job outputs in directory, keeping it under max_bytes by removing the least recently used entries.
+
+    Each entry is a directory named by its key holding the job's outputs in order (0.bdf, 1.bdf, ...) and an entry.json describing them; the modification time of
+    entry.json marks when the entry was last used. Files are delivered as a reflink where the file system supports it, else a copy, never a hardlink: the scripts
+    rewrite their outputs in place, which would change a hardlinked entry too.
+    """
+
+    def __init__(self, directory, max_bytes=CACHE_SIZE):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+    def key(self, job, script):
+        """Returns the cache key of a job: a SHA-1 of the tool, its code version, its normalized arguments and the SHA-1 of the data it reads."""
+        described = {'tool': job['tool'],
+                     'version': code_version(script),
+                     'params': normalized_params(job['args']),
+                     'input_sha1': content_hash(job_input(job)),
+                     'n_outputs': len(job['outputs'])}
+        return hashlib.sha1(json.dumps(described, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def fetch(self, key, outputs):
+        """Delivers the entry's files to outputs and returns True, or returns False if there is no complete entry for key."""
+        entry = self._entry(key)
+        stored = [os.path.join(entry, '%i.bdf' % x) for x in range(len(outputs))]
+        if not all(os.path.isfile(f) for f in stored):
+            return False
+        for src, dst in zip(stored, outputs):
+            deliver(src, dst)
+        _touch(os.path.join(entry, 'entry.json'))
+        return True
+
+    def store(self, key, job):
+        """Adds a finished job's outputs to the cache under key, then removes least recently used entries until the cache fits max_bytes."""
+        entry = self._entry(key)
+        if os.path.isdir(entry):
+            return
+        # The entry is put together under a temporary name and renamed into place, so other workers never see half of it
+        partial = '%s.%i.partial' % (entry, os.getpid())
+        os.makedirs(partial)
+        try:
+            for x, fname in enumerate(job['outputs']):
+                deliver(fname, os.path.join(partial, '%i.bdf' % x))
+            with open(os.path.join(partial, 'entry.json'), 'w') as f:
+                json.dump({'tool': job['tool'], 'args': job['args'], 'outputs': job['outputs']}, f, indent=2, sort_keys=True)
+            os.rename(partial, entry)
+        except OSError as e:
+            shutil.rmtree(partial, ignore_errors=True)
+            if e.errno not in (errno.EEXIST, errno.ENOTEMPTY, errno.EACCES):
+                raise
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the stored outputs fit max_bytes. Returns the number of entries removed."""
+        entries = []
+        for prefix in os.listdir(self.directory):
+            parent = os.path.join(self.directory, prefix)
+            if not os.path.isdir(parent):
+                continue
+            for name in os.listdir(parent):
+                entry = os.path.join(parent, name)
+                try:
+                    used = os.path.getmtime(os.path.join(entry, 'entry.json'))
+                    size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+                except OSError:
+                    continue
+                entries.append((used, size, entry))
+
+        total = sum(size for used, size, entry in entries)
+        removed = 0
+        for used, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+
+def normalized_params(args):
+    """Returns the job arguments other than file names as a sorted list of [name, value] pairs, with numbers as floats so e.g. 512 and 512.000000 give the same key.
+
+    Arguments in OUTPUT_ARGS are kept as flags, without their paths, so the same job written to another directory has the same key. The input file name is left out,
+    so the same data under another name has the same key, unless an argument in NAMED_INPUT_ARGS is given: those outputs record the name.
+    """
+    names = [arg.lstrip('-').partition('=')[0] for arg in args]
+    named = any(name in NAMED_INPUT_ARGS for name in names)
+    params = []
+    for arg in args:
+        name, sep, value = arg.lstrip('-').partition('=')
+        if (name == 'infile' and not named) or name.endswith('outfile'):
+            continue
+        if not sep or name in OUTPUT_ARGS:
+            value = True
+        else:
+            try:
+                value = float(value)
+            except ValueError:
+                value = value.replace(' ', '')
+        params.append([name, value])
+    return sorted(params)
+
+
+def content_hash(fname):
+    """Returns the SHA-1 of a file's contents. Hashes are remembered for as long as the file's size and modification time stay the same."""
+    identity = (os.path.abspath(fname), os.path.getsize(fname), os.path.getmtime(fname))
+    if identity not in _hashes:
+        digest = hashlib.sha1()
+        with open(fname, 'rb') as f:
+            while True:
+                chunk = f.read(HASH_CHUNK_BYTES)
+                if not chunk:
+                    break
+                digest.update(chunk)
+        _hashes[identity] = digest.hexdigest()
+    return _hashes[identity]
+
+
+def deliver(src, dst):
+    """Makes dst a file with src's contents, as a reflink or, failing that, a copy, so writing to either file later never changes the other. Any existing dst is
+    replaced. Returns how dst was made."""
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if _reflink(src, dst):
+        return 'reflink'
+    shutil.copyfile(src, dst + PARTIAL_EXTENSION)
+    replace_file(dst + PARTIAL_EXTENSION, dst)
+    return 'copy'
+
+
+def release(fname):
+    """Removes fname if it is a hardlink shared with another file, e.g. a cache entry delivered by an earlier version, so writing a new output in its place cannot
+    change the other file."""
+    try:
+        if os.stat(fname).st_nlink > 1:
+            os.remove(fname)
+    except OSError:
+        pass
+
+
+def _reflink(src, dst):
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, 'rb') as s:
+            with open(dst, 'wb') as d:
+                fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return True
+    except (IOError, OSError):
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+
+def _touch(fname):
+    now = time.time()
+    try:
+        os.utime(fname, (now, now))
+    except OSError:
+        pass
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: crop.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Worker threads that each write one cropped window of a recording to its own .bdf file, so the cropper's MMN and ABR files are written at the same time.
+
+Required Libraries:
+    NumPy
+"""
+
+import sys
+import threading
+import time
+
+from thukdam.bdf import BDFWriter
+from thukdam.qc import ChannelQC
+from thukdam.reference import ReferencedReader
+from thukdam.spectrum import WelchPSD
+from thukdam.stats import ChannelStats
+
+# Channels of the MMN and ABR files are labelled mV but hold values in volts, as the cropper has always written them. Reading them back with this dimension gives volts.
+CROPPED_DIMENSION = 'V'
+
+# Channels left out of the MMN and ABR files unless all channels are kept
+DROPPED_CHANNELS = ['EXG1-0', 'EXG2-0', 'EXG3-0', 'EXG4-0', 'EXG5-0', 'EXG6-0', 'Resp', 'Temp', 'EXG7', 'EXG8']
+
+
+def channel_headers(header, picks, sfreq):
+    """Returns the output channel headers of the picked channels of an input file header, as the cropper writes them. Physical ranges are filled in by CropWorker."""
+    signals = header['signals']
+    return [{'label': signals[x]['label'], 'dimension': 'mV', 'sample_rate': sfreq, 'digital_max': 8388607, 'digital_min': -8388608, 'prefilter': signals[x]['prefilter'], 'transducer': signals[x]['transducer']} for x in picks]
+
+
+class CropWorker(threading.Thread):
+    """Reads samples start to stop of the picked channels from a shared BDFReader, fits each channel's physical range to the data and writes it to fname.
+
+    signals holds one channel header per picked channel; its physical range is filled in from the data. When qc is set, the worker also keeps a ChannelQC of the
+    channels as recorded, before any re-referencing. When psd_rows lists rows of the picks, the worker also keeps a WelchPSD of those channels as written. Call start()
+    to begin and finish() to wait for the worker, which raises any error the worker hit.
+    """
+
+    def __init__(self, reader, start, stop, picks, fname, signals, header, qc=False, psd_rows=None):
+        threading.Thread.__init__(self, name='CropWorker-%s' % fname)
+        self.daemon = True
+        self.reader = reader
+        self.first = start
+        self.last = stop
+        self.picks = picks
+        self.fname = fname
+        self.signals = signals
+        self.header = header
+        self.stats = ChannelStats(len(picks))
+        self.qc = ChannelQC(*reader.physical_limits(picks)) if qc else None
+        self.psd_rows = psd_rows
+        self.psd = None if psd_rows is None else WelchPSD(reader.sfreq, len(psd_rows))
+        self.record_duration = None
+        self.elapsed = 0.0
+        self.error = None
+
+    @property
+    def n_samples(self):
+        return self.last - self.first
+
+    def run(self):
+        began = time.time()
+        try:
+            if isinstance(self.reader, ReferencedReader):
+                data, recorded = self.reader.read_both(self.first, self.last, self.picks)
+            else:
+                data = recorded = self.reader.read(self.first, self.last, self.picks)
+            self.stats.update(data)
+            if self.qc is not None:
+                self.qc.update(recorded)
+            if self.psd is not None:
+                self.psd.update(data[self.psd_rows])
+            phys_min, phys_max = self.stats.physical_range()
+            for x, signal in enumerate(self.signals):
+                signal['physical_min'] = phys_min[x]
+                signal['physical_max'] = phys_max[x]
+
+            writer = BDFWriter(self.fname, self.signals, self.reader.sfreq, self.n_samples, header=self.header)
+            self.record_duration = writer.record_duration
+            try:
+                writer.write(data)
+            except Exception:
+                writer.abort()
+                raise
+            writer.close(fsync=True)
+        except Exception:
+            self.error = sys.exc_info()[1]
+        self.elapsed = time.time() - began
+
+    def finish(self):
+        """Waits for the worker to finish writing and raises any error it hit."""
+        self.join()
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: epochs.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Cuts the event-locked epochs of a recording out in blocks of events, gathering each block's windows with one indexing operation. Blocks can be used as they
+come, or written to a (n_events, n_channels, n_samples) .npy file through a memory map, so epoch sets far larger than memory can be written and read back a few epochs at a time.
+
+Required Libraries:
+    NumPy
+"""
+
+import os
+
+import numpy
+
+from thukdam.bdf import PARTIAL_EXTENSION, replace_file
+from thukdam.follow import TriggerSteps, stim_channel
+from thukdam.online import TMAX, TMIN
+
+# Epoch windows around each event, in seconds. The ABR window is the one the online average uses.
+MMN_WINDOW = (-0.1, 0.5)
+ABR_WINDOW = (TMIN, TMAX)
+
+# Most bytes of recording read, or of epochs gathered, at a time
+EPOCH_CHUNK_BYTES = 64 * 1024 * 1024
+
+# Endings that replace .bdf in the names of an output's epoch and event files
+EPOCHS_SUFFIX = '_epo.npy'
+EVENTS_SUFFIX = '_epo_events.npy'
+
+
+def epoch_files(fname):
+    """Returns the names of the epoch and event files that go with the output file fname."""
+    base = os.path.splitext(fname)[0]
+    return base + EPOCHS_SUFFIX, base + EVENTS_SUFFIX
+
+
+def epoch_times(sfreq, tmin, tmax):
+    """Returns the time of each sample of the epochs extract_epochs() cuts from tmin to tmax seconds at sfreq."""
+    return numpy.arange(int(round(tmin * sfreq)), int(round(tmax * sfreq)) + 1) / float(sfreq)
+
+
+def onsets(events, start=0, stop=None):
+    """Returns the rows of an mne.find_events array at which a trigger turns on, between samples start and stop. Steps back to 0, as output='step' gives, are left out."""
+    events = numpy.asarray(events)
+    keep = (events[:, 2] != 0) & (events[:, 0] >= start)
+    if stop is not None:
+        keep &= events[:, 0] < stop
+    return events[keep]
+
+
+def read_events(reader):
+    """Returns an mne.find_events style array of the trigger onsets in a BDFReader's trigger channel. Works on recordings and on files written by the cropper."""
+    triggers = TriggerSteps()
+    triggers.update(reader.read_codes(0, reader.n_samples, stim_channel(reader.header)), 0)
+    events = numpy.array([(step, 0, code) for step, code in zip(triggers.steps, triggers.codes)], dtype=numpy.int64).reshape(-1, 3)
+    return onsets(events)
+
+
+def iter_epochs(reader, events, tmin, tmax, picks, chunk_bytes=EPOCH_CHUNK_BYTES):
+    """Cuts the epochs from tmin to tmax seconds around each event of the picked channels of a BDFReader, yielding them a block of events at a time.
+
+    events is an mne.find_events array in the reader's samples. Events whose epoch would run past either end of the recording are left out. Each block is yielded as its
+    events and a (n_events, n_channels, n_times) array of epochs in volts, as the reader gives them. Each block of events is read as one stretch of the recording, which
+    is kept under chunk_bytes unless a single epoch is larger, and its windows are gathered with one indexing operation.
+    """
+    first = int(round(tmin * reader.sfreq))
+    last = int(round(tmax * reader.sfreq)) + 1
+    n_times = last - first
+    events = numpy.asarray(events)
+    events = events[(events[:, 0] + first >= 0) & (events[:, 0] + last <= reader.n_samples)]
+    samples = events[:, 0]
+
+    max_events = max(chunk_bytes // (len(picks) * n_times * 8), 1)
+    max_span = max(chunk_bytes // (len(picks) * 8), n_times)
+    offsets = numpy.arange(first, last)
+    a = 0
+    while a < len(samples):
+        b = min(a + max_events, numpy.searchsorted(samples, samples[a] + max_span - n_times, 'right'))
+        b = max(b, a + 1)
+        lo = samples[a] + first
+        data = reader.read(lo, samples[b - 1] + last, picks)
+        yield events[a:b], data[:, (samples[a:b] - lo)[:, None] + offsets[None, :]].transpose(1, 0, 2)
+        a = b
+
+
+def extract_epochs(reader, events, tmin, tmax, picks, fname, dtype=numpy.float32, chunk_bytes=EPOCH_CHUNK_BYTES):
+    """Writes the epochs iter_epochs() cuts to the .npy file fname, a (n_events, n_channels, n_times) array stored as dtype and written through a memory map.
+
+    The events kept are returned with the epochs, opened read-only through a memory map.
+    """
+    first = int(round(tmin * reader.sfreq))
+    last = int(round(tmax * reader.sfreq)) + 1
+    events = numpy.asarray(events)
+    events = events[(events[:, 0] + first >= 0) & (events[:, 0] + last <= reader.n_samples)]
+
+    partial = fname + PARTIAL_EXTENSION
+    epochs = numpy.lib.format.open_memmap(partial, mode='w+', dtype=dtype, shape=(len(events), len(picks), last - first))
+    try:
+        a = 0
+        for block_events, block in iter_epochs(reader, events, tmin, tmax, picks, chunk_bytes):
+            epochs[a:a + len(block)] = block
+            a += len(block)
+        epochs.flush()
+    except Exception:
+        del epochs
+        os.remove(partial)
+        raise
+    del epochs
+    replace_file(partial, fname, fsync=True)
+    return numpy.load(fname, mmap_mode='r'), events
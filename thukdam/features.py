@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: features.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Band power features of a recording over sliding windows, for machine learning. A recording is read a block of windows at a time; the windows of a block are
+taken as a strided view, transformed with one real FFT across all channels and windows, and their spectra are summed into every band at once with one matrix product.
+The features of a recording are kept as a float32 (n_windows, n_channels * n_bands) matrix.
+
+Required Libraries:
+    NumPy
+"""
+
+import json
+import os
+
+import numpy
+
+from thukdam.spectrum import density_scale, segment_power, strided_segments
+
+# Frequency bands, in Hz, from the lower edge up to but not including the upper edge. Gamma stops below 60 Hz mains.
+BANDS = [('delta', (1.0, 4.0)),
+         ('theta', (4.0, 8.0)),
+         ('alpha', (8.0, 13.0)),
+         ('beta', (13.0, 30.0)),
+         ('gamma', (30.0, 45.0))]
+
+# Length of each window and time from the start of one window to the next, in seconds
+WINDOW_DURATION = 2.0
+WINDOW_STEP = 1.0
+
+# Most bytes of windows transformed at a time
+FEATURE_CHUNK_BYTES = 32 * 1024 * 1024
+
+# Ending that replaces .bdf in the name of a recording's feature file
+FEATURES_SUFFIX = '_features.npz'
+
+
+def feature_file(fname):
+    """Returns the name of the feature file that goes with the recording fname."""
+    return os.path.splitext(fname)[0] + FEATURES_SUFFIX
+
+
+def band_matrix(freqs, bands=BANDS):
+    """Returns a (n_freqs, n_bands) matrix that sums the spectral density at freqs into the power of each band, each bin weighted by the bin width."""
+    step = freqs[1] - freqs[0]
+    return numpy.array([(freqs >= low) & (freqs < high) for name, (low, high) in bands], dtype=numpy.float64).T * step
+
+
+def load_bands(fname):
+    """Reads bands from a JSON file of band names and [low, high] edges in Hz, e.g. {"alpha": [8, 13], "beta": [13, 30]}. Returns them as BANDS, lowest first."""
+    with open(fname) as f:
+        bands = json.load(f)
+    return sorted(((str(name), (float(band[0]), float(band[1]))) for name, band in bands.items()), key=lambda item: item[1])
+
+
+def band_power(reader, picks, bands=BANDS, window=WINDOW_DURATION, step=WINDOW_STEP, chunk_bytes=FEATURE_CHUNK_BYTES):
+    """Returns the power of each band in every window of the picked channels of a BDFReader, in the reader's units squared, as a float32 (n_windows, n_channels, n_bands)
+    array, together with the start time of each window in seconds.
+
+    Windows of window seconds start every step seconds, and each is detrended by its mean and Hann windowed before its spectrum is taken. The recording is read in stretches
+    of whole windows kept under chunk_bytes.
+    """
+    nperseg = int(round(window * reader.sfreq))
+    nstep = int(round(step * reader.sfreq))
+    taper = numpy.hanning(nperseg + 1)[:-1]
+    freqs = numpy.fft.rfftfreq(nperseg, 1 / float(reader.sfreq))
+    weights = density_scale(nperseg, reader.sfreq, taper)[:, None] * band_matrix(freqs, bands)
+
+    n_windows = max((reader.n_samples - nperseg) // nstep + 1, 0)
+    features = numpy.empty((n_windows, len(picks), len(bands)), dtype=numpy.float32)
+    per_chunk = max(chunk_bytes // (len(picks) * nperseg * 8), 1)
+    for a in range(0, n_windows, per_chunk):
+        b = min(a + per_chunk, n_windows)
+        data = reader.read(a * nstep, (b - 1) * nstep + nperseg, picks)
+        power = segment_power(strided_segments(data, nperseg, nstep), taper)
+        features[a:b] = numpy.dot(power, weights).transpose(1, 0, 2)
+    return features, numpy.arange(n_windows) * nstep / float(reader.sfreq)
+
+
+def save_features(fname, features, starts, channels, bands=BANDS, window=WINDOW_DURATION):
+    """Writes band power features to a .npz file as a float32 (n_windows, n_channels * n_bands) matrix, with a <channel>_<band> name for each column, the start time of
+    each window, the channels and the band edges."""
+    columns = ['%s_%s' % (channel, name) for channel in channels for name, band in bands]
+    numpy.savez(fname, features=features.reshape(len(features), -1), columns=numpy.array(columns), starts=starts, window=window, channels=numpy.array(channels),
+                bands=numpy.array([name for name, band in bands]), band_edges=numpy.array([band for name, band in bands]))
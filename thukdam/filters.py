@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: filters.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Block-by-block filtering and resampling, so the decimator can work through a recording in pieces while the next piece is being read. Line noise can be removed on
+the way, with one FIR filter that stops the mains frequency and all of its harmonics at once, so the cost does not grow with the number of harmonics.
+
+Required Libraries:
+    MNE
+    NumPy
+    SciPy
+"""
+
+from fractions import Fraction
+
+import mne
+import numpy
+from scipy.signal import firwin, resample_poly
+
+# Least amount of input data, in seconds, filtered and resampled at a time
+BLOCK_DURATION = 10.0
+
+# Mains frequency of our recordings, in Hz, and the total width of the transition bands around every line-noise stop band, half on each side as in MNE's notch filter
+LINE_FREQ = 60.0
+NOTCH_TRANS_BANDWIDTH = 1.0
+
+
+def line_harmonics(line_freq, sfreq, h_freq=None):
+    """Returns the fundamental line_freq and all of its harmonics whose stop bands fit below half of sfreq. Harmonics above h_freq, which the low-pass removes, are left out."""
+    harmonics = line_freq * numpy.arange(1, int(sfreq / 2.0 / line_freq) + 1)
+    highs, lows = notch_bands(harmonics)
+    keep = highs < sfreq / 2.0
+    if h_freq is not None:
+        keep &= lows < h_freq
+    return harmonics[keep]
+
+
+def notch_bands(harmonics, trans_bandwidth=NOTCH_TRANS_BANDWIDTH):
+    """Returns the (l_freq, h_freq) band edges that make mne's FIR filter a band-stop filter for every harmonic at once, with MNE's default stop band of freq / 200 Hz."""
+    return harmonics + harmonics / 400.0 + trans_bandwidth / 2.0, harmonics - harmonics / 400.0 - trans_bandwidth / 2.0
+
+
+class BlockDecimator(object):
+    """Band-pass filters and resamples a recording one block at a time.
+
+    Each block is read together with margin extra samples on both sides, which covers half the FIR filter and the resampling filter, and only the middle of the result is kept.
+    The kept output is therefore the same as filtering the whole recording at once. Stim channels are not filtered; each output sample keeps the largest event code of the input samples it covers so no trigger is lost.
+    When line_freq is given, the filtered channels are first notch filtered at line_freq and its harmonics below h_freq, with a single FIR filter covering them all.
+    With none below h_freq, harmonics is empty and no notch filter is applied.
+    """
+
+    def __init__(self, freq, sfreq, l_freq, h_freq, n_channels, picks, stim_picks, line_freq=None):
+        self.freq = freq
+        self.sfreq = sfreq
+        self.l_freq = l_freq
+        self.h_freq = h_freq
+        self.line_freq = line_freq
+        self.harmonics = numpy.array([]) if line_freq is None else line_harmonics(line_freq, freq, h_freq)
+        self.picks = numpy.asarray(picks, dtype=int)
+        self.stim_picks = numpy.asarray(stim_picks, dtype=int)
+        self.data_picks = numpy.setdiff1d(numpy.arange(n_channels), self.stim_picks)
+
+        ratio = Fraction(sfreq).limit_denominator(1000) / Fraction(freq).limit_denominator(1000)
+        self.up = ratio.numerator
+        self.down = ratio.denominator
+
+        # The FIR filters applied to the filtered channels, in order, and the resampling filter, the same one resample_poly designs by default
+        self.filters = []
+        if len(self.harmonics):
+            highs, lows = notch_bands(self.harmonics)
+            self.filters.append(mne.filter.create_filter(None, freq, highs, lows, l_trans_bandwidth=NOTCH_TRANS_BANDWIDTH / 2.0, h_trans_bandwidth=NOTCH_TRANS_BANDWIDTH / 2.0, verbose=False))
+        h = mne.filter.create_filter(None, freq, l_freq, h_freq, verbose=False)
+        if h is not None:
+            self.filters.append(h)
+        max_rate = max(self.up, self.down)
+        self.resample_filter = firwin(20 * max_rate + 1, 1.0 / max_rate, window=('kaiser', 5.0))
+
+        filter_margin = sum(len(f) // 2 + 1 for f in self.filters)
+        resample_margin = 10 * max_rate // self.up + 1
+        self.margin = _round_up(filter_margin + resample_margin, self.down)
+
+    def spans(self, n_samples, record_samples):
+        """Splits n_samples input samples into (read_start, read_stop, start, stop) spans of whole input data records, each read with its margins."""
+        step = _round_up(max(int(BLOCK_DURATION * self.freq), 2 * self.margin), _lcm(record_samples, self.down))
+        spans = []
+        for start in range(0, n_samples, step):
+            stop = min(start + step, n_samples)
+            spans.append((max(start - self.margin, 0), min(stop + self.margin, n_samples), start, stop))
+        return spans
+
+    def n_output(self, n_samples):
+        """Number of output samples made from n_samples input samples."""
+        return -(-n_samples * self.up // self.down)
+
+    def process(self, data, first, start, stop):
+        """Filters and resamples data, which holds input samples first onward, and returns the output samples for input samples start to stop."""
+        out_start = start * self.up // self.down
+        out_stop = self.n_output(stop)
+        offset = out_start - first * self.up // self.down
+        out = numpy.empty((data.shape[0], out_stop - out_start))
+
+        if len(self.picks) and len(self.harmonics):
+            highs, lows = notch_bands(self.harmonics)
+            data = mne.filter.filter_data(data, self.freq, highs, lows, picks=self.picks, l_trans_bandwidth=NOTCH_TRANS_BANDWIDTH / 2.0, h_trans_bandwidth=NOTCH_TRANS_BANDWIDTH / 2.0, verbose=False)
+        if len(self.picks):
+            data = mne.filter.filter_data(data, self.freq, self.l_freq, self.h_freq, picks=self.picks, verbose=False)
+        if len(self.data_picks):
+            resampled = resample_poly(data[self.data_picks], self.up, self.down, axis=1, window=self.resample_filter)
+            out[self.data_picks] = resampled[:, offset:offset + out.shape[1]]
+
+        if len(self.stim_picks):
+            stim = data[self.stim_picks, start - first:stop - first]
+            bounds = (numpy.arange(out_start, out_stop) * self.down + self.up - 1) // self.up - start
+            out[self.stim_picks] = numpy.maximum.reduceat(stim, numpy.minimum(bounds, stim.shape[1] - 1), axis=1)
+        return out
+
+
+def _round_up(n, multiple):
+    return -(-n // multiple) * multiple
+
+
+def _lcm(a, b):
+    x, y = a, b
+    while y:
+        x, y = y, x % y
+    return a * b // x
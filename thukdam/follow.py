@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: follow.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Follows a .bdf file while it is still being recorded. Trigger steps are found in each new stretch of data as it is written, and the MMN and ABR blocks are reported
+as soon as each one is complete, using the same rules as the cropper, so the MMN block can be processed while the ABR block is still being recorded.
+
+Required Libraries:
+    NumPy
+"""
+
+import time
+
+import numpy
+
+from thukdam.bdf import BDFReader, record_granule, whole_records
+
+# Seconds between looks at the file for new data records
+POLL_INTERVAL = 1.0
+
+# Seconds the file may stop growing before the recording is taken to have ended, for recording software that never writes the number of data records
+IDLE_SECONDS = 60.0
+
+# Labels of the trigger channel. Without one of them the last channel is used, like the cropper does.
+STIM_LABELS = ('Status', 'STI 014')
+
+# Bits of the BioSemi Status channel that hold the trigger code. The upper bits flag the amplifier state and change on their own.
+TRIGGER_MASK = 0xFFFF
+
+
+def stim_channel(header):
+    """Returns the index of the trigger channel in a .bdf header."""
+    labels = [s['label'] for s in header['signals']]
+    return next((x for x, label in enumerate(labels) if label in STIM_LABELS), len(labels) - 1)
+
+
+class TriggerSteps(object):
+    """Finds every sample at which the trigger code changes, including back to 0, one block of the trigger channel at a time.
+
+    This gives the same samples as mne.find_events(output='step') on the whole recording. steps holds them all, in order, and codes the trigger code each step changes to.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self.codes = []
+        self._last = 0
+
+    def update(self, codes, first):
+        """Adds the steps found in codes, the trigger channel's samples first onward."""
+        codes = numpy.asarray(codes) & TRIGGER_MASK
+        if len(codes) == 0:
+            return
+        changes = numpy.flatnonzero(numpy.diff(numpy.concatenate(([self._last], codes))))
+        self.steps.extend(int(x) + first for x in changes)
+        self.codes.extend(int(c) for c in codes[changes])
+        self._last = codes[-1]
+
+
+class CropFollower(object):
+    """Follows a recording and finds its MMN and ABR blocks while it grows.
+
+    Like the cropper, the MMN block ends at the first trigger that follows the one before last by less than a third of a second, and the ABR block runs from there until
+    triggers stop coming within a tenth of a second. Each block's crop, with its padding and extended to whole data records, is reported by poll() once all of its data is in
+    the file. The recording has ended when the header gives its number of data records, or when the file has not grown for idle_seconds.
+    """
+
+    def __init__(self, fname, mmn_pad=0.5, abr_pad=0.1, idle_seconds=IDLE_SECONDS):
+        self.reader = BDFReader(fname)
+        self.sfreq = self.reader.sfreq
+        self.granule = record_granule(self.sfreq)
+        self.stim = stim_channel(self.reader.header)
+        self.mmn_pad = int(round(mmn_pad * self.sfreq))
+        self.abr_pad = int(round(abr_pad * self.sfreq))
+        self.idle_seconds = idle_seconds
+        self.triggers = TriggerSteps()
+        self.mmn = None
+        self.abr = None
+        self.ended = False
+        self._scanned = 0
+        self._x = 0
+        self._y = None
+        self._mmn_end = None
+        self._abr_end = None
+        self._grew = time.time()
+
+    @property
+    def finished(self):
+        """True once both blocks were reported, or the recording ended."""
+        return (self.mmn is not None and self.abr is not None) or self.ended
+
+    @property
+    def abr_start(self):
+        """Sample of the first ABR trigger once it has been found, else None."""
+        return None if self._mmn_end is None else self.triggers.steps[self._mmn_end]
+
+    def poll(self):
+        """Reads the trigger channel of the data records added since the last call and returns a (name, start, stop) tuple, in samples, for each block completed since."""
+        if self.reader.refresh():
+            self._grew = time.time()
+        n_samples = self.reader.n_samples
+        if n_samples > self._scanned:
+            self.triggers.update(self.reader.read_digital(self._scanned, n_samples, [self.stim])[0], self._scanned)
+            self._scanned = n_samples
+        ended = self.reader.closed or time.time() - self._grew >= self.idle_seconds
+
+        found = []
+        steps = self.triggers.steps
+        freq = self.sfreq
+
+        # Looks for the first ABR trigger, which ends the MMN block
+        if self._mmn_end is None:
+            x = self._x
+            while x + 2 < len(steps) and steps[x + 2] - steps[x] > freq / 3:
+                x += 1
+            self._x = x
+            if x + 2 < len(steps):
+                self._mmn_end = x
+                self._y = x
+
+        if self._mmn_end is not None and self.mmn is None:
+            start = max(steps[0] - self.mmn_pad, 0)
+            stop = self._crop_stop(start, steps[self._mmn_end - 1] + self.mmn_pad + 1, ended)
+            if stop is not None:
+                self.mmn = (start, stop)
+                found.append(('mmn', start, stop))
+
+        # Looks for the end of the ABR block: a gap of at least a tenth of a second after a trigger, which a later trigger or enough data without one shows
+        if self._mmn_end is not None and self._abr_end is None:
+            y = self._y
+            while y + 2 < len(steps) and steps[y + 2] - steps[y] < freq / 10:
+                y += 1
+            self._y = y
+            if y + 2 < len(steps) or (y + 2 == len(steps) and n_samples - steps[y] >= freq / 10) or ended:
+                self._abr_end = min(y + 1, len(steps) - 1)
+
+        if self._abr_end is not None and self.abr is None:
+            start = max(steps[self._mmn_end] - self.abr_pad, 0)
+            stop = self._crop_stop(start, steps[self._abr_end] + self.abr_pad + 1, ended)
+            if stop is not None:
+                self.abr = (start, stop)
+                found.append(('abr', start, stop))
+
+        self.ended = ended
+        return found
+
+    def _crop_stop(self, start, stop, ended):
+        # Returns where the crop ends once its data, extended to whole data records, is in the file, else None
+        wanted = whole_records(start, stop, self.granule, float('inf'))
+        if wanted <= self.reader.n_samples:
+            return wanted
+        if ended:
+            return whole_records(start, stop, self.granule, self.reader.n_samples)
+        return None
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: grand.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Combines the average files of many subjects into grand averages. Each subject's averages are reduced to sums, sums of squares and counts, groups of subjects are
+summed in parallel worker processes, and the partial sums are then added together pairwise, so no more than a few subjects are ever held in memory at once.
+
+Required Libraries:
+    NumPy
+"""
+
+import fnmatch
+import glob
+import multiprocessing
+import os
+
+import numpy
+
+from thukdam.average import AVERAGE_SUFFIX, EpochSums
+
+# Subjects summed by one worker before its partial sums are handed back
+SUBJECTS_PER_TASK = 16
+
+
+def find_averages(pattern, ending=AVERAGE_SUFFIX):
+    """Returns the sorted average files matching pattern, which is either a directory (searched recursively) or a glob pattern. Only files whose names end in ending are kept."""
+    if os.path.isdir(pattern):
+        found = []
+        for dirpath, dirnames, filenames in os.walk(pattern):
+            found.extend(os.path.join(dirpath, f) for f in fnmatch.filter(filenames, '*' + ending))
+    else:
+        found = glob.glob(pattern)
+    return sorted(os.path.abspath(f) for f in found if f.endswith(ending))
+
+
+def subject_waves(fname):
+    """Returns the waves of one subject's average file, by name: 'all' for all trigger codes together, 'code_<n>' for each code, and 'difference' where saved."""
+    data = numpy.load(fname)
+    sums = EpochSums.load(fname)
+    waves = {'all': sums.mean()}
+    for code in sums.codes:
+        waves['code_%i' % code] = sums.mean([code])
+    if 'difference' in data:
+        waves['difference'] = data['difference']
+    return waves, data['times'], data['channels']
+
+
+class GrandSums(object):
+    """Sums, sums of squares and counts, over subjects, of each subject's waves, kept per wave name and per channel.
+
+    A subject adds to a channel's count only where it has an average on that channel. Two GrandSums over the same times and channels add with combine().
+    """
+
+    def __init__(self, times, channels):
+        self.times = numpy.asarray(times)
+        self.channels = numpy.asarray(channels)
+        self.sums = {}
+        self.sumsq = {}
+        self.counts = {}
+        self.subjects = []
+
+    def add(self, fname):
+        """Adds one subject's average file."""
+        waves, times, channels = subject_waves(fname)
+        self._check(times, channels, fname)
+        for name, wave in waves.items():
+            valid = numpy.isfinite(wave).all(axis=1)
+            wave = numpy.where(valid[:, None], wave, 0.0)
+            if name not in self.sums:
+                self.sums[name] = numpy.zeros(wave.shape)
+                self.sumsq[name] = numpy.zeros(wave.shape)
+                self.counts[name] = numpy.zeros(wave.shape[0], dtype=numpy.int64)
+            self.sums[name] += wave
+            self.sumsq[name] += wave * wave
+            self.counts[name] += valid
+        self.subjects.append(fname)
+
+    def combine(self, other):
+        """Adds the sums of other, over another set of subjects, to these."""
+        self._check(other.times, other.channels, 'partial sums')
+        for name in other.sums:
+            if name not in self.sums:
+                self.sums[name] = other.sums[name].copy()
+                self.sumsq[name] = other.sumsq[name].copy()
+                self.counts[name] = other.counts[name].copy()
+            else:
+                self.sums[name] += other.sums[name]
+                self.sumsq[name] += other.sumsq[name]
+                self.counts[name] += other.counts[name]
+        self.subjects.extend(other.subjects)
+        return self
+
+    def mean(self, name):
+        """Grand average of a wave over subjects, per channel."""
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            return self.sums[name] / self.counts[name][:, None]
+
+    def sem(self, name):
+        """Standard error of the grand average over subjects at every sample of every channel."""
+        n = self.counts[name][:, None].astype(numpy.float64)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            variance = numpy.maximum(self.sumsq[name] - self.sums[name] ** 2 / n, 0) / (n - 1)
+            return numpy.sqrt(variance / n)
+
+    def save(self, fname):
+        """Writes the grand average, standard error, subject count, sums and sums of squares of each wave to a .npz file, with the times, channels and subject files."""
+        arrays = {'times': self.times, 'channels': self.channels, 'subjects': numpy.array(self.subjects), 'names': numpy.array(sorted(self.sums))}
+        for name in self.sums:
+            arrays[name + '_mean'] = self.mean(name)
+            arrays[name + '_sem'] = self.sem(name)
+            arrays[name + '_count'] = self.counts[name]
+            arrays[name + '_sums'] = self.sums[name]
+            arrays[name + '_sumsq'] = self.sumsq[name]
+        numpy.savez(fname, **arrays)
+
+    def _check(self, times, channels, source):
+        if len(times) != len(self.times) or not numpy.allclose(times, self.times) or list(channels) != list(self.channels):
+            raise ValueError('%s has different times or channels than the first subject (%i samples, channels %s)' % (source, len(self.times), ', '.join(str(c) for c in self.channels)))
+
+
+def grand_average(fnames, workers=1, subjects_per_task=SUBJECTS_PER_TASK):
+    """Returns the GrandSums of the given subject average files.
+
+    Groups of subjects_per_task subjects are summed by workers processes (in this process when workers is 1), and the partial sums are then added in pairs, level by level,
+    until one is left.
+    """
+    if not fnames:
+        raise ValueError('No average files given')
+    groups = [fnames[a:a + subjects_per_task] for a in range(0, len(fnames), subjects_per_task)]
+    if workers > 1 and len(groups) > 1:
+        pool = multiprocessing.Pool(min(workers, len(groups)))
+        try:
+            partials = pool.map(_sum_group, groups)
+            while len(partials) > 1:
+                pairs = [partials[x:x + 2] for x in range(0, len(partials), 2)]
+                partials = pool.map(_combine_pair, pairs)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        partials = [_sum_group(group) for group in groups]
+        while len(partials) > 1:
+            partials = [_combine_pair(partials[x:x + 2]) for x in range(0, len(partials), 2)]
+    return partials[0]
+
+
+def _sum_group(fnames):
+    # Sums one group of subjects, in a worker
+    data = numpy.load(fnames[0])
+    sums = GrandSums(data['times'], data['channels'])
+    for fname in fnames:
+        sums.add(fname)
+    return sums
+
+
+def _combine_pair(pair):
+    # Adds two partial sums, or passes a lone one through
+    return pair[0].combine(pair[1]) if len(pair) == 2 else pair[0]
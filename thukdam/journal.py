@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: journal.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: An append-only journal of finished batch jobs, so a batch that was stopped part way (power loss, a preempted node) picks up at the first job it had not finished.
+"""
+
+import json
+import os
+
+# Statuses of jobs that do not have to be run again when a batch resumes
+FINISHED = ('ok', 'current', 'cached')
+
+
+class Journal(object):
+    """Records each finished job's result as one JSON line in fname, flushed to disk straight away.
+
+    A line only counts once it is complete, so a line cut short by a crash is ignored and its job run again. With restart an existing journal is discarded.
+    The journal is deleted by remove() once the whole batch is done.
+    """
+
+    def __init__(self, fname, restart=False):
+        self.fname = os.path.abspath(fname)
+        self.results = {}
+        if restart and os.path.exists(self.fname):
+            os.remove(self.fname)
+        if os.path.exists(self.fname):
+            with open(self.fname) as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.results[_key(result)] = result
+        self._file = open(self.fname, 'a')
+        # A line cut short by a crash is ended, so the next result starts on a line of its own
+        if os.path.getsize(self.fname) > 0:
+            with open(self.fname, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+
+    def finished(self, jobs):
+        """Returns the journaled results of jobs, marked as resumed, if every one of them finished earlier and its outputs are unchanged in size, else None."""
+        results = []
+        for job in jobs:
+            result = self.results.get(_key(job))
+            if result is None or result['status'] not in FINISHED:
+                return None
+            for fname, size in result['output_bytes'].items():
+                if not os.path.isfile(fname) or os.path.getsize(fname) != size:
+                    return None
+            results.append(dict(result, resumed=True))
+        return results
+
+    def record(self, results):
+        """Appends the results of finished jobs and flushes them to disk."""
+        for result in results:
+            self._file.write(json.dumps(result, sort_keys=True) + '\n')
+            self.results[_key(result)] = result
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def remove(self):
+        """Closes and deletes the journal."""
+        self._file.close()
+        if os.path.exists(self.fname):
+            os.remove(self.fname)
+
+
+def _key(job):
+    return json.dumps([job['tool'], job['args']])
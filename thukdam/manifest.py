@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: manifest.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Build records kept next to every batch output, so a batch can tell which outputs are still current and only rerun the jobs whose input, code or arguments changed.
+"""
+
+import glob
+import hashlib
+import json
+import os
+
+from thukdam.bdf import PARTIAL_EXTENSION, replace_file
+
+# Extension added to an output file name for its build record
+RECORD_EXTENSION = '.build.json'
+
+_versions = {}
+
+
+def input_identity(fname):
+    """Returns the size, modification time and SHA-1 of the .bdf header of fname, which together identify one version of a recording."""
+    with open(fname, 'rb') as f:
+        fixed = f.read(256)
+        try:
+            header_bytes = int(fixed[184:192])
+        except ValueError:
+            header_bytes = 256
+        header = fixed + f.read(max(header_bytes - 256, 0))
+    return {'size': os.path.getsize(fname),
+            'mtime': os.path.getmtime(fname),
+            'header_sha1': hashlib.sha1(header).hexdigest()}
+
+
+def code_version(script):
+    """Returns the SHA-1 of the script together with the shared Thukdam modules it imports, so editing any of them makes older outputs out of date."""
+    if script not in _versions:
+        package = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha1()
+        for fname in [script] + sorted(glob.glob(os.path.join(package, '*.py'))):
+            with open(fname, 'rb') as f:
+                digest.update(f.read())
+        _versions[script] = digest.hexdigest()
+    return _versions[script]
+
+
+def build_record(job, script):
+    """Returns what a job's outputs depend on: the script and its version, the arguments, and the identity of the file it reads."""
+    infile = job_input(job)
+    return {'tool': job['tool'],
+            'script': os.path.basename(script),
+            'version': code_version(script),
+            'args': job['args'],
+            'input': input_identity(infile) if os.path.isfile(infile) else None}
+
+
+def is_current(job, script):
+    """Returns True if every output of the job exists, is unchanged since it was recorded and was built from the same input, code and arguments as the job would use now."""
+    record = None
+    for fname in job['outputs']:
+        saved = _load(fname)
+        if saved is None or not os.path.isfile(fname):
+            return False
+        if saved['output'] != _output_identity(fname):
+            return False
+        if record is None:
+            record = build_record(job, script)
+        if dict((k, v) for k, v in saved.items() if k != 'output') != record:
+            return False
+    return record is not None
+
+
+def save_records(job, script):
+    """Writes a build record next to each output of a job that has just finished."""
+    record = build_record(job, script)
+    for fname in job['outputs']:
+        saved = dict(record, output=_output_identity(fname))
+        with open(fname + RECORD_EXTENSION + PARTIAL_EXTENSION, 'w') as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
+        replace_file(fname + RECORD_EXTENSION + PARTIAL_EXTENSION, fname + RECORD_EXTENSION)
+
+
+def job_input(job):
+    """Returns the file a job reads, from its --infile argument."""
+    return next(a for a in job['args'] if a.startswith('--infile=')).split('=', 1)[1]
+
+
+def _output_identity(fname):
+    return {'size': os.path.getsize(fname), 'mtime': os.path.getmtime(fname)}
+
+
+def _load(fname):
+    try:
+        with open(fname + RECORD_EXTENSION) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: online.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: A running ABR average kept up to date while clicks are being recorded. Incoming samples go into a ring buffer, each click's epoch is taken out as soon as its last
+sample arrives, and the average and its noise estimate are updated with all the epochs a block completes at once, so the waveform can be watched as it converges.
+
+Latency target: each block handed to OnlineABR.push() is processed in under LATENCY_TARGET seconds per second of data, on one core of a desktop CPU, for recordings at
+up to 16384 Hz, the rate ABR is recorded at, with up to 16 channels, click rates up to 100 per second and the default 100 to 3000 Hz band-pass. Measured with 1 second
+blocks of 16384 Hz data, per second of data, on average and at most:
+    6 channels (the cropper's default), 40 clicks: 1.6 ms, at most 4.0 ms
+    16 channels, 40 clicks: 4.0 ms, at most 8.7 ms
+    16 channels, 100 clicks: 5.0 ms, at most 8.6 ms
+    32 channels, 100 clicks: 9.5 ms, at most 27 ms, so 32 channels at this rate are outside the target
+About half of it is the band-pass filter. At 2048 Hz, 16 channels with 40 clicks take 0.7 ms, at most 2.2 ms, but there the 3000 Hz cut-off is above Nyquist and is
+lowered, see H_FREQ, so the ABR band is not kept.
+
+Required Libraries:
+    NumPy
+    SciPy
+"""
+
+import collections
+import logging
+import time
+
+import numpy
+from scipy.signal import butter, sosfilt, sosfilt_zi
+
+from thukdam.follow import TriggerSteps
+
+# Epoch window around each click, in seconds
+TMIN = -0.002
+TMAX = 0.010
+
+# Causal Butterworth band-pass applied to incoming data, in Hz. The usual ABR band, which needs data sampled above 6000 Hz; below that, the high cut-off is lowered to
+# NYQUIST_FRACTION of the sampling rate and a warning logged.
+L_FREQ = 100.0
+H_FREQ = 3000.0
+NYQUIST_FRACTION = 0.45
+FILTER_ORDER = 2
+
+# Seconds of data kept in the ring buffer. Clicks whose epoch has already left the buffer are skipped; blocks of at most OnlineABR.max_block samples never lose one.
+RING_SECONDS = 10.0
+
+# Seconds of data to push before the first click to be averaged, so the band-pass filter has settled from its start
+SETTLE_SECONDS = 0.05
+
+# Longest time, in seconds, push() should take per second of data handed to it, for the recordings described above
+LATENCY_TARGET = 0.010
+
+# Logger of the Online script, which sets up its handlers
+logger = logging.getLogger('Online_Log')
+
+
+class RingBuffer(object):
+    """Keeps the last capacity samples of n_channels channels. Samples are addressed by their index in the whole stream, whose first sample is origin."""
+
+    def __init__(self, n_channels, capacity, origin=0):
+        self.capacity = capacity
+        self.data = numpy.zeros((n_channels, capacity))
+        self.origin = origin
+        self.end = origin
+
+    @property
+    def start(self):
+        """Index of the oldest sample still held."""
+        return max(self.end - self.capacity, self.origin)
+
+    def append(self, block):
+        """Adds a (n_channels, n_samples) block, overwriting the oldest samples."""
+        n = block.shape[1]
+        if n >= self.capacity:
+            block = block[:, n - self.capacity:]
+            self.end += n - self.capacity
+            n = self.capacity
+        pos = self.end % self.capacity
+        first = min(n, self.capacity - pos)
+        self.data[:, pos:pos + first] = block[:, :first]
+        self.data[:, :n - first] = block[:, first:]
+        self.end += n
+
+    def get_many(self, starts, n):
+        """Returns a (len(starts), n_channels, n) array of the n samples from each of starts, which must all still be held."""
+        starts = numpy.asarray(starts, dtype=numpy.int64)
+        if len(starts) and (starts.min() < self.start or starts.max() + n > self.end):
+            raise ValueError('Samples %i to %i are not in the buffer, which holds %i to %i' % (starts.min(), starts.max() + n, self.start, self.end))
+        return numpy.take(self.data, (starts[:, None] + numpy.arange(n)) % self.capacity, axis=1).transpose(1, 0, 2)
+
+    def get(self, start, stop):
+        """Returns a copy of samples start to stop, which must still be held."""
+        if start < self.start or stop > self.end:
+            raise ValueError('Samples %i to %i are not in the buffer, which holds %i to %i' % (start, stop, self.start, self.end))
+        pos = start % self.capacity
+        n = stop - start
+        if pos + n <= self.capacity:
+            return self.data[:, pos:pos + n].copy()
+        return numpy.concatenate((self.data[:, pos:], self.data[:, :pos + n - self.capacity]), axis=1)
+
+
+class RunningAverage(object):
+    """Running mean and variance of equally shaped epochs, updated one epoch at a time with Welford's method."""
+
+    def __init__(self, n_channels, n_samples):
+        self.count = 0
+        self.mean = numpy.zeros((n_channels, n_samples))
+        self.m2 = numpy.zeros((n_channels, n_samples))
+
+    def update(self, epoch):
+        self.count += 1
+        delta = epoch - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (epoch - self.mean)
+
+    def update_many(self, epochs):
+        """Adds a (n_epochs, n_channels, n_samples) array of epochs at once, combining their mean and variance with the running ones as Chan et al. do."""
+        n = len(epochs)
+        if n == 0:
+            return
+        mean = epochs.mean(axis=0)
+        delta = mean - self.mean
+        total = self.count + n
+        # The batch's own sum of squared deviations, from its sum of squares. Baseline corrected epochs are small next to their spread, so little precision is lost.
+        m2 = numpy.einsum('ect,ect->ct', epochs, epochs) - n * mean ** 2
+        self.m2 += m2 + delta ** 2 * (self.count * n / float(total))
+        self.mean += delta * (n / float(total))
+        self.count = total
+
+    @property
+    def sem(self):
+        """Standard error of the mean at every sample of every channel."""
+        if self.count < 2:
+            return numpy.full(self.mean.shape, numpy.inf)
+        return numpy.sqrt(self.m2 / (self.count - 1) / self.count)
+
+    @property
+    def residual_noise(self):
+        """RMS of the standard error over the epoch, per channel: the noise left in the average. It falls with the square root of the number of clicks."""
+        return numpy.sqrt((self.sem ** 2).mean(axis=1))
+
+    @property
+    def snr(self):
+        """RMS of the average over its residual noise, per channel."""
+        return numpy.sqrt((self.mean ** 2).mean(axis=1)) / self.residual_noise
+
+
+class OnlineABR(object):
+    """Running ABR average of n_channels channels, fed with blocks of samples as they are recorded.
+
+    Each block is band-pass filtered with a causal filter (l_freq or h_freq None leaves that side open) and added to a ring buffer. Trigger steps to a non-zero code (one of codes,
+    if given) are clicks; each click's epoch from tmin to tmax is added to the average once all of it has arrived, with the mean before the click subtracted when baseline is set.
+    Clicks before begin are left out, and restart() starts the average over from a later click. Samples are counted from start, the index of the first sample pushed,
+    e.g. its sample in the recording. A block of more than max_block samples can push clicks out of the ring before they are averaged, so longer stretches of data
+    should be pushed in pieces. The time push() takes for each block is kept in latencies.
+    """
+
+    def __init__(self, sfreq, n_channels, tmin=TMIN, tmax=TMAX, l_freq=L_FREQ, h_freq=H_FREQ, baseline=True, codes=None, ring_seconds=RING_SECONDS, start=0):
+        self.sfreq = sfreq
+        self.first = int(round(tmin * sfreq))
+        self.last = int(round(tmax * sfreq)) + 1
+        self.times = numpy.arange(self.first, self.last) / float(sfreq)
+        self.baseline = baseline and self.first < 0
+        self.codes = codes
+        self.begin = 0
+        self.ring = RingBuffer(n_channels, max(int(ring_seconds * sfreq), 2 * (self.last - self.first)), start)
+        self.average = RunningAverage(n_channels, self.last - self.first)
+        self.triggers = TriggerSteps()
+        self.skipped = 0
+        self.latencies = []
+        self.durations = []
+        self._pending = collections.deque()
+        self._n_steps = 0
+        self._zi = None
+
+        if h_freq is not None and h_freq >= sfreq / 2:
+            logger.warning('High cut-off of %s Hz is above half the %s Hz sampling rate, lowered to %s Hz. The ABR band needs data sampled above %s Hz.\n',
+                           h_freq, sfreq, NYQUIST_FRACTION * sfreq, 2 * h_freq)
+            h_freq = NYQUIST_FRACTION * sfreq
+        if l_freq is not None and h_freq is not None:
+            self.sos = butter(FILTER_ORDER, [l_freq, h_freq], btype='bandpass', fs=sfreq, output='sos')
+        elif l_freq is not None:
+            self.sos = butter(FILTER_ORDER, l_freq, btype='highpass', fs=sfreq, output='sos')
+        elif h_freq is not None:
+            self.sos = butter(FILTER_ORDER, h_freq, btype='lowpass', fs=sfreq, output='sos')
+        else:
+            self.sos = None
+
+    @property
+    def max_block(self):
+        """Most samples push() can take at once without a click completed by them having left the ring."""
+        return self.ring.capacity - (self.last - self.first)
+
+    def push(self, data, codes):
+        """Adds a (n_channels, n_samples) block of samples and the trigger codes recorded with it. Returns the number of clicks added to the average."""
+        began = time.time()
+        start = self.ring.end
+        data = numpy.asarray(data, dtype=numpy.float64)
+        if self.sos is not None and data.shape[1]:
+            if self._zi is None:
+                # Starting from the first sample's steady state avoids a long step response to the electrodes' DC offset
+                self._zi = sosfilt_zi(self.sos)[:, None, :] * data[:, 0][None, :, None]
+            data, self._zi = sosfilt(self.sos, data, axis=1, zi=self._zi)
+        self.ring.append(data)
+        self.triggers.update(codes, start)
+
+        self._pending.extend(self._clicks(self._n_steps))
+        self._n_steps = len(self.triggers.steps)
+
+        # The epochs of every click completed by this block are taken out of the ring and added to the average together
+        clicks = []
+        while self._pending and self._pending[0] + self.last <= self.ring.end:
+            click = self._pending.popleft()
+            if click + self.first < self.ring.start:
+                self.skipped += 1
+            else:
+                clicks.append(click + self.first)
+        if clicks:
+            epochs = self.ring.get_many(clicks, self.last - self.first)
+            if self.baseline:
+                epochs -= epochs[:, :, :-self.first].mean(axis=2)[:, :, None]
+            self.average.update_many(epochs)
+        added = len(clicks)
+
+        self.latencies.append(time.time() - began)
+        self.durations.append(data.shape[1] / float(self.sfreq))
+        return added
+
+    def restart(self, begin):
+        """Empties the average and starts it over with the clicks from sample begin onward, such as the first click of the ABR block once it is known."""
+        self.begin = begin
+        self.average = RunningAverage(self.average.mean.shape[0], self.average.mean.shape[1])
+        self.skipped = 0
+        self._pending = collections.deque(self._clicks(0))
+
+    def _clicks(self, x):
+        # Returns the clicks among trigger steps x onward
+        return [step for step, code in zip(self.triggers.steps[x:], self.triggers.codes[x:])
+                if step >= self.begin and code != 0 and (self.codes is None or code in self.codes)]
+
+    def latency_summary(self):
+        """Returns the mean and largest time push() took per block, the largest per second of data, and the number of blocks over LATENCY_TARGET per second of data."""
+        latencies = numpy.array(self.latencies)
+        per_second = latencies / numpy.maximum(numpy.array(self.durations), 1.0 / self.sfreq)
+        return {'blocks': len(latencies),
+                'mean_seconds': float(latencies.mean()) if len(latencies) else 0.0,
+                'max_seconds': float(latencies.max()) if len(latencies) else 0.0,
+                'max_seconds_per_data_second': float(per_second.max()) if len(latencies) else 0.0,
+                'over_target': int((per_second > LATENCY_TARGET).sum()),
+                'target_seconds_per_data_second': LATENCY_TARGET}
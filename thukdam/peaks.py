@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: peaks.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Finds the latency and amplitude of a peak in a time window of many averaged waves at once. Every wave is searched for local extrema in the same operation, and
+the largest one is placed between samples by fitting a parabola through it and its two neighbours. ABR waves I to V are picked this way for a whole study at once and written
+to a table with one row per subject, channel and wave.
+
+Required Libraries:
+    NumPy
+"""
+
+import csv
+import json
+
+import numpy
+
+# Windows, in seconds after the click, searched for each ABR wave's positive peak. They allow for the delay of insert earphones, and do not overlap so no peak is picked twice.
+WAVE_WINDOWS = [('I', (0.0010, 0.0025)),
+                ('II', (0.0025, 0.0035)),
+                ('III', (0.0035, 0.0045)),
+                ('IV', (0.0045, 0.0053)),
+                ('V', (0.0053, 0.0090))]
+
+# Columns of the peak table
+TABLE_COLUMNS = ['subject', 'channel', 'wave', 'latency_ms', 'amplitude_uv']
+
+
+def find_peaks(waves, times, window, positive=True):
+    """Returns the latency, in seconds, and amplitude of the largest local maximum (minimum when positive is False) of each wave between window[0] and window[1] seconds.
+
+    waves is an array of any shape whose last axis is times; the results have the shape of the other axes. Latency and amplitude are interpolated between samples with a
+    parabola through the peak and its neighbours. Waves with no local extremum in the window give NaN.
+    """
+    waves = numpy.asarray(waves, dtype=numpy.float64)
+    times = numpy.asarray(times)
+    samples = numpy.flatnonzero((times >= window[0]) & (times <= window[1]))
+    samples = samples[(samples > 0) & (samples < len(times) - 1)]
+    shape = waves.shape[:-1]
+    if len(samples) == 0:
+        return numpy.full(shape, numpy.nan), numpy.full(shape, numpy.nan)
+
+    sign = 1.0 if positive else -1.0
+    left = sign * waves[..., samples - 1]
+    middle = sign * waves[..., samples]
+    right = sign * waves[..., samples + 1]
+    candidates = numpy.where((middle > left) & (middle >= right), middle, -numpy.inf)
+    best = numpy.argmax(candidates, axis=-1)[..., None]
+    found = numpy.isfinite(numpy.take_along_axis(candidates, best, axis=-1))[..., 0]
+
+    y0 = numpy.take_along_axis(left, best, axis=-1)[..., 0]
+    y1 = numpy.take_along_axis(middle, best, axis=-1)[..., 0]
+    y2 = numpy.take_along_axis(right, best, axis=-1)[..., 0]
+    curve = y0 - 2 * y1 + y2
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        shift = numpy.where(curve != 0, 0.5 * (y0 - y2) / curve, 0.0)
+    step = times[1] - times[0]
+
+    latency = numpy.where(found, times[samples[best[..., 0]]] + shift * step, numpy.nan)
+    amplitude = numpy.where(found, sign * (y1 - 0.25 * (y0 - y2) * shift), numpy.nan)
+    return latency, amplitude
+
+
+def pick_waves(waves, times, windows=WAVE_WINDOWS):
+    """Finds each named wave's positive peak in waves, an array of any shape whose last axis is times. Returns (name, latency, amplitude) for each window, in order."""
+    return [(name, ) + find_peaks(waves, times, window) for name, window in windows]
+
+
+def load_windows(fname):
+    """Reads wave windows from a JSON file of wave names and [start, stop] latencies in ms, e.g. {"I": [1.0, 3.0], "III": [3.0, 5.0], "V": [5.0, 9.0]}. Returns them as WAVE_WINDOWS, earliest first."""
+    with open(fname) as f:
+        windows = json.load(f)
+    return sorted(((str(name), (window[0] / 1000.0, window[1] / 1000.0)) for name, window in windows.items()), key=lambda item: item[1])
+
+
+def write_table(fname, subjects, channels, picked):
+    """Writes the waves picked from a (n_subjects, n_channels, n_times) array to a CSV file with TABLE_COLUMNS, latencies in ms and amplitudes in uV. Waves not found are left blank."""
+    with open(fname, 'w') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(TABLE_COLUMNS)
+        for s, subject in enumerate(subjects):
+            for c, channel in enumerate(channels):
+                for name, latency, amplitude in picked:
+                    found = not numpy.isnan(latency[s, c])
+                    writer.writerow([subject, channel, name, '%.4f' % (latency[s, c] * 1e3) if found else '', '%.4f' % (amplitude[s, c] * 1e6) if found else ''])
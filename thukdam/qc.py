@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: qc.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Quality control of a recording, gathered while the cropper reads it. Flat and saturated samples and the RMS of every channel are counted from the blocks the
+crop workers already hold, and trigger counts, inter-trigger intervals and block durations come from the events the cropper has found, so the report costs no extra pass
+over the data. The report is written as JSON, with its channel rows also written as a CSV table.
+
+Required Libraries:
+    NumPy
+"""
+
+import csv
+import json
+import os
+
+import numpy
+
+from thukdam.epochs import onsets
+
+# Fractions of flat or saturated samples above which a channel is flagged as bad
+FLAT_LIMIT = 0.01
+SATURATED_LIMIT = 0.001
+
+# Ending that replaces .bdf in the name of a recording's QC report
+QC_SUFFIX = '_qc.json'
+
+# Columns of the channel table
+CHANNEL_COLUMNS = ['block', 'channel', 'flat_fraction', 'saturated_fraction', 'rms_uv', 'flagged']
+
+
+class ChannelQC(object):
+    """Running per-channel counts of flat samples (equal to the sample before) and saturated samples (at the lowest or highest value the channel can hold), and the RMS
+    about the channel mean.
+
+    low and high are the per-channel limits, as BDFReader.physical_limits() gives them. Blocks of shape (n_channels, n_samples) are passed to update() in order.
+    """
+
+    def __init__(self, low, high):
+        self.low = numpy.asarray(low, dtype=numpy.float64)
+        self.high = numpy.asarray(high, dtype=numpy.float64)
+        n_channels = len(self.low)
+        self.count = 0
+        self.flat = numpy.zeros(n_channels, dtype=numpy.int64)
+        self.saturated = numpy.zeros(n_channels, dtype=numpy.int64)
+        self.total = numpy.zeros(n_channels)
+        self.total_sq = numpy.zeros(n_channels)
+        self._shift = None
+        self._last = None
+
+    def update(self, block):
+        """Adds a (n_channels, n_samples) block of samples, the one following the last block added."""
+        block = numpy.asarray(block, dtype=numpy.float64)
+        if block.shape[1] == 0:
+            return
+        self.flat += (block[:, 1:] == block[:, :-1]).sum(axis=1)
+        if self._last is not None:
+            self.flat += block[:, 0] == self._last
+        self._last = block[:, -1].copy()
+        self.saturated += ((block <= self.low[:, None]) | (block >= self.high[:, None])).sum(axis=1)
+
+        # Sums are taken about each channel's first sample, so large electrode offsets do not swamp the RMS
+        if self._shift is None:
+            self._shift = block[:, 0].copy()
+        centred = block - self._shift[:, None]
+        self.total += centred.sum(axis=1)
+        self.total_sq += numpy.einsum('ij,ij->i', centred, centred)
+        self.count += block.shape[1]
+
+    @property
+    def flat_fraction(self):
+        return self.flat / float(max(self.count, 1))
+
+    @property
+    def saturated_fraction(self):
+        return self.saturated / float(max(self.count, 1))
+
+    @property
+    def rms(self):
+        n = float(max(self.count, 1))
+        return numpy.sqrt(numpy.maximum(self.total_sq / n - (self.total / n) ** 2, 0))
+
+    def flagged(self, flat_limit=FLAT_LIMIT, saturated_limit=SATURATED_LIMIT):
+        """Returns a boolean array of the channels with too many flat or saturated samples."""
+        return (self.flat_fraction > flat_limit) | (self.saturated_fraction > saturated_limit)
+
+    def summary(self, labels):
+        """Returns the channel QC as one dictionary per channel, labelled, with the RMS in uV."""
+        flagged = self.flagged()
+        return [{'channel': label, 'flat_fraction': round(float(self.flat_fraction[x]), 6), 'saturated_fraction': round(float(self.saturated_fraction[x]), 6),
+                 'rms_uv': round(float(self.rms[x] * 1e6), 3), 'flagged': bool(flagged[x])} for x, label in enumerate(labels)]
+
+
+def trigger_summary(events, sfreq, start=0, stop=None):
+    """Returns the trigger counts per code, the inter-trigger intervals in ms (mean, SD, min and max) and the time in seconds from the first to the last trigger, of the
+    trigger onsets of an mne.find_events array between samples start and stop."""
+    found = onsets(events, start, stop)
+    codes, counts = numpy.unique(found[:, 2], return_counts=True)
+    summary = {'n_triggers': len(found),
+               'codes': dict((str(int(c)), int(n)) for c, n in zip(codes, counts)),
+               'duration_sec': round(float(found[-1, 0] - found[0, 0]) / sfreq, 4) if len(found) else 0.0}
+    intervals = numpy.diff(found[:, 0]) * 1000.0 / sfreq
+    if len(intervals):
+        summary['iti_ms'] = {'mean': round(float(intervals.mean()), 4), 'sd': round(float(intervals.std()), 4), 'min': round(float(intervals.min()), 4), 'max': round(float(intervals.max()), 4)}
+    return summary
+
+
+def channel_table(fname):
+    """Returns the name of the CSV channel table written with the QC report fname."""
+    return os.path.splitext(fname)[0] + '.csv'
+
+
+def write_report(fname, report):
+    """Writes a QC report to fname as JSON, and its channel rows to a CSV table with CHANNEL_COLUMNS, named by channel_table(). Returns the name of the table."""
+    with open(fname, 'w') as f:
+        json.dump(report, f, sort_keys=True)
+    table = channel_table(fname)
+    with open(table, 'w') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(CHANNEL_COLUMNS)
+        for name in sorted(report['blocks']):
+            for row in report['blocks'][name]['channels']:
+                writer.writerow([name] + [row[column] for column in CHANNEL_COLUMNS[1:]])
+    return table
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: reference.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Re-references a recording to the mean of some of its channels, such as linked mastoids recorded on EXG channels, as it is read. A reader wrapped in
+ReferencedReader reads the picked channels together with the reference channels and applies a reference matrix to each block read with one matrix product, so the
+reference channels can still be dropped from the output and re-referencing takes no extra pass over the data.
+
+Required Libraries:
+    NumPy
+"""
+
+import numpy
+
+from thukdam.follow import stim_channel
+
+
+def reference_matrix(picks, referenced, reference):
+    """Returns (inputs, matrix) for re-referencing the picked channels to the mean of the reference channels.
+
+    inputs are the channels to read: the picks followed by any reference channels not picked. matrix is a (len(picks), len(inputs)) array that, multiplied with the
+    channels read, gives each picked channel in referenced minus the mean of the reference channels, and every other picked channel unchanged.
+    """
+    picks = [int(p) for p in picks]
+    inputs = picks + [r for r in reference if r not in picks]
+    matrix = numpy.zeros((len(picks), len(inputs)))
+    matrix[numpy.arange(len(picks)), numpy.arange(len(picks))] = 1.0
+    columns = [inputs.index(r) for r in reference]
+    for row, p in enumerate(picks):
+        if p in referenced:
+            matrix[row, columns] -= 1.0 / len(reference)
+    return inputs, matrix
+
+
+class ReferencedReader(object):
+    """Reads a BDFReader's channels re-referenced to the mean of the channels labelled in reference, and otherwise behaves as the reader it wraps.
+
+    Channels with the same dimension as the reference channels are re-referenced, apart from the trigger channel; others, such as the trigger channel, are read as they
+    are. The reference matrix of each set of picks is made once and reused for every block read.
+    """
+
+    def __init__(self, reader, reference):
+        self.reader = reader
+        signals = reader.header['signals']
+        labels = [s['label'] for s in signals]
+        missing = [label for label in reference if label not in labels]
+        if missing:
+            raise ValueError('Reference channels %s are not in %s' % (missing, reader.fname))
+        self.reference = [labels.index(label) for label in reference]
+        dimension = signals[self.reference[0]]['dimension']
+        stim = stim_channel(reader.header)
+        self.referenced = set(x for x in range(len(signals)) if signals[x]['dimension'] == dimension and x != stim)
+        self._matrices = {}
+
+    def matrix(self, picks=None):
+        """Returns the (inputs, matrix) of reference_matrix() for the picked channels (all by default)."""
+        picks = tuple(range(self.reader.n_channels) if picks is None else (int(p) for p in picks))
+        if picks not in self._matrices:
+            self._matrices[picks] = reference_matrix(picks, self.referenced, self.reference)
+        return self._matrices[picks]
+
+    def read(self, start, stop, picks=None):
+        """Returns samples start to stop of the picked channels (all by default), re-referenced, as a (n_channels, n_samples) array of physical values."""
+        return self.read_both(start, stop, picks)[0]
+
+    def read_both(self, start, stop, picks=None):
+        """Returns samples start to stop of the picked channels (all by default) both re-referenced and as recorded, from one read of the file."""
+        inputs, matrix = self.matrix(picks)
+        data = self.reader.read(start, stop, inputs)
+        return numpy.dot(matrix, data), data[:matrix.shape[0]]
+
+    def __getattr__(self, name):
+        return getattr(self.reader, name)
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: schedule.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Runs batch jobs on a pool of worker processes. Each input file's jobs are admitted only while their estimated peak memory fits a RAM budget, largest files first.
+
+Required Libraries:
+    MNE
+    NumPy
+    SciPy
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    from multiprocessing import SimpleQueue
+except ImportError:
+    from multiprocessing.queues import SimpleQueue
+
+from thukdam.batch import failed_results, run_jobs
+from thukdam.bdf import read_header
+
+# Memory taken by one worker process once Python, NumPy, SciPy and MNE are loaded, in bytes
+WORKER_MEMORY = 250e6
+
+# Peak bytes the cropper holds per input sample and channel: the 3 byte samples, int32 and float64 copies made while decoding, and the float64 result
+CROP_BYTES_PER_SAMPLE = 36
+
+# Input blocks the decimator holds at once: the prefetch queue, the block being read, and the filtered and resampled copies of the current block. The decimated blocks
+# waiting in the write-behind queue are a fraction of an input block each.
+DECI_BLOCKS = 6
+
+# Input files a worker process handles before it is replaced by a fresh one, which returns any memory MNE leaked to the operating system
+JOBS_PER_WORKER = 10
+
+# Share of the machine's physical memory used as the default budget
+BUDGET_FRACTION = 0.75
+
+# Seconds between checks for worker processes that died while running a task
+WORKER_POLL = 1.0
+
+# Loggers of the scripts run by the workers
+_LOGGERS = ('Crop_Log', 'Deci_Log')
+
+# Queue on which a worker process reports each task it starts, set by _init_worker
+_started = None
+
+
+def estimate_memory(fname, profile):
+    """Estimates the peak memory, in bytes, of running the profile's jobs on one input file, from its .bdf header.
+
+    The estimate is channels x sampling rate x duration x bytes held per sample by the hungriest job, plus the memory of the worker itself. Crop outputs are at most the length
+    of their input, so the decimator's estimate from the input file also covers decimating a crop.
+    """
+    header = read_header(fname)
+    signals = header['signals']
+    n_channels = len(signals)
+    sfreq = signals[0]['sample_rate']
+    n_samples = header['n_records'] * signals[0]['samples_per_record']
+    if header['n_records'] < 0:
+        n_samples = (os.path.getsize(fname) - header['header_bytes']) // (3 * n_channels)
+
+    peak = 0
+    if 'cropper' in profile:
+        # The stim channel is read once more as float64 to find the events
+        peak = max(peak, n_channels * n_samples * CROP_BYTES_PER_SAMPLE + n_samples * 8)
+    if 'decimator' in profile:
+        params = profile['decimator'] or {}
+        samp_rate = float(params.get('samp_rate') or 512.0)
+        block = _decimator_block(sfreq, samp_rate, params.get('low_freq'), params.get('high_freq'), n_channels, n_samples, params.get('line_freq'))
+        peak = max(peak, n_channels * 8 * DECI_BLOCKS * block)
+    return int(WORKER_MEMORY + peak)
+
+
+def memory_budget(fraction=BUDGET_FRACTION):
+    """Returns fraction of the machine's physical memory in bytes, or None where it cannot be found."""
+    try:
+        return int(fraction * os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES'))
+    except (AttributeError, ValueError, OSError):
+        pass
+    try:
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong), ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong), ('ullTotalVirtual', ctypes.c_ulonglong),
+                        ('ullAvailVirtual', ctypes.c_ulonglong), ('sullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return int(fraction * status.ullTotalPhys)
+    except (ImportError, AttributeError):
+        pass
+    return None
+
+
+class Scheduler(object):
+    """Runs tasks on a pool of worker processes against a memory budget.
+
+    A task is a dictionary with the 'jobs' of one input file, run in order by thukdam.batch.run_jobs, and their estimated peak 'memory' in bytes. Pending tasks are started
+    largest first; when the largest no longer fits next to the running ones, the largest one that does fit is started instead. A task bigger than the whole budget runs alone.
+    Workers are replaced after jobs_per_worker tasks. Worker logs go to log_dir, one file per worker process, instead of the console. force and cache are passed on to run_jobs.
+    A task that raises, or whose worker process dies, finishes with every one of its jobs failed, so a bad input file never stalls the batch.
+
+    run() runs a fixed list of tasks. Callers that keep finding new work, such as the watch mode, call start(), then submit() and collect() as often as needed, and stop().
+    """
+
+    def __init__(self, workers, budget, jobs_per_worker=JOBS_PER_WORKER, log_dir=None, force=False, cache=None):
+        self.workers = workers
+        self.budget = budget
+        self.jobs_per_worker = jobs_per_worker
+        self.log_dir = log_dir
+        self.force = force
+        self.cache = cache
+        self.peak_reserved = 0
+        self.wall_time = 0.0
+        self._pool = None
+        self._pending = []
+        self._running = {}
+
+    @property
+    def busy(self):
+        """True while any submitted task is waiting or running."""
+        return bool(self._pending or self._running)
+
+    def start(self):
+        """Starts the worker pool."""
+        self._pending = []
+        self._done = queue.Queue()
+        self._reserved = 0
+        self._running = {}
+        self._next_key = 0
+        # Workers report the pid that took each task, so a task whose worker died can be told from one that is still running. A SimpleQueue writes straight to its
+        # pipe, so the report is not lost when the worker dies right after.
+        self._started = SimpleQueue()
+        self._pids = {}
+        self._missing = set()
+        self._results = {}
+        self._lost = set()
+        self._began = time.time()
+        self._pool = multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=(self.log_dir, self._started), maxtasksperchild=self.jobs_per_worker)
+
+    def submit(self, tasks):
+        """Adds tasks to the pending ones and starts as many as the workers and the memory budget allow."""
+        self._pending.extend(tasks)
+        self._pending.sort(key=lambda t: t['memory'], reverse=True)
+        self._admit()
+
+    def collect(self, timeout=None):
+        """Waits up to timeout seconds (without a timeout, until a task finishes) and returns a (task, results) pair for every task that finished.
+
+        The memory of finished tasks is released and pending tasks are started in their place. While waiting, tasks whose worker process died are finished as failed.
+        """
+        finished = []
+        began = time.time()
+        while True:
+            self._find_lost()
+            wait = WORKER_POLL if timeout is None else min(WORKER_POLL, began + timeout - time.time())
+            try:
+                item = self._done.get(timeout=wait) if wait > 0 else self._done.get_nowait()
+                while True:
+                    key, results = item
+                    # A task given up for lost may still report back; it has already been finished
+                    task = self._running.pop(key, None)
+                    self._results.pop(key, None)
+                    if task is not None:
+                        self._reserved -= task['memory']
+                        for result in results:
+                            result['estimated_mb'] = task['memory'] / 1e6
+                        finished.append((task, results))
+                    item = self._done.get_nowait()
+            except queue.Empty:
+                pass
+            if finished or (timeout is not None and time.time() - began >= timeout):
+                break
+        self._admit()
+        return finished
+
+    def stop(self, terminate=False):
+        """Waits for running tasks to finish, or with terminate kills them, and shuts the pool down. Tasks that have not started are dropped."""
+        self._pending = []
+        if not terminate:
+            self._pool.close()
+            # The pool would wait forever on a task whose worker died, so running tasks are waited on here, watching for lost ones, and the pool is killed if any were
+            while any(not self._results[key].ready() for key in self._running if key in self._results and key not in self._lost):
+                time.sleep(WORKER_POLL)
+                self._find_lost()
+            terminate = bool(self._lost)
+        if terminate:
+            self._pool.terminate()
+        self._pool.join()
+        self.wall_time = time.time() - self._began
+
+    def run(self, tasks, callback=None):
+        """Runs every task and returns the job results in the order they finished. callback(task, results) is called in this process as each task finishes."""
+        finished = []
+        self.start()
+        try:
+            self.submit(tasks)
+            while self.busy:
+                for task, results in self.collect():
+                    finished.extend(results)
+                    if callback is not None:
+                        callback(task, results)
+        except BaseException:
+            self.stop(terminate=True)
+            raise
+        self.stop()
+        return finished
+
+    def summary(self):
+        """Returns the pool settings, the most memory reserved at once and the wall time of the last run."""
+        return {'workers': self.workers,
+                'memory_budget_mb': self.budget / 1e6 if self.budget != float('inf') else None,
+                'jobs_per_worker': self.jobs_per_worker,
+                'peak_reserved_mb': self.peak_reserved / 1e6,
+                'wall_seconds': self.wall_time}
+
+    def _admit(self):
+        while self._pending and len(self._running) < self.workers:
+            task = next((t for t in self._pending if self._reserved + t['memory'] <= self.budget), None)
+            if task is None and not self._running:
+                task = self._pending[0]
+            if task is None:
+                return
+            self._pending.remove(task)
+            self._reserved += task['memory']
+            key = self._next_key
+            self._next_key += 1
+            self._running[key] = task
+            self.peak_reserved = max(self.peak_reserved, self._reserved)
+            # _run_task catches errors in the jobs themselves. Errors outside them, e.g. a task that cannot be pickled, come back through error_callback, which
+            # Python 2 pools do not have.
+            callbacks = {'callback': lambda results, key=key: self._done.put((key, results))}
+            if sys.version_info[0] >= 3:
+                callbacks['error_callback'] = lambda error, key=key, task=task: self._done.put((key, failed_results(task['jobs'], _error_text(error))))
+            self._results[key] = self._pool.apply_async(_run_task, (key, task['jobs'], self.force, self.cache), **callbacks)
+
+    def _find_lost(self):
+        # A pool never reports a task whose worker died, so the tasks of workers no longer alive are failed here. A worker may exit just after handing back its last
+        # result, before the result is collected, so a task is given up only once its worker has been found gone twice in a row.
+        while not self._started.empty():
+            key, pid = self._started.get()
+            self._pids[key] = pid
+        alive = set(p.pid for p in multiprocessing.active_children())
+        for key, pid in list(self._pids.items()):
+            if key not in self._running:
+                del self._pids[key]
+                self._missing.discard(key)
+            elif pid in alive:
+                self._missing.discard(key)
+            elif key in self._missing:
+                del self._pids[key]
+                self._missing.discard(key)
+                self._lost.add(key)
+                self._done.put((key, failed_results(self._running[key]['jobs'], 'worker process %i died' % pid)))
+            else:
+                self._missing.add(key)
+
+
+def _decimator_block(sfreq, samp_rate, low_freq, high_freq, n_channels, n_samples, line_freq=None):
+    from thukdam.filters import BlockDecimator
+
+    high_freq = samp_rate / 2 if high_freq is None else float(high_freq)
+    low_freq = None if low_freq is None else float(low_freq)
+    line_freq = None if line_freq is None else float(line_freq)
+    decimator = BlockDecimator(sfreq, samp_rate, low_freq, high_freq, n_channels, [], [], line_freq)
+    spans = decimator.spans(n_samples, 1)
+    return max(read_stop - read_start for read_start, read_stop, start, stop in spans) if spans else 0
+
+
+def _init_worker(log_dir, started):
+    # Ctrl+C is left to the main process, which lets running jobs finish instead of killing them half way
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    global _started
+    _started = started
+
+    # Each worker logs to its own file, so workers neither truncate each other's log nor flood the console. The scripts only add their own handlers to loggers that have none.
+    if log_dir is None:
+        return
+    handler = logging.FileHandler(os.path.join(log_dir, 'worker_%i.log' % os.getpid()), mode='w')
+    handler.setLevel(logging.DEBUG)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%m-%d-%Y %H:%M:%S'))
+    for name in _LOGGERS:
+        logger = logging.getLogger(name)
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+
+
+def _run_task(key, jobs, force, cache):
+    _started.put((key, os.getpid()))
+    try:
+        results = run_jobs(jobs, force, cache)
+    except Exception:
+        results = failed_results(jobs, _error_text(sys.exc_info()[1]))
+    peak = _peak_memory()
+    for result in results:
+        result['worker_pid'] = os.getpid()
+        result['worker_peak_mb'] = peak
+    return results
+
+
+def _error_text(error):
+    return '%s: %s' % (type(error).__name__, error)
+
+
+def _peak_memory():
+    # Largest resident size this worker process has reached so far, in MB
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
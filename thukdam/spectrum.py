@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: spectrum.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Welch power spectra of every channel, accumulated from blocks of data as a script streams them, so spectra of whole recordings are had without loading them
+again. The Hann-windowed, half-overlapping segments of each block are taken as a strided view and transformed with one real FFT across all channels, and samples left over
+at the end of a block are carried into the next, so the result is the same as Welch's method over the whole recording.
+
+Required Libraries:
+    NumPy
+"""
+
+import os
+
+import numpy
+from numpy.lib.stride_tricks import as_strided
+
+# Length of each Welch segment in seconds, and the fraction of it shared with the next segment
+SEGMENT_DURATION = 2.0
+SEGMENT_OVERLAP = 0.5
+
+# Most bytes of windowed segments transformed at a time
+PSD_CHUNK_BYTES = 32 * 1024 * 1024
+
+# Ending that replaces .bdf in the name of an output's spectra file
+PSD_SUFFIX = '_psd.npz'
+
+
+def psd_file(fname):
+    """Returns the name of the spectra file that goes with the output file fname."""
+    return os.path.splitext(fname)[0] + PSD_SUFFIX
+
+
+def strided_segments(data, nperseg, step):
+    """Returns a (n_channels, n_segments, nperseg) view, without copying, of the segments of a (n_channels, n_samples) array starting every step samples."""
+    data = numpy.ascontiguousarray(data)
+    n_segments = max((data.shape[1] - nperseg) // step + 1, 0)
+    return as_strided(data, shape=(data.shape[0], n_segments, nperseg), strides=(data.strides[0], data.strides[1] * step, data.strides[1]), writeable=False)
+
+
+def segment_power(segments, window):
+    """Returns the squared magnitude of the real FFT of every segment along the last axis, each detrended by its mean and multiplied by window."""
+    spectra = numpy.fft.rfft((segments - segments.mean(axis=-1)[..., None]) * window, axis=-1)
+    return spectra.real ** 2 + spectra.imag ** 2
+
+
+def density_scale(nperseg, sfreq, window):
+    """Returns the factor at each rfft frequency that turns the segment_power() of nperseg samples at sfreq into a one-sided power spectral density."""
+    scale = numpy.full(nperseg // 2 + 1, 2.0 / (sfreq * (window ** 2).sum()))
+    scale[0] /= 2
+    if nperseg % 2 == 0:
+        scale[-1] /= 2
+    return scale
+
+
+class WelchPSD(object):
+    """Running Welch power spectral density of n_channels channels sampled at sfreq, in units squared per Hz, one-sided.
+
+    Each segment is detrended by its mean and Hann windowed, as scipy.signal.welch does by default. Blocks of shape (n_channels, n_samples) are passed to update() in order.
+    """
+
+    def __init__(self, sfreq, n_channels, segment_duration=SEGMENT_DURATION, overlap=SEGMENT_OVERLAP, chunk_bytes=PSD_CHUNK_BYTES):
+        self.sfreq = float(sfreq)
+        self.n_channels = n_channels
+        self.nperseg = int(round(segment_duration * sfreq))
+        self.step = self.nperseg - int(round(overlap * self.nperseg))
+        self.window = numpy.hanning(self.nperseg + 1)[:-1]
+        self.freqs = numpy.fft.rfftfreq(self.nperseg, 1 / self.sfreq)
+        self.power = numpy.zeros((n_channels, len(self.freqs)))
+        self.n_segments = 0
+        self.chunk_segments = max(chunk_bytes // (n_channels * self.nperseg * 8), 1)
+        self._carry = numpy.zeros((n_channels, 0))
+
+    def update(self, block):
+        """Adds the segments completed by a (n_channels, n_samples) block, the one following the last block added."""
+        data = numpy.concatenate((self._carry, numpy.asarray(block, dtype=numpy.float64)), axis=1)
+        segments = strided_segments(data, self.nperseg, self.step)
+        n_segments = segments.shape[1]
+        for a in range(0, n_segments, self.chunk_segments):
+            self.power += segment_power(segments[:, a:a + self.chunk_segments], self.window).sum(axis=1)
+        self.n_segments += n_segments
+        self._carry = data[:, n_segments * self.step:].copy()
+
+    @property
+    def psd(self):
+        """Power spectral density of each channel at freqs, averaged over the segments seen so far."""
+        return self.power * density_scale(self.nperseg, self.sfreq, self.window) / max(self.n_segments, 1)
+
+
+def save_spectra(fname, channels, **spectra):
+    """Writes each named WelchPSD to a .npz file as <name>_freqs, <name>_psd and <name>_segments, with the channel labels."""
+    arrays = {'channels': numpy.array(channels), 'names': numpy.array(sorted(spectra))}
+    for name, psd in spectra.items():
+        arrays[name + '_freqs'] = psd.freqs
+        arrays[name + '_psd'] = psd.psd
+        arrays[name + '_segments'] = psd.n_segments
+    numpy.savez(fname, **arrays)
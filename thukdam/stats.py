@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: stats.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Per-channel running statistics gathered while data is streamed to the output files, used to set each channel's physical range in the .bdf header.
+FittedWriter does this for outputs made a block at a time, whose range is only known once the last block is made.
+
+Required Libraries:
+    NumPy
+"""
+
+import os
+
+import numpy
+
+from thukdam.bdf import BDFWriter, header_number, record_samples
+
+# Ending added to an output file name for the spool of its samples while it is made
+SPOOL_EXTENSION = '.spool'
+
+# Most bytes of spooled samples read back at a time
+SPOOL_CHUNK_BYTES = 32 * 1024 * 1024
+
+
+class ChannelStats(object):
+    """Running per-channel minimum, maximum, mean and RMS.
+
+    Blocks of shape (n_channels, n_samples) are passed to update() as they go by, so the statistics
+    cost one vectorized pass over data that is already in memory and never an extra read of the file.
+    """
+
+    def __init__(self, n_channels):
+        self.n_channels = n_channels
+        self.count = 0
+        self.minimum = numpy.full(n_channels, numpy.inf)
+        self.maximum = numpy.full(n_channels, -numpy.inf)
+        self.total = numpy.zeros(n_channels)
+        self.total_sq = numpy.zeros(n_channels)
+
+    def update(self, block):
+        """Adds a (n_channels, n_samples) block of samples to the running statistics."""
+        block = numpy.asarray(block, dtype=numpy.float64)
+        if block.shape[1] == 0:
+            return
+        numpy.minimum(self.minimum, block.min(axis=1), out=self.minimum)
+        numpy.maximum(self.maximum, block.max(axis=1), out=self.maximum)
+        self.total += block.sum(axis=1)
+        self.total_sq += numpy.einsum('ij,ij->i', block, block)
+        self.count += block.shape[1]
+
+    @property
+    def mean(self):
+        return self.total / max(self.count, 1)
+
+    @property
+    def rms(self):
+        return numpy.sqrt(self.total_sq / max(self.count, 1))
+
+    def physical_range(self):
+        """Returns (physical_min, physical_max) arrays covering every sample seen, rounded outward to values that fit the 8 character .bdf header fields.
+
+        Flat channels (min == max) are widened by 1 so the header range is never empty.
+        """
+        phys_min = numpy.empty(self.n_channels)
+        phys_max = numpy.empty(self.n_channels)
+        for x in range(self.n_channels):
+            low = self.minimum[x] if self.count else -1.0
+            high = self.maximum[x] if self.count else 1.0
+            if high <= low:
+                low, high = low - 1.0, high + 1.0
+            phys_min[x] = header_number(low, upward=False)
+            phys_max[x] = header_number(high, upward=True)
+        return phys_min, phys_max
+
+
+
+class FittedWriter(object):
+    """Writes a .bdf file as BDFWriter does, with each channel's physical range fitted to the data written, like the cropper's outputs.
+
+    Blocks given to write() are added to a ChannelStats and spooled to fname + SPOOL_EXTENSION as float64 samples. close() fits the ranges with physical_range(),
+    writes the file from the spool with a BDFWriter and deletes the spool. It has BDFWriter's write(), close() and abort(), so a WriteBehind can spool blocks on its
+    thread while the next block is made. The spool takes 8 bytes per sample on disk next to the output, several times the finished file.
+    """
+
+    def __init__(self, fname, signals, sfreq, n_samples, header=None):
+        self.fname = fname
+        self.signals = [dict(signal) for signal in signals]
+        self.sfreq = sfreq
+        self.n_samples = n_samples
+        self.header = header
+        self.stats = ChannelStats(len(signals))
+        self._spool = fname + SPOOL_EXTENSION
+        self._file = open(self._spool, 'wb')
+
+    @property
+    def record_duration(self):
+        return record_samples(self.n_samples, self.sfreq) / float(self.sfreq)
+
+    def write(self, block):
+        """Spools a (n_channels, n_samples) block of physical values and adds it to the statistics."""
+        block = numpy.asarray(block, dtype=numpy.float64)
+        self.stats.update(block)
+        # Stored sample by sample, so any stretch of samples can be read back as one piece
+        self._file.write(numpy.ascontiguousarray(block.T).tobytes())
+
+    def close(self, fsync=False):
+        """Fits each channel's physical range to the spooled samples, writes them to fname and deletes the spool. If anything goes wrong the error is raised
+        and neither the spool nor a partial file is left behind."""
+        try:
+            self._file.close()
+            phys_min, phys_max = self.stats.physical_range()
+            for x, signal in enumerate(self.signals):
+                signal['physical_min'] = phys_min[x]
+                signal['physical_max'] = phys_max[x]
+            n_channels = len(self.signals)
+            writer = BDFWriter(self.fname, self.signals, self.sfreq, self.n_samples, header=self.header)
+            try:
+                with open(self._spool, 'rb') as f:
+                    count = max(SPOOL_CHUNK_BYTES // (8 * n_channels), 1) * n_channels
+                    while True:
+                        samples = numpy.fromfile(f, dtype=numpy.float64, count=count)
+                        if not len(samples):
+                            break
+                        writer.write(samples.reshape(-1, n_channels).T)
+            except Exception:
+                writer.abort()
+                raise
+            writer.close(fsync)
+        finally:
+            self.abort()
+
+    def abort(self):
+        """Closes and deletes the spool."""
+        self._file.close()
+        if os.path.exists(self._spool):
+            os.remove(self._spool)
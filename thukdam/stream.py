@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: stream.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Background threads that move blocks of data between the disk and the main thread, so slow reads from the study share overlap with filtering and resampling.
+"""
+
+import sys
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# Number of blocks a background thread may hold ready ahead of the main thread
+PREFETCH_DEPTH = 2
+
+# Number of blocks the main thread may hand to a writer thread before it has to wait
+WRITE_DEPTH = 4
+
+_DONE = object()
+
+
+class PrefetchReader(object):
+    """Reads blocks on a background thread into a bounded queue while the main thread works on the current one.
+
+    read is called as read(*span) for each span in spans, in order, and iterating over the reader yields (span, data) pairs.
+    At most depth blocks are read ahead, which bounds the memory used. Errors raised by read are raised again in the main thread.
+    """
+
+    def __init__(self, read, spans, depth=PREFETCH_DEPTH):
+        self.read = read
+        self.spans = list(spans)
+        self.depth = depth
+        self.n_blocks = 0
+        self.n_bytes = 0
+        self.read_time = 0.0
+        self.wait_time = 0.0
+        self.total_time = 0.0
+        self._depth_total = 0
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __iter__(self):
+        self._thread = threading.Thread(target=self._run, name='PrefetchReader')
+        self._thread.daemon = True
+        began = time.time()
+        self._thread.start()
+        try:
+            while True:
+                self._depth_total += self._queue.qsize()
+                waited = time.time()
+                item = self._queue.get()
+                self.wait_time += time.time() - waited
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                self.n_blocks += 1
+                yield item
+        finally:
+            self.close()
+            self.total_time = time.time() - began
+
+    def close(self):
+        """Stops the background thread, e.g. when the main thread stops iterating early."""
+        self._stop.set()
+        while self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self._thread = None
+
+    def summary(self):
+        """Returns throughput and queue statistics of the blocks read so far."""
+        return {'blocks': self.n_blocks,
+                'megabytes': self.n_bytes / 1e6,
+                'read_seconds': self.read_time,
+                'read_mb_per_sec': self.n_bytes / 1e6 / self.read_time if self.read_time else 0.0,
+                'wait_seconds': self.wait_time,
+                'total_seconds': self.total_time,
+                'mean_queue_depth': self._depth_total / float(max(self.n_blocks, 1)),
+                'queue_size': self.depth}
+
+    def _run(self):
+        try:
+            for span in self.spans:
+                if self._stop.is_set():
+                    return
+                began = time.time()
+                data = self.read(*span)
+                self.read_time += time.time() - began
+                self.n_bytes += getattr(data, 'nbytes', 0)
+                self._put((span, data))
+            self._put(_DONE)
+        except Exception:
+            self._put(_Failure(sys.exc_info()[1]))
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+
+class WriteBehind(object):
+    """Hands blocks to a writer on a dedicated thread through a bounded queue, so encoding and disk writes overlap with the main thread's next computation.
+
+    writer is any object with write(block), close(fsync) and abort() methods, such as a BDFWriter. close() waits for every queued block, closes the writer with fsync and
+    raises any error the writer thread hit, in which case the writer is aborted instead. An error is also raised by the next write() call, so the main thread finds out early.
+    """
+
+    def __init__(self, writer, depth=WRITE_DEPTH):
+        self.writer = writer
+        self.depth = depth
+        self.n_blocks = 0
+        self.write_time = 0.0
+        self.wait_time = 0.0
+        self._error = None
+        self._queue = queue.Queue(maxsize=depth)
+        self._thread = threading.Thread(target=self._run, name='WriteBehind')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self, block):
+        """Queues a block for writing. Waits only if depth blocks are already queued."""
+        self._check()
+        waited = time.time()
+        self._queue.put(block)
+        self.wait_time += time.time() - waited
+
+    def close(self):
+        """Waits until every queued block is written, then closes and fsyncs the writer."""
+        self._queue.put(_DONE)
+        self._thread.join()
+        self._check()
+
+    def summary(self):
+        """Returns the number of blocks written, time spent writing and time the main thread waited on a full queue."""
+        return {'blocks': self.n_blocks,
+                'write_seconds': self.write_time,
+                'wait_seconds': self.wait_time,
+                'queue_size': self.depth}
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        # After an error the queue is still drained so the main thread never waits forever on a full queue
+        while True:
+            block = self._queue.get()
+            if block is _DONE:
+                break
+            if self._error is None:
+                try:
+                    began = time.time()
+                    self.writer.write(block)
+                    self.write_time += time.time() - began
+                    self.n_blocks += 1
+                except Exception:
+                    self._error = sys.exc_info()[1]
+        try:
+            if self._error is None:
+                self.writer.close(fsync=True)
+            else:
+                self.writer.abort()
+        except Exception:
+            if self._error is None:
+                self._error = sys.exc_info()[1]
+
+
+class _Failure(object):
+    def __init__(self, error):
+        self.error = error
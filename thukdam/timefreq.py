@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: timefreq.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Morlet wavelet time-frequency power of epochs, averaged per trigger code. The Fourier transforms of a bank of wavelets, one per frequency, are made once;
+a block of epochs is then transformed together, multiplied with the whole bank and transformed back, so every epoch, channel and frequency of a block is convolved at
+once. Blocks are sized to a memory budget and cut straight from the cropped recording.
+
+Power within half a wavelet of either end of an epoch is computed partly from the zeros the epoch is padded with. Epochs are therefore cut wider than the window of
+interest, by the half length of the longest wavelet on both sides (tf_window()), so power over all of the window, its baseline included, is free of these edge effects.
+edge_free() marks where power is free of them, and baseline_db() uses and returns only those times.
+
+Required Libraries:
+    NumPy
+"""
+
+import numpy
+
+from thukdam.average import MMN_ABSOLUTE, MMN_PEAK_TO_PEAK, reject_mask
+from thukdam.epochs import MMN_WINDOW, epoch_times, iter_epochs
+
+# Frequencies of the wavelets, in Hz, and their number of cycles. Half a cycle per Hz makes every wavelet 0.8 sec long, 0.4 sec on either side of its centre.
+FREQS = numpy.arange(4.0, 42.0, 2.0)
+N_CYCLES = FREQS / 2.0
+
+# Standard deviations of its Gaussian at which each wavelet is cut off on either side of its centre
+WAVELET_SIGMAS = 5.0
+
+# Most bytes the Fourier transforms and power of one block of epochs may take
+TF_MEMORY = 256 * 1024 * 1024
+
+# Ending that replaces .bdf in the name of a cropped file's time-frequency file
+TFR_SUFFIX = '_tfr.npz'
+
+
+def morlet_bank(sfreq, freqs=FREQS, n_cycles=N_CYCLES):
+    """Returns a (n_freqs, n_samples) array of complex Morlet wavelets, each centred in the same odd number of samples and scaled to unit energy, as MNE makes them.
+
+    Each wavelet is cut off WAVELET_SIGMAS standard deviations of its Gaussian from its centre.
+    """
+    n_cycles = numpy.broadcast_to(n_cycles, numpy.shape(freqs))
+    wavelets = []
+    for freq, cycles in zip(freqs, n_cycles):
+        sigma = cycles / (2.0 * numpy.pi * freq)
+        t = numpy.arange(0.0, WAVELET_SIGMAS * sigma, 1.0 / sfreq)
+        t = numpy.concatenate((-t[::-1], t[1:]))
+        wavelet = numpy.exp(2j * numpy.pi * freq * t) * numpy.exp(-t ** 2 / (2.0 * sigma ** 2))
+        wavelets.append(wavelet / (numpy.sqrt(0.5) * numpy.linalg.norm(wavelet)))
+    size = max(len(w) for w in wavelets)
+    bank = numpy.zeros((len(wavelets), size), dtype=numpy.complex128)
+    for x, wavelet in enumerate(wavelets):
+        pad = (size - len(wavelet)) // 2
+        bank[x, pad:pad + len(wavelet)] = wavelet
+    return bank
+
+
+def half_lengths(freqs=FREQS, n_cycles=N_CYCLES):
+    """Returns the time, in seconds, from the centre of each wavelet to its ends: how far from an end of an epoch power at that frequency has to be to be free of edge effects."""
+    freqs = numpy.asarray(freqs, dtype=numpy.float64)
+    return WAVELET_SIGMAS * numpy.broadcast_to(n_cycles, freqs.shape) / (2.0 * numpy.pi * freqs)
+
+
+def tf_window(freqs=FREQS, n_cycles=N_CYCLES, window=MMN_WINDOW):
+    """Returns the (tmin, tmax) epoch window, in seconds, to cut for the wavelets: window widened on both sides by the longest half length, rounded up to 10 ms."""
+    half = numpy.ceil(half_lengths(freqs, n_cycles).max() * 100) / 100
+    return round(window[0] - half, 2), round(window[1] + half, 2)
+
+
+def edge_free(times, freqs=FREQS, n_cycles=N_CYCLES):
+    """Returns a (n_freqs, n_times) boolean array, True where the wavelet of each frequency centred at each of the epoch's times lies wholly within the epoch."""
+    half = half_lengths(freqs, n_cycles)[:, None]
+    return (times - times[0] >= half) & (times[-1] - times >= half)
+
+
+class TFRSums(object):
+    """Sums of Morlet power of epochs for each channel, kept separately for each trigger code, over freqs and the epochs' times.
+
+    The wavelet bank is transformed once, for epochs sampled at times, which must be at least as long as the longest wavelet. add() convolves a block of epochs with
+    every wavelet at once. n_epochs counts the epochs added. edge_free marks the frequencies and times whose power is free of edge effects.
+    """
+
+    def __init__(self, sfreq, n_channels, times, freqs=FREQS, n_cycles=N_CYCLES):
+        self.freqs = numpy.asarray(freqs, dtype=numpy.float64)
+        self.times = numpy.asarray(times, dtype=numpy.float64)
+        n_times = len(self.times)
+        self.shape = (n_channels, len(self.freqs), n_times)
+        self.edge_free = edge_free(self.times, self.freqs, n_cycles)
+        bank = morlet_bank(sfreq, self.freqs, n_cycles)
+        if bank.shape[1] > n_times:
+            raise ValueError('Wavelets of %i samples are longer than the epochs of %i samples. Use fewer cycles or higher frequencies.' % (bank.shape[1], n_times))
+        # Transforms are padded to a power of 2 at least as long as the full convolution, so no epoch wraps around onto itself
+        self.n_fft = 1 << int(n_times + bank.shape[1] - 2).bit_length()
+        self.offset = (bank.shape[1] - 1) // 2
+        self.bank = numpy.fft.fft(bank, self.n_fft, axis=1)
+        self.sums = {}
+        self.counts = {}
+        self.n_epochs = 0
+
+    @property
+    def codes(self):
+        return sorted(self.sums)
+
+    def epoch_bytes(self):
+        """Bytes add() takes per epoch: its transforms at every frequency, the convolved epochs and their power."""
+        n_channels, n_freqs, n_times = self.shape
+        return n_channels * n_freqs * (2 * self.n_fft * 16 + n_times * 8)
+
+    def power(self, epochs):
+        """Returns the (n_epochs, n_channels, n_freqs, n_times) Morlet power of a (n_epochs, n_channels, n_times) block of epochs."""
+        n_times = self.shape[2]
+        spectra = numpy.fft.fft(epochs, self.n_fft, axis=-1)
+        convolved = numpy.fft.ifft(spectra[:, :, None, :] * self.bank[None, None], axis=-1)[..., self.offset:self.offset + n_times]
+        return convolved.real ** 2 + convolved.imag ** 2
+
+    def add(self, epochs, codes, keep=None):
+        """Adds the power of a (n_epochs, n_channels, n_times) block of epochs with their trigger codes. keep, from reject_mask(), leaves epochs out channel by channel."""
+        codes = numpy.asarray(codes)
+        if keep is None:
+            keep = numpy.ones(epochs.shape[:2], dtype=bool)
+        power = self.power(epochs)
+        self.n_epochs += len(epochs)
+        for code in numpy.unique(codes):
+            code = int(code)
+            if code not in self.sums:
+                self.sums[code] = numpy.zeros(self.shape)
+                self.counts[code] = numpy.zeros(self.shape[0], dtype=numpy.int64)
+            chosen = codes == code
+            weights = keep[chosen].astype(numpy.float64)
+            self.sums[code] += numpy.einsum('ec,ecft->cft', weights, power[chosen])
+            self.counts[code] += keep[chosen].sum(axis=0)
+
+    def mean(self, codes=None):
+        """Average power over the epochs of the given codes (all by default), per channel, frequency and time."""
+        codes = self.codes if codes is None else codes
+        total = sum(self.sums[c] for c in codes)
+        count = sum(self.counts[c] for c in codes)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            return total / count[:, None, None]
+
+    def save(self, fname, channels, keep=slice(None), **extra):
+        """Writes the average power and epoch counts of each code to a .npz file as (n_codes, ...) arrays, with the codes, freqs, times, channels and edge_free mask.
+        Only the times selected by keep, a slice, are written."""
+        codes = self.codes
+        numpy.savez(fname, codes=numpy.array(codes, dtype=numpy.int64), freqs=self.freqs, times=self.times[keep], channels=numpy.array(channels),
+                    power=numpy.array([self.mean([c])[..., keep] for c in codes]), counts=numpy.array([self.counts[c] for c in codes]),
+                    edge_free=self.edge_free[:, keep], **extra)
+
+
+def average_power(reader, events, picks, freqs=FREQS, n_cycles=N_CYCLES, peak_to_peak=MMN_PEAK_TO_PEAK, absolute=MMN_ABSOLUTE, memory=TF_MEMORY, window=MMN_WINDOW):
+    """Returns the TFRSums of the epochs of the picked channels of a BDFReader, such as the cropper's MMN file, around each event of an mne.find_events array, and the
+    slice of its times that falls within window.
+
+    Epochs are cut over tf_window(), a block at a time sized so each block's transforms fit in memory; events too close to either end of the recording for that window
+    are left out. Each epoch has its mean over the baseline of window, the times from window's start to 0, subtracted, so electrode offsets do not leak into the power,
+    and is checked over window with reject_mask() as the average stage does.
+    """
+    tmin, tmax = tf_window(freqs, n_cycles, window)
+    times = epoch_times(reader.sfreq, tmin, tmax)
+    first = int(round(window[0] * reader.sfreq)) - int(round(tmin * reader.sfreq))
+    keep = slice(first, first + len(epoch_times(reader.sfreq, window[0], window[1])))
+    baseline = (times >= times[keep][0]) & (times < 0)
+
+    sums = TFRSums(reader.sfreq, len(picks), times, freqs, n_cycles)
+    chunk_bytes = max(memory // sums.epoch_bytes(), 1) * len(picks) * len(times) * 8
+    for block_events, block in iter_epochs(reader, events, tmin, tmax, picks, chunk_bytes):
+        block -= block[:, :, baseline].mean(axis=2)[:, :, None]
+        sums.add(block, block_events[:, 2], reject_mask(block[:, :, keep], peak_to_peak, absolute))
+    return sums, keep
+
+
+def baseline_db(power, times, edge_free):
+    """Returns power, of any shape whose last two axes are freqs and times, in dB relative to its mean over the times before 0, using only the times edge_free marks.
+    Times outside edge_free, and frequencies with no such times before 0, are NaN."""
+    before = edge_free & (times < 0)
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        reference = (power * before).sum(axis=-1) / before.sum(axis=-1)
+        return numpy.where(edge_free, 10 * numpy.log10(power / reference[..., None]), numpy.nan)
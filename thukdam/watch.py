@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module name: watch.py
+Author: Enrique Guzman
+Date created: 10/19/2026
+Credits: [Enrique Guzman, John V. Koger]
+Copyright: 2019 Board of Regents of University of Wisconsin System
+
+Description: Watches a folder for .bdf recordings as they are copied in and hands each one out once it has stopped changing, so the batch runner can process new sessions as they land.
+Changes are picked up with Linux inotify where it is available, and by looking through the folder every few seconds everywhere else.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from thukdam.batch import find_inputs, is_output
+from thukdam.bdf import read_header
+
+# Seconds a file's size and modification time must stay the same before it is processed
+STABLE_SECONDS = 30.0
+
+# Seconds between looks through the folder when polling, and longest wait for inotify events
+POLL_INTERVAL = 5.0
+
+# inotify events that mean a file in the folder was added or written to
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_EVENT = struct.Struct('iIII')
+
+
+class FolderWatcher(object):
+    """Hands out the .bdf files in directory (not its subfolders) once they are complete.
+
+    A file is complete when its size and modification time have not changed for stable_seconds and, if its header gives the number of data records, the file holds them all.
+    Files already in the folder when watching starts are handed out too, and a file is handed out again if it changes later. Outputs of the batch runner are ignored.
+    With polling, or where inotify is not available (Windows, macOS), the folder is looked through every poll_interval seconds. Network shares should be polled, since
+    inotify does not see files written by other computers.
+    """
+
+    def __init__(self, directory, stable_seconds=STABLE_SECONDS, poll_interval=POLL_INTERVAL, polling=False):
+        self.directory = os.path.abspath(directory)
+        self.stable_seconds = stable_seconds
+        self.poll_interval = poll_interval
+        self._seen = {}
+        self._candidates = {}
+        self._inotify = None
+        if not polling:
+            try:
+                self._inotify = _Inotify(self.directory)
+            except (OSError, AttributeError):
+                self._inotify = None
+        self._scan()
+
+    @property
+    def mode(self):
+        return 'polling' if self._inotify is None else 'inotify'
+
+    def ready(self):
+        """Waits up to poll_interval seconds for changes and returns the files that have become complete, oldest change first."""
+        if self._inotify is None:
+            time.sleep(self.poll_interval)
+            self._scan()
+        else:
+            for name in self._inotify.read(self.poll_interval):
+                fname = os.path.join(self.directory, name)
+                if fname.lower().endswith('.bdf') and not is_output(fname):
+                    self._note(fname)
+
+        now = time.time()
+        ready = []
+        for fname, (identity, since) in list(self._candidates.items()):
+            try:
+                current = _identity(fname)
+            except OSError:
+                del self._candidates[fname]
+                continue
+            if current != identity:
+                self._candidates[fname] = (current, now)
+            elif now - since >= self.stable_seconds and is_complete(fname):
+                del self._candidates[fname]
+                self._seen[fname] = identity
+                ready.append((since, fname))
+        return [fname for since, fname in sorted(ready)]
+
+    def close(self):
+        """Stops watching the folder."""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _scan(self):
+        for fname in find_inputs(os.path.join(self.directory, '*.bdf')):
+            try:
+                identity = _identity(fname)
+            except OSError:
+                continue
+            if self._seen.get(fname) != identity and fname not in self._candidates:
+                self._candidates[fname] = (identity, time.time())
+
+    def _note(self, fname):
+        try:
+            self._candidates[fname] = (_identity(fname), time.time())
+        except OSError:
+            pass
+
+
+def is_complete(fname):
+    """Returns True if fname has a readable .bdf header and, when the header gives the number of data records, holds all of them."""
+    try:
+        header = read_header(fname)
+    except (IOError, OSError, ValueError, IndexError):
+        return False
+    if header['n_records'] < 0:
+        return True
+    record_bytes = 3 * sum(s['samples_per_record'] for s in header['signals'])
+    return os.path.getsize(fname) >= header['header_bytes'] + header['n_records'] * record_bytes
+
+
+def _identity(fname):
+    stat = os.stat(fname)
+    return (stat.st_size, stat.st_mtime)
+
+
+class _Inotify(object):
+    # Minimal inotify binding through ctypes, watching one folder for new and written files
+
+    def __init__(self, directory):
+        if not sys.platform.startswith('linux'):
+            raise OSError('inotify is only available on Linux')
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init()
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init failed')
+        path = directory if isinstance(directory, bytes) else directory.encode(sys.getfilesystemencoding())
+        if libc.inotify_add_watch(self.fd, path, _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, 'inotify_add_watch failed for %s' % directory)
+
+    def read(self, timeout):
+        """Waits up to timeout seconds and returns the names of the files that changed."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        data = os.read(self.fd, 64 * 1024)
+        names = set()
+        pos = 0
+        while pos + _EVENT.size <= len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, pos)
+            name = data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b'\0')
+            pos += _EVENT.size + length
+            if name:
+                names.add(name.decode(sys.getfilesystemencoding()))
+        return sorted(names)
+
+    def close(self):
+        os.close(self.fd)